@@ -1,16 +1,647 @@
 import os
 import re
+import sys
 import json
+import copy
+import hashlib
+import time
 import shutil
 import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+# 共用的输出器位于数据包更新脚本目录
+sys.path.insert(0, str(Path(__file__).resolve().parent / '皇室导弹战争数据包更新'))
+from reporter import Reporter, add_reporter_arguments, reporter_from_args
+
+def compile_path_pattern(pattern, recursive=True):
+    """把操作的路径模式编译为匹配相对路径（/分隔）的正则，语义与glob/rglob一致"""
+    parts = [part for part in pattern.replace('\\', '/').split('/') if part and part != '.']
+    regex = '(?:[^/]+/)*' if recursive else ''
+    for i, part in enumerate(parts):
+        is_last = i == len(parts) - 1
+        if part == '**':
+            # ** 匹配零个或多个目录
+            regex += '.*' if is_last else '(?:[^/]+/)*'
+            continue
+        segment = ''
+        j = 0
+        while j < len(part):
+            char = part[j]
+            if char == '*':
+                segment += '[^/]*'
+            elif char == '?':
+                segment += '[^/]'
+            elif char == '[':
+                end = part.find(']', j + 1)
+                if end == -1:
+                    segment += re.escape(char)
+                else:
+                    body = part[j + 1:end]
+                    if body.startswith('!'):
+                        body = '^' + body[1:]
+                    segment += '[' + body.replace('\\', '\\\\') + ']'
+                    j = end
+            else:
+                segment += re.escape(char)
+            j += 1
+        regex += segment if is_last else segment + '/'
+    return re.compile(regex)
+
+def _literal_runs(items):
+    """收集正则序列中必然出现的连续字面量片段"""
+    runs = []
+    current = []
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            current.append(chr(av))
+            continue
+        
+        if current:
+            runs.append(''.join(current))
+            current = []
+        
+        if op is sre_parse.SUBPATTERN:
+            # 分组内容同样是必需的（带局部标志的分组除外）
+            _, add_flags, _, sub = av
+            if not add_flags & re.IGNORECASE:
+                runs.extend(_literal_runs(sub))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            # 至少重复一次的内容也是必需的
+            min_count, _, sub = av
+            if min_count >= 1:
+                runs.extend(_literal_runs(sub))
+    
+    if current:
+        runs.append(''.join(current))
+    return runs
+
+def extract_required_literals(search, flags=0):
+    """从正则中提取必需字面量，返回候选元组（内容包含任意一个才可能匹配）；无法提取时返回None"""
+    try:
+        parsed = sre_parse.parse(search, flags)
+    except Exception:
+        return None
+    
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    
+    items = list(parsed)
+    if len(items) == 1 and items[0][0] is sre_parse.BRANCH:
+        # 顶层分支：每个分支各取一个最长字面量，任意一个出现即可
+        literals = []
+        for branch in items[0][1][1]:
+            runs = _literal_runs(branch)
+            if not runs:
+                return None
+            literals.append(max(runs, key=len))
+        return tuple(literals)
+    
+    runs = _literal_runs(items)
+    if not runs:
+        return None
+    return (max(runs, key=len),)
+
+class CompiledPattern:
+    """预编译的替换规则，附带用于快速预筛选的必需字面量"""
+    def __init__(self, pattern):
+        self.search = pattern["search"]
+        self.replace = pattern["replace"]
+        self.regex = None
+        self.literals = None
+        self.error = None
+        
+        try:
+            # 处理多行匹配
+            flags = re.DOTALL if '\n' in self.search else 0
+            self.regex = re.compile(self.search, flags)
+            self.literals = extract_required_literals(self.search, flags)
+        except Exception as e:
+            self.error = e
+    
+    def may_match(self, content):
+        """用子串检查快速判断内容是否可能匹配"""
+        if self.regex is None:
+            return False
+        if self.literals is None:
+            return True
+        return any(literal in content for literal in self.literals)
+
+# JSON路径中的单个片段：[数字]、[*] 或键名
+_JSON_PATH_TOKEN = re.compile(r'\[(\d+|\*)\]|([^\[\]]+)')
+
+def parse_json_path(path):
+    """
+    解析JSON路径，返回片段列表
+    
+    语法：点分隔的键名（如 components.can_place_on），[n] 表示列表下标，
+    * 或 [*] 表示任意一个子节点，** 表示任意深度（含零层）
+    """
+    tokens = []
+    for part in path.split('.'):
+        for match in _JSON_PATH_TOKEN.finditer(part):
+            index, name = match.groups()
+            if index == '*' or name == '*':
+                tokens.append(('any', None))
+            elif index is not None:
+                tokens.append(('index', int(index)))
+            elif name == '**':
+                tokens.append(('deep', None))
+            else:
+                tokens.append(('key', name))
+    return tokens
+
+def _json_key(node, name):
+    """在字典中查找键，允许省略 minecraft: 命名空间"""
+    if name in node:
+        return name
+    namespaced = 'minecraft:' + name
+    if namespaced in node:
+        return namespaced
+    return None
+
+def _json_children(node):
+    """返回节点的所有子键（字典键或列表下标）"""
+    if isinstance(node, dict):
+        return list(node.keys())
+    if isinstance(node, list):
+        return list(range(len(node)))
+    return []
+
+def iter_json_targets(container, key, tokens):
+    """产出路径匹配到的所有 (容器, 键)，container[key] 即匹配到的节点"""
+    if not tokens:
+        yield container, key
+        return
+    
+    node = container[key]
+    kind, value = tokens[0]
+    rest = tokens[1:]
+    if kind == 'deep':
+        yield from iter_json_targets(container, key, rest)
+        for child in _json_children(node):
+            yield from iter_json_targets(node, child, tokens)
+    elif kind == 'any':
+        for child in _json_children(node):
+            yield from iter_json_targets(node, child, rest)
+    elif kind == 'index':
+        if isinstance(node, list) and -len(node) <= value < len(node):
+            yield from iter_json_targets(node, value, rest)
+    elif isinstance(node, dict):
+        child = _json_key(node, value)
+        if child is not None:
+            yield from iter_json_targets(node, child, rest)
+
+def json_matches(node, expected):
+    """判断节点是否满足条件：字典按子集递归比较，其余值要求相等"""
+    if isinstance(expected, dict):
+        if not isinstance(node, dict):
+            return False
+        for name, value in expected.items():
+            child = _json_key(node, name)
+            if child is None or not json_matches(node[child], value):
+                return False
+        return True
+    return node == expected
+
+def json_merge(existing, value):
+    """把 value 合并进 existing：对象逐键合并，数组追加缺少的元素，已有的其他值保持不变"""
+    if existing is None:
+        return copy.deepcopy(value)
+    if isinstance(existing, dict) and isinstance(value, dict):
+        merged = dict(existing)
+        for name, child in value.items():
+            merged[name] = json_merge(existing.get(name), child)
+        return merged
+    if isinstance(existing, list) and isinstance(value, list):
+        return existing + [copy.deepcopy(item) for item in value if item not in existing]
+    return existing
+
+def dump_json_like(data, original):
+    """按原文件的缩进风格序列化JSON"""
+    if '\n' not in original.strip():
+        text = json.dumps(data, ensure_ascii=False)
+    else:
+        match = re.search(r'\n([ \t]+)\S', original)
+        text = json.dumps(data, indent=match.group(1) if match else 2, ensure_ascii=False)
+    if original.endswith('\n'):
+        text += '\n'
+    return text
+
+def span_edit(old, new):
+    """去掉公共前后缀，得到新旧文本之间的最小编辑（字节偏移基于UTF-8编码）"""
+    old_bytes = old.encode('utf-8')
+    new_bytes = new.encode('utf-8')
+    limit = min(len(old_bytes), len(new_bytes))
+    
+    prefix = len(os.path.commonprefix([old_bytes, new_bytes]))
+    # 不在多字节字符中间切分
+    while prefix > 0 and prefix < len(old_bytes) and old_bytes[prefix] & 0xC0 == 0x80:
+        prefix -= 1
+    
+    suffix = min(len(os.path.commonprefix([old_bytes[::-1], new_bytes[::-1]])), limit - prefix)
+    while suffix > 0 and old_bytes[len(old_bytes) - suffix] & 0xC0 == 0x80:
+        suffix -= 1
+    
+    return {
+        "start": prefix,
+        "end": len(old_bytes) - suffix,
+        "old": old_bytes[prefix:len(old_bytes) - suffix].decode('utf-8'),
+        "new": new_bytes[prefix:len(new_bytes) - suffix].decode('utf-8'),
+    }
+
+class JsonTransform:
+    """
+    结构化JSON变换：对路径匹配到（且满足 match 条件）的每个节点执行一个操作
+    
+    支持的操作:
+    unwrap  -- 只有一个键 key 的对象替换为该键的值（如 {"item": X} -> X）
+    hoist   -- 用节点下 from 路径处的值替换节点（如 predicates[0]）
+    set     -- 在对象中设置键 key 为 value
+    merge   -- 把 value 合并进对象中键 key 的值（不存在时设置，已有内容保留）
+    replace -- 把节点替换为 value
+    delete  -- 删除对象中的键 key
+    rename  -- 把对象中的键 key 重命名为 to（保持键顺序）
+    """
+    OPS = ('unwrap', 'hoist', 'set', 'merge', 'replace', 'delete', 'rename')
+    
+    def __init__(self, spec):
+        self.spec = spec
+        self.op = spec["op"]
+        if self.op not in self.OPS:
+            raise ValueError(f"未知的JSON操作: {self.op}")
+        self.tokens = parse_json_path(spec.get("path", ""))
+        self.match = spec.get("match")
+        self.source_tokens = parse_json_path(spec["from"]) if self.op == 'hoist' else None
+        
+        # 路径中最后一个键名作为预筛选字面量
+        keys = [value for kind, value in self.tokens if kind == 'key']
+        self.literal = keys[-1] if keys else None
+    
+    def may_match(self, content):
+        """用子串检查快速判断内容是否可能包含目标节点"""
+        return self.literal is None or self.literal in content
+    
+    def apply(self, holder):
+        """对 holder[0]（JSON根节点）执行变换，返回修改的节点数"""
+        spec = self.spec
+        changes = 0
+        seen = set()
+        targets = []
+        for container, key in iter_json_targets(holder, 0, self.tokens):
+            if (id(container), key) not in seen:
+                seen.add((id(container), key))
+                targets.append((container, key))
+        
+        for container, key in targets:
+            node = container[key]
+            if self.match is not None and not json_matches(node, self.match):
+                continue
+            
+            if self.op == 'unwrap':
+                if isinstance(node, dict) and len(node) == 1:
+                    child = _json_key(node, spec["key"])
+                    if child is not None:
+                        container[key] = node[child]
+                        changes += 1
+            elif self.op == 'hoist':
+                for source_container, source_key in iter_json_targets([node], 0, self.source_tokens):
+                    container[key] = source_container[source_key]
+                    changes += 1
+                    break
+            elif self.op == 'set':
+                if isinstance(node, dict) and node.get(spec["key"]) != spec["value"]:
+                    node[spec["key"]] = copy.deepcopy(spec["value"])
+                    changes += 1
+            elif self.op == 'merge':
+                if isinstance(node, dict):
+                    merged = json_merge(node.get(spec["key"]), spec["value"])
+                    if merged != node.get(spec["key"]):
+                        node[spec["key"]] = merged
+                        changes += 1
+            elif self.op == 'replace':
+                if node != spec["value"]:
+                    container[key] = copy.deepcopy(spec["value"])
+                    changes += 1
+            elif self.op == 'delete':
+                if isinstance(node, dict):
+                    child = _json_key(node, spec["key"])
+                    if child is not None:
+                        del node[child]
+                        changes += 1
+            elif self.op == 'rename':
+                if isinstance(node, dict):
+                    child = _json_key(node, spec["key"])
+                    if child is not None and child != spec["to"]:
+                        items = [(spec["to"] if name == child else name, value) for name, value in node.items()]
+                        node.clear()
+                        node.update(items)
+                        changes += 1
+        
+        return changes
+
+class RuleSet:
+    """
+    升级配置编译结果：每个操作的路径匹配器、预编译的替换规则和JSON变换
+    
+    JSON操作也可以带有 patterns：文件不是有效的JSON时改用这些文本规则
+    """
+    def __init__(self, config, report_errors=True):
+        self.operations = config
+        self.path_patterns = [
+            compile_path_pattern(operation.get("path", "**/*.json"),
+                                 operation.get("recursive", True))
+            for operation in config
+        ]
+        # 操作类型：regex（默认，文本替换）或 json（解析后按路径变换）
+        self.kinds = [operation.get("type", "regex") for operation in config]
+        self.patterns = [
+            [CompiledPattern(pattern) for pattern in operation.get("patterns", [])]
+            for operation in config
+        ]
+        self.transforms = []
+        for operation in config:
+            transforms = []
+            for spec in operation.get("transforms", []):
+                try:
+                    transforms.append(JsonTransform(spec))
+                except Exception as e:
+                    if report_errors:
+                        print(f"⚠️ JSON变换配置错误: {spec} - {e}")
+            self.transforms.append(transforms)
+        
+        # 每个操作配置的哈希，用于判断文件适用的规则是否变化
+        self.operation_hashes = [
+            hashlib.sha256(json.dumps(operation, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+            for operation in config
+        ]
+        
+        for operation_patterns in self.patterns:
+            for pattern in operation_patterns:
+                if pattern.error and report_errors:
+                    print(f"⚠️ 正则表达式错误: {pattern.search} - {pattern.error}")
+    
+    def match_operations(self, rel_path):
+        """返回适用于该相对路径的操作索引列表（按配置顺序）"""
+        return [i for i, regex in enumerate(self.path_patterns) if regex.fullmatch(rel_path)]
+    
+    def rules_hash(self, op_indices):
+        """计算一组操作（按顺序）的规则哈希"""
+        joined = ','.join(self.operation_hashes[i] for i in op_indices)
+        return hashlib.sha256(joined.encode('ascii')).hexdigest()
+
+# Linux 写时复制克隆（reflink）的 ioctl 编号
+FICLONE = 0x40049409
+
+def _reflink(src, dst):
+    """尝试用 FICLONE 创建写时复制克隆，成功返回True"""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        return False
+
+def _copy_file_range(src, dst):
+    """使用内核 copy_file_range 零拷贝复制文件内容，不支持时返回False"""
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        return True
+    except OSError:
+        return False
+
+def fast_copy(src, dst, link_mode='copy'):
+    """
+    复制无需修改的文件，返回实际使用的方式
+    
+    link_mode:
+    copy     -- 内核零拷贝复制（copy_file_range，失败时回退到shutil）
+    hardlink -- 创建硬链接（需用户显式开启，源与目标共享同一文件）
+    reflink  -- 写时复制克隆（需文件系统支持）
+    """
+    dst = Path(dst)
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    
+    if link_mode == 'hardlink':
+        try:
+            os.link(src, dst)
+            return 'hardlink'
+        except OSError:
+            pass
+    elif link_mode == 'reflink':
+        if _reflink(src, dst):
+            shutil.copystat(src, dst)
+            return 'reflink'
+    
+    if not _copy_file_range(src, dst):
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+    return 'copy'
+
+class MigrationGraph:
+    """
+    版本迁移图：以 pack_format 为节点、迁移步骤为边
+    
+    每个步骤形如 {"name": ..., "from": 48, "to": 81, "operations": [...]}，
+    from 也可以是多个 pack_format 组成的列表
+    """
+    def __init__(self, migrations):
+        self.migrations = migrations
+        self.edges = {}
+        for step in migrations:
+            sources = step["from"] if isinstance(step["from"], list) else [step["from"]]
+            for source in sources:
+                self.edges.setdefault(source, []).append(step)
+    
+    def formats(self):
+        """图中出现的所有 pack_format（升序）"""
+        known = set(self.edges)
+        known.update(step["to"] for step in self.migrations)
+        return sorted(known)
+    
+    def find_path(self, source, target=None):
+        """
+        广度优先查找从 source 到 target 的最短迁移路径，返回步骤列表
+        
+        target 为空时迁移到图中的最高版本；无法到达时返回None
+        """
+        if target is None:
+            target = max(step["to"] for step in self.migrations)
+            if source >= target:
+                return []
+        
+        previous = {source: None}
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            for step in self.edges.get(current, []):
+                if step["to"] not in previous:
+                    previous[step["to"]] = (current, step)
+                    queue.append(step["to"])
+        
+        if target not in previous:
+            return None
+        
+        path = []
+        current = target
+        while current != source:
+            current, step = previous[current]
+            path.append(step)
+        return path[::-1]
+
+class RuleProfile:
+    """
+    规则性能统计：按 (操作, 规则) 累计耗时、扫描文件数、命中文件数、替换次数和最慢文件
+    
+    规则索引对文本操作是 patterns 中的序号，对JSON操作是 transforms 中的序号
+    """
+    # 单个文件耗时超过该值（秒），且单位长度耗时远高于该规则平均水平时，视为疑似灾难性回溯
+    BACKTRACK_MIN_SECONDS = 0.05
+    BACKTRACK_RATIO = 20
+    
+    def __init__(self, rule_set):
+        self.rule_set = rule_set
+        self.stats = {}
+    
+    def add(self, rel_key, size, timings):
+        """累计一个文件的计时记录 [[操作索引, 规则索引, 耗时, 替换次数], ...]"""
+        for op_index, rule_index, seconds, count in timings:
+            stat = self.stats.setdefault((op_index, rule_index), {
+                "seconds": 0.0, "chars": 0, "files_scanned": 0, "files_matched": 0,
+                "substitutions": 0, "slowest_file": None, "slowest_seconds": 0.0, "slowest_chars": 0,
+            })
+            stat["seconds"] += seconds
+            stat["chars"] += size
+            stat["files_scanned"] += 1
+            if count:
+                stat["files_matched"] += 1
+                stat["substitutions"] += count
+            if seconds > stat["slowest_seconds"]:
+                stat["slowest_file"] = rel_key
+                stat["slowest_seconds"] = seconds
+                stat["slowest_chars"] = size
+    
+    def rule_label(self, op_index, rule_index):
+        """规则的可读名称（正则表达式或JSON变换的操作和路径）"""
+        if self.rule_set.kinds[op_index] == 'json':
+            spec = self.rule_set.transforms[op_index][rule_index].spec
+            return f"json {spec['op']} {spec.get('path', '')}"
+        return self.rule_set.patterns[op_index][rule_index].search
+    
+    def suspect_backtracking(self, stat):
+        """最慢文件的单位长度耗时远高于其余文件且绝对耗时明显时，疑似灾难性回溯"""
+        if stat["slowest_seconds"] < self.BACKTRACK_MIN_SECONDS:
+            return False
+        rest_seconds = stat["seconds"] - stat["slowest_seconds"]
+        rest_chars = stat["chars"] - stat["slowest_chars"]
+        if rest_chars <= 0 or rest_seconds <= 0:
+            return True
+        slowest_rate = stat["slowest_seconds"] / max(stat["slowest_chars"], 1)
+        return slowest_rate >= rest_seconds / rest_chars * self.BACKTRACK_RATIO
+    
+    def rows(self):
+        """按配置顺序列出所有规则（包括未扫描任何文件的规则）的统计"""
+        rows = []
+        for op_index, operation in enumerate(self.rule_set.operations):
+            if self.rule_set.kinds[op_index] == 'json':
+                count = len(self.rule_set.transforms[op_index])
+            else:
+                count = len(self.rule_set.patterns[op_index])
+            for rule_index in range(count):
+                stat = self.stats.get((op_index, rule_index), {
+                    "seconds": 0.0, "chars": 0, "files_scanned": 0, "files_matched": 0,
+                    "substitutions": 0, "slowest_file": None, "slowest_seconds": 0.0, "slowest_chars": 0,
+                })
+                rows.append({
+                    "operation": operation["name"],
+                    "operation_index": op_index,
+                    "rule_index": rule_index,
+                    "rule": self.rule_label(op_index, rule_index),
+                    "seconds": round(stat["seconds"], 6),
+                    "files_scanned": stat["files_scanned"],
+                    "files_matched": stat["files_matched"],
+                    "substitutions": stat["substitutions"],
+                    "slowest_file": stat["slowest_file"],
+                    "slowest_seconds": round(stat["slowest_seconds"], 6),
+                    "dead": stat["files_matched"] == 0,
+                    "suspect_backtracking": self.suspect_backtracking(stat),
+                })
+        return rows
+    
+    def report(self, json_path=None):
+        """打印按耗时排序的统计表，并可写出便于在版本间比较的JSON文件"""
+        rows = self.rows()
+        print("\n" + "=" * 60)
+        print("规则性能统计（按耗时排序）")
+        print(f"{'耗时(s)':>10} {'扫描':>6} {'命中':>6} {'替换':>6} {'最慢(s)':>9}  规则")
+        for row in sorted(rows, key=lambda row: row["seconds"], reverse=True):
+            flags = ""
+            if row["suspect_backtracking"]:
+                flags += " ⚠️疑似回溯"
+            if row["dead"]:
+                flags += " 💤未命中"
+            rule = row["rule"] if len(row["rule"]) <= 50 else row["rule"][:47] + "..."
+            print(f"{row['seconds']:>10.4f} {row['files_scanned']:>6} {row['files_matched']:>6} "
+                  f"{row['substitutions']:>6} {row['slowest_seconds']:>9.4f}  "
+                  f"[{row['operation']}] {rule}{flags}")
+            if row["slowest_file"] and row["suspect_backtracking"]:
+                print(f"{'':>42}最慢文件: {row['slowest_file']}")
+        
+        dead = [row for row in rows if row["dead"]]
+        if dead:
+            print(f"\n💤 {len(dead)} 条规则未命中任何文件")
+        print("=" * 60)
+        
+        if json_path:
+            try:
+                with open(json_path, 'w', encoding='utf-8') as f:
+                    json.dump({"rules": rows}, f, indent=1, ensure_ascii=False)
+                print(f"✅ 性能统计已保存到: {json_path}")
+            except Exception as e:
+                print(f"❌ 保存性能统计失败: {e}")
+
 class MinecraftUpgrader:
-    def __init__(self, config_path=None):
+    # 增量升级清单文件（保存在目标数据包根目录）
+    MANIFEST_NAME = ".upgrade_manifest.json"
+    MANIFEST_VERSION = 1
+    # 升级计划（--preview --plan 生成，--apply-plan 应用）的格式版本
+    PLAN_VERSION = 1
+    
+    def __init__(self, config_path=None, reporter=None):
+        # 输出器（默认输出有变化的文件，未变化的文件只计数）
+        self.reporter = reporter or Reporter()
+        
         self.config = []
         self.total_replacements = 0
         self.total_files_processed = 0
         self.total_files_modified = 0
+        self.total_files_skipped = 0
+        self.op_files_skipped = []
         
         # 根据您提供的规则生成的默认配置
         self.default_config = [
@@ -31,6 +662,12 @@ class MinecraftUpgrader:
                 "description": "简化物品对象格式",
                 "path": "**/recipe/*.json",
                 "recursive": True,
+                "type": "json",
+                "transforms": [
+                    {"path": path, "op": "unwrap", "key": "item"}
+                    for path in ["key.*", "key.*[*]", "ingredients[*]", "ingredients[*][*]",
+                                 "ingredient", "ingredient[*]", "base", "addition", "template"]
+                ],
                 "patterns": [
                     {
                         "search": r'\{\s*"item": (.*?)\s*\}',
@@ -67,6 +704,28 @@ class MinecraftUpgrader:
                 "description": "更新can_place_on属性格式",
                 "path": "data/missile_wars/item_modifier/item/*.json",
                 "recursive": True,
+                "type": "json",
+                "transforms": [
+                    {
+                        "path": "**.components",
+                        "match": {"can_place_on": {
+                            "predicates": [{"blocks": "#missile_wars:game_block"}],
+                            "show_in_tooltip": False
+                        }},
+                        "op": "merge",
+                        "key": "tooltip_display",
+                        "value": {"hidden_components": ["can_place_on"]}
+                    },
+                    {
+                        "path": "**.components.can_place_on",
+                        "match": {
+                            "predicates": [{"blocks": "#missile_wars:game_block"}],
+                            "show_in_tooltip": False
+                        },
+                        "op": "hoist",
+                        "from": "predicates[0]"
+                    }
+                ],
                 "patterns": [
                     {
                         "search": r'"can_place_on": \{\s*"predicates": \[\s*\{\s*"blocks": "#missile_wars:game_block"\s*\}\s*\],\s*"show_in_tooltip": false\s*\}',
@@ -104,295 +763,970 @@ class MinecraftUpgrader:
             }
         ]
         
+        # 默认迁移图：1.21 (pack_format 48) -> 1.21.5-1.21.8 (pack_format 81)
+        self.default_migrations = [
+            {
+                "name": "1.21 -> 1.21.5-1.21.8",
+                "from": 48,
+                "to": 81,
+                "operations": self.default_config
+            }
+        ]
+        
+        # 迁移步骤列表；为None时表示旧式配置（操作列表），总是全部执行
+        self.migrations = self.default_migrations
+        
+        # 为True时记录每条规则在每个文件上的耗时（--profile）
+        self.profiling = False
+        self.profile = None
+        
         if config_path:
             self.load_config(config_path)
         else:
             self.config = self.default_config
+        
+        # 规则配置只编译一次
+        self.rule_set = RuleSet(self.config)
+    
+    def set_config(self, config, report_errors=True):
+        """替换当前配置并重新编译规则"""
+        self.config = config
+        self.rule_set = RuleSet(config, report_errors)
     
     def load_config(self, config_path):
-        """加载自定义配置文件"""
+        """加载自定义配置文件（操作列表，或包含 "migrations" 迁移步骤的对象）"""
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
-                self.config = json.load(f)
-            print(f"✅ 成功加载配置文件: {config_path}")
+                data = json.load(f)
+            if isinstance(data, dict) and "migrations" in data:
+                self.migrations = data["migrations"]
+                self.config = [operation for step in self.migrations for operation in step["operations"]]
+            else:
+                self.migrations = None
+                self.config = data
+            self.reporter.summary(f"✅ 成功加载配置文件: {config_path}")
         except Exception as e:
-            print(f"❌ 加载配置文件失败: {e}")
-            print("⚠️ 使用默认配置")
+            self.reporter.error(f"❌ 加载配置文件失败: {e}")
+            self.reporter.error("⚠️ 使用默认配置")
+            self.migrations = self.default_migrations
             self.config = self.default_config
     
     def save_config(self, config_path):
         """保存当前配置到文件"""
         try:
+            data = self.config if self.migrations is None else {"migrations": self.migrations}
             with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
-            print(f"✅ 配置已保存到: {config_path}")
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            self.reporter.summary(f"✅ 配置已保存到: {config_path}")
         except Exception as e:
-            print(f"❌ 保存配置失败: {e}")
+            self.reporter.error(f"❌ 保存配置失败: {e}")
+    
+    @staticmethod
+    def detect_pack_format(pack_path):
+        """从 pack.mcmeta 读取数据包当前的 pack_format，无法识别时返回None"""
+        try:
+            with open(Path(pack_path) / 'pack.mcmeta', 'r', encoding='utf-8-sig') as f:
+                return int(json.load(f)["pack"]["pack_format"])
+        except Exception:
+            return None
+    
+    def select_migrations(self, pack_path, source_format=None, target_format=None):
+        """
+        根据数据包版本在迁移图中选出迁移路径，并把路径上所有步骤融合为一条规则流水线
+        
+        旧式配置（操作列表）不做选择。未指定任何版本时，无法识别版本或找不到路径则
+        与以前一样执行全部操作；指定了版本但无法确定路径时返回False
+        """
+        if self.migrations is None:
+            return True
+        
+        graph = MigrationGraph(self.migrations)
+        known = ', '.join(str(pack_format) for pack_format in graph.formats())
+        explicit = source_format is not None or target_format is not None
+        
+        if source_format is None:
+            source_format = self.detect_pack_format(pack_path)
+        if source_format is None:
+            if not explicit:
+                self.reporter.summary(f"⚠️ 无法从 {Path(pack_path) / 'pack.mcmeta'} 识别数据包版本，执行全部升级操作")
+                return True
+            self.reporter.error(f"❌ 无法从 {Path(pack_path) / 'pack.mcmeta'} 识别数据包版本，请使用 --from-format 指定")
+            return False
+        
+        path = graph.find_path(source_format, target_format)
+        if path is None:
+            target = f"到 pack_format {target_format} " if target_format is not None else "到最新版本"
+            if not explicit:
+                self.reporter.summary(f"⚠️ 迁移图中没有从 pack_format {source_format} {target}的路径"
+                                      f"（已知版本: {known}），执行全部升级操作")
+                return True
+            self.reporter.error(f"❌ 没有从 pack_format {source_format} {target}的迁移路径（已知版本: {known}）")
+            return False
+        
+        if not path:
+            self.reporter.summary(f"✅ 数据包已是目标版本 (pack_format {source_format})，无需升级")
+        else:
+            hops = ' -> '.join([str(source_format)] + [str(step["to"]) for step in path])
+            self.reporter.summary(f"🔀 迁移路径: {hops} ({', '.join(step.get('name', '') for step in path)})")
+        
+        # 融合路径上的所有步骤，单次遍历完成多级升级
+        self.set_config([operation for step in path for operation in step["operations"]])
+        return True
     
-    def copy_directory(self, source_dir, target_dir):
+    def walk_pack(self, root_path):
+        """遍历目录，排除.git目录和.git文件，产出 (当前目录, 相对路径, 子目录名列表, 文件名列表)"""
+        root_path = Path(root_path)
+        for root, dirs, files in os.walk(root_path):
+            # 不进入.git目录，也不产出子模块或工作树的.git文件
+            dirs[:] = sorted(d for d in dirs if d != '.git')
+            files = [file for file in files if file != '.git']
+            rel_root = Path(root).relative_to(root_path).as_posix()
+            if rel_root == '.':
+                files = [file for file in files if file != self.MANIFEST_NAME]
+            yield Path(root), rel_root, dirs, sorted(files)
+    
+    def copy_directory(self, source_dir, target_dir, link_mode='copy'):
         """复制整个目录结构到目标目录，排除.git文件夹"""
         source_path = Path(source_dir)
         target_path = Path(target_dir)
         
         if not source_path.exists():
-            print(f"❌ 源目录不存在: {source_path}")
+            self.reporter.error(f"❌ 源目录不存在: {source_path}")
             return False
         
-        print(f"📂 正在复制目录: {source_path} -> {target_path}")
+        self.reporter.summary(f"📂 正在复制目录: {source_path} -> {target_path}")
         
         try:
             # 确保目标目录存在
             target_path.mkdir(parents=True, exist_ok=True)
             
-            # 复制所有文件和子目录，排除.git文件夹
             file_count = 0
             dir_count = 0
-            skipped_git = 0
             
-            for item in source_path.glob('**/*'):
-                # 排除.git目录及其内容
-                if '.git' in item.parts:
-                    skipped_git += 1
-                    continue
-                    
-                relative_path = item.relative_to(source_path)
-                dest_path = target_path / relative_path
+            for root, rel_root, dirs, files in self.walk_pack(source_path):
+                dest_root = target_path if rel_root == '.' else target_path / rel_root
+                for name in dirs:
+                    (dest_root / name).mkdir(parents=True, exist_ok=True)
+                    dir_count += 1
                 
-                if item.is_file():
-                    # 确保目标目录存在
-                    dest_path.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    shutil.copy2(item, dest_path)
+                for name in files:
+                    fast_copy(root / name, dest_root / name, link_mode)
                     file_count += 1
                     if file_count % 50 == 0:  # 每50个文件打印一次进度
-                        print(f"  ↳ 已复制 {file_count} 个文件...")
-                elif item.is_dir():
-                    # 只创建目录，不复制内容（内容会通过文件复制处理）
-                    dest_path.mkdir(parents=True, exist_ok=True)
-                    dir_count += 1
+                        self.reporter.log(f"  ↳ 已复制 {file_count} 个文件...")
             
-            print(f"✅ 目录复制完成! "
-                  f"文件: {file_count}, 目录: {dir_count}, 跳过.git项目: {skipped_git}")
+            self.reporter.summary(f"✅ 目录复制完成! 文件: {file_count}, 目录: {dir_count}")
             return True
         except Exception as e:
-            print(f"❌ 复制目录失败: {e}")
+            self.reporter.error(f"❌ 复制目录失败: {e}")
+            self.reporter.flush()
             import traceback
             traceback.print_exc()
             return False
     
-    def find_files(self, base_path, pattern, recursive=True):
-        """根据模式查找文件"""
-        files = []
-        base_path = Path(base_path)
+    def collect_files(self, datapack_path):
+        """单次遍历数据包，建立 文件 -> 适用操作索引 的映射（操作按配置顺序排列）"""
+        file_operations = []
+        for root, rel_root, dirs, files in self.walk_pack(datapack_path):
+            for file in files:
+                rel_path = file if rel_root == '.' else f"{rel_root}/{file}"
+                op_indices = self.rule_set.match_operations(rel_path)
+                if op_indices:
+                    file_operations.append((root / file, op_indices))
         
-        if pattern == "**/*.json":
-            # 递归查找所有JSON文件
-            for file in base_path.rglob("*.json"):
-                files.append(file)
-        else:
-            # 简单模式匹配
-            if recursive:
-                for file in base_path.rglob(pattern):
-                    if file.is_file():
-                        files.append(file)
-            else:
-                for file in base_path.glob(pattern):
-                    if file.is_file():
-                        files.append(file)
+        return file_operations
+    
+    def upgrade_content(self, content, op_indices, steps=None, timings=None, warnings=None):
+        """
+        在内存中按配置顺序对内容应用多个操作，返回 (新内容, [(操作索引, 修改处数), ...])
+        
+        同一文件的所有JSON操作共享一次解析，遇到文本操作或处理结束时才重新序列化，
+        且只在数据确实变化时才重新序列化。内容不是有效的JSON时，JSON操作改用其文本规则，
+        并把警告追加到 warnings 列表。
+        传入 steps 列表时记录每一步的匹配位置（用于生成升级计划）；
+        传入 timings 列表时记录每条规则的 [操作索引, 规则索引, 耗时, 修改处数]
+        """
+        op_counts = []
+        tree = None
+        tree_modified = False
+        last_json_op = None
+        
+        def flush_tree():
+            nonlocal content, tree, tree_modified
+            # 变换后的数据与原内容相同时（如先重命名再改回）不重新序列化
+            if tree is not None and tree_modified and tree != json.loads(content):
+                new_content = dump_json_like(tree, content)
+                if steps is not None and new_content != content:
+                    steps.append({"op_index": last_json_op, "count": 0,
+                                  "edits": [span_edit(content, new_content)]})
+                content = new_content
+            tree = None
+            tree_modified = False
+        
+        def apply_text(op_index):
+            nonlocal content
+            op_steps = None if steps is None else []
+            op_timings = None if timings is None else []
+            content, replacements = self.apply_replacements(
+                content, self.rule_set.patterns[op_index], op_steps, op_timings
+            )
+            op_counts.append((op_index, replacements))
+            if op_timings:
+                timings.extend([op_index] + timing for timing in op_timings)
+            if op_steps:
+                for step in op_steps:
+                    step["op_index"] = op_index
+                steps.extend(op_steps)
+        
+        for op_index in op_indices:
+            if self.rule_set.kinds[op_index] == 'json':
+                transforms = self.rule_set.transforms[op_index]
+                start = time.perf_counter()
+                if tree is None:
+                    if not any(transform.may_match(content) for transform in transforms):
+                        op_counts.append((op_index, 0))
+                        if timings is not None and transforms:
+                            timings.append([op_index, 0, time.perf_counter() - start, 0])
+                        continue
+                    try:
+                        tree = json.loads(content)
+                    except ValueError as e:
+                        if warnings is not None:
+                            warnings.append(f"{self.config[op_index]['name']}: 不是有效的JSON（{e}），改用文本规则")
+                        apply_text(op_index)
+                        continue
+                
+                holder = [tree]
+                changes = 0
+                for transform_index, transform in enumerate(transforms):
+                    transform_changes = transform.apply(holder)
+                    changes += transform_changes
+                    if timings is not None:
+                        # 解析耗时计入该操作的第一个变换
+                        now = time.perf_counter()
+                        timings.append([op_index, transform_index, now - start, transform_changes])
+                        start = now
+                tree = holder[0]
+                op_counts.append((op_index, changes))
+                if changes:
+                    tree_modified = True
+                    last_json_op = op_index
+                    if steps is not None:
+                        steps.append({"op_index": op_index, "count": changes, "edits": []})
+                continue
+            
+            flush_tree()
+            apply_text(op_index)
         
-        return files
+        flush_tree()
+        return content, op_counts
     
-    def apply_replacements(self, content, patterns):
-        """应用所有替换规则到内容"""
+    @staticmethod
+    def record_matches(pattern, content):
+        """逐个匹配执行替换并记录编辑（字节偏移基于UTF-8编码），结果与 subn 一致"""
+        pieces = []
+        edits = []
+        last = 0
+        byte_pos = 0
+        for match in pattern.regex.finditer(content):
+            start, end = match.span()
+            old = match.group(0)
+            new = match.expand(pattern.replace)
+            byte_pos += len(content[last:start].encode('utf-8'))
+            old_size = len(old.encode('utf-8'))
+            edits.append({"start": byte_pos, "end": byte_pos + old_size, "old": old, "new": new})
+            byte_pos += old_size
+            pieces.append(content[last:start])
+            pieces.append(new)
+            last = end
+        
+        if not edits:
+            return content, edits
+        pieces.append(content[last:])
+        return ''.join(pieces), edits
+    
+    def apply_replacements(self, content, patterns, steps=None, timings=None):
+        """
+        应用所有预编译的替换规则到内容；传入 steps 列表时记录每条规则的编辑，
+        传入 timings 列表时记录每条规则的 [规则索引, 耗时, 替换次数]
+        """
         total_replacements = 0
         
-        for pattern in patterns:
+        for pattern_index, pattern in enumerate(patterns):
+            start = time.perf_counter() if timings is not None else None
+            
+            # 先用子串检查排除不可能匹配的内容
+            if not pattern.may_match(content):
+                if timings is not None:
+                    timings.append([pattern_index, time.perf_counter() - start, 0])
+                continue
+            
+            # 执行替换
+            if steps is None:
+                new_content, count = pattern.regex.subn(pattern.replace, content)
+            else:
+                new_content, edits = self.record_matches(pattern, content)
+                count = len(edits)
+                if edits:
+                    steps.append({"pattern": pattern_index, "edits": edits})
+            
+            if timings is not None:
+                timings.append([pattern_index, time.perf_counter() - start, count])
+            
+            if count > 0:
+                content = new_content
+                total_replacements += count
+        
+        return content, total_replacements
+    
+    def load_manifest(self, datapack_path):
+        """读取目标数据包中的增量升级清单，不存在或无效时返回空字典"""
+        manifest_path = Path(datapack_path) / self.MANIFEST_NAME
+        if not manifest_path.exists():
+            return {}
+        
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get("version") != self.MANIFEST_VERSION:
+                return {}
+            return manifest.get("files", {})
+        except Exception as e:
+            self.reporter.error(f"⚠️ 读取升级清单失败，将完整处理: {e}")
+            return {}
+    
+    def save_manifest(self, datapack_path, files):
+        """写入增量升级清单（先写临时文件再替换）"""
+        manifest_path = Path(datapack_path) / self.MANIFEST_NAME
+        temp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.MANIFEST_VERSION, "files": files},
+                          f, indent=1, sort_keys=True, ensure_ascii=False)
+            os.replace(temp_path, manifest_path)
+        except Exception as e:
+            self.reporter.error(f"⚠️ 保存升级清单失败: {e}")
+    
+    @staticmethod
+    def _file_entry(file_path, digest):
+        """生成清单条目（大小、修改时间、内容哈希）"""
+        st = os.stat(file_path)
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+    
+    @staticmethod
+    def _write_new_file(file_path, data, stat_source=None, mode_source=None):
+        """
+        写入新文件（临时文件+替换，不会改动与之硬链接的源文件，中途中断也不会留下写了一半的文件）
+        
+        stat_source 的权限和修改时间复制到新文件；mode_source 只复制权限（原地升级时保留原文件的权限）
+        """
+        file_path = Path(file_path)
+        temp_path = file_path.with_name(file_path.name + '.tmp')
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        if stat_source is not None:
+            shutil.copystat(stat_source, temp_path)
+        elif mode_source is not None:
+            shutil.copymode(mode_source, temp_path)
+        os.replace(temp_path, file_path)
+    
+    def upgrade_file(self, file_path, op_indices, write=True, known_hash=None, target_path=None,
+                     record=False):
+        """
+        读取一次文件、依次应用所有适用操作、最多写回一次
+        
+        返回 (结果, 清单条目)：结果为 [(操作索引, 修改处数), ...]，
+        若文件内容哈希等于 known_hash 则结果为 None（内容未变化，跳过）。
+        指定 target_path 时从 file_path 读取、将结果写入 target_path（复制并升级）；
+        record 为 True 时清单条目额外带有 "plan"（逐步的匹配位置和结果哈希）；
+        性能分析模式下清单条目额外带有 "profile"（内容长度和每条规则的计时）
+        """
+        # 读取文件内容
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        
+        digest = hashlib.sha256(raw).hexdigest()
+        if known_hash is not None and digest == known_hash:
+            if target_path is None:
+                return None, self._file_entry(file_path, digest)
+            return None, {"source": self._file_entry(file_path, digest)}
+        
+        # 与文本模式读取一致：统一换行符
+        try:
+            content = raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+        except UnicodeDecodeError:
+            if target_path is not None:
+                # 无法升级的文件仍按原样复制到目标
+                self._write_new_file(target_path, raw, file_path)
+            raise
+        
+        # 按顺序应用所有适用的操作
+        steps = [] if record else None
+        timings = [] if self.profiling else None
+        warnings = []
+        new_content, op_counts = self.upgrade_content(content, op_indices, steps, timings, warnings)
+        profile = {"size": len(content), "timings": timings} if timings is not None else None
+        
+        if target_path is None:
+            source_digest = digest
+            if write and new_content != content:
+                # 写回修改后的内容（替换为新文件：目标树由 --link-mode hardlink 创建时不改动源数据包）
+                data = new_content.replace('\n', os.linesep).encode('utf-8')
+                self._write_new_file(file_path, data, mode_source=file_path)
+                digest = hashlib.sha256(data).hexdigest()
+            entry = self._file_entry(file_path, digest)
+            if steps:
+                entry["plan"] = {
+                    "sha256": source_digest,
+                    "result_sha256": hashlib.sha256(new_content.encode('utf-8')).hexdigest(),
+                    "steps": steps,
+                }
+            if profile:
+                entry["profile"] = profile
+            if warnings:
+                entry["warnings"] = warnings
+            return op_counts, entry
+        
+        # 复制并升级：目标文件只写一次
+        if new_content != content:
+            data = new_content.replace('\n', os.linesep).encode('utf-8')
+            self._write_new_file(target_path, data)
+            entry = self._file_entry(target_path, hashlib.sha256(data).hexdigest())
+        else:
+            self._write_new_file(target_path, raw, file_path)
+            entry = self._file_entry(target_path, digest)
+        entry["source"] = self._file_entry(file_path, digest)
+        if profile:
+            entry["profile"] = profile
+        if warnings:
+            entry["warnings"] = warnings
+        return op_counts, entry
+    
+    def iter_file_results(self, tasks, write=True, jobs=1, record=False):
+        """
+        按任务顺序产出 (文件路径, 操作索引, 结果, 清单条目, 错误)
+        
+        tasks 为 (文件路径, 操作索引, 已知哈希, 目标路径) 序列；jobs>1 时使用进程池并限制在途任务数
+        """
+        if jobs <= 1:
+            for file_path, op_indices, known_hash, target_path in tasks:
+                try:
+                    op_counts, entry = self.upgrade_file(file_path, op_indices, write, known_hash,
+                                                         target_path, record)
+                    yield file_path, op_indices, op_counts, entry, None
+                except Exception as e:
+                    yield file_path, op_indices, None, None, str(e)
+            return
+        
+        # 在途任务窗口：保持内存占用平稳，同时按提交顺序取回结果
+        window = jobs * 4
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(self.config, self.profiling)) as executor:
+            for file_path, op_indices, known_hash, target_path in tasks:
+                future = executor.submit(_upgrade_file_worker, file_path, op_indices, write,
+                                         known_hash, target_path, record)
+                pending.append((file_path, op_indices, future))
+                if len(pending) >= window:
+                    file_path, op_indices, future = pending.popleft()
+                    yield (file_path, op_indices) + future.result()
+            
+            while pending:
+                file_path, op_indices, future = pending.popleft()
+                yield (file_path, op_indices) + future.result()
+    
+    def copy_unchanged(self, src, dst, link_mode='copy', incremental=True):
+        """复制无需升级的文件，目标已与源一致时跳过；返回使用的复制方式，跳过时返回None"""
+        if incremental:
             try:
-                # 处理多行匹配
-                flags = re.DOTALL if '\n' in pattern.get("search", "") else 0
-                search_regex = re.compile(pattern["search"], flags)
+                dst_stat = dst.stat()
+            except FileNotFoundError:
+                dst_stat = None
+            if dst_stat is not None:
+                src_stat = src.stat()
+                if os.path.samestat(src_stat, dst_stat):
+                    return None
+                if src_stat.st_size == dst_stat.st_size and src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+                    return None
+        return fast_copy(src, dst, link_mode)
+    
+    def run_operations(self, datapack_path, write=True, jobs=1, incremental=True,
+                       source_path=None, link_mode='copy', record_plan=False):
+        """
+        遍历一次数据包，每个文件只读取一次、最多写回一次，返回每个操作的处理结果
+        
+        incremental 为 True 时根据清单跳过内容和适用规则都未变化的文件；
+        实际升级时总会重新写入清单。
+        指定 source_path 时从源目录流式复制并升级到 datapack_path：
+        需要升级的文本文件在复制途中转换，其余文件按 link_mode 直接复制。
+        record_plan 为 True 时把每个待修改文件的编辑记录到 self.plan_files；
+        性能分析模式下把每条规则的统计累计到 self.profile
+        """
+        target_root = Path(datapack_path)
+        source_root = Path(source_path) if source_path else target_root
+        fused = source_path is not None
+        op_results = [[] for _ in self.config]
+        self.op_files_skipped = [0] * len(self.config)
+        self.total_files_skipped = 0
+        self.copy_stats = {"dirs": 0, "unchanged": 0, "copy": 0, "hardlink": 0, "reflink": 0, "errors": 0}
+        self.plan_files = []
+        if self.profiling:
+            self.profile = RuleProfile(self.rule_set)
+        
+        manifest = self.load_manifest(target_root) if incremental else {}
+        new_manifest = {}
+        
+        def skip(rel_key, op_indices, entry):
+            new_manifest[rel_key] = entry
+            self.total_files_skipped += 1
+            for op_index in op_indices:
+                self.op_files_skipped[op_index] += 1
+        
+        # 先用文件大小和修改时间筛选，完全未变化的文件无需读取
+        tasks = []
+        for root, rel_root, dirs, files in self.walk_pack(source_root):
+            if fused:
+                dest_root = target_root if rel_root == '.' else target_root / rel_root
+                dest_root.mkdir(parents=True, exist_ok=True)
+                self.copy_stats["dirs"] += len(dirs)
+            
+            for file in files:
+                file_path = root / file
+                rel_key = file if rel_root == '.' else f"{rel_root}/{file}"
+                op_indices = self.rule_set.match_operations(rel_key)
+                target_path = dest_root / file if fused else None
                 
-                # 执行替换
-                new_content, count = search_regex.subn(pattern["replace"], content)
+                if not op_indices:
+                    if fused:
+                        try:
+                            method = self.copy_unchanged(file_path, target_path, link_mode, incremental)
+                            self.copy_stats[method or "unchanged"] += 1
+                        except Exception as e:
+                            self.reporter.record("copy", rel_key, "error", f"  ❌ 复制失败: {rel_key} - {e}")
+                            self.copy_stats["errors"] += 1
+                    continue
                 
-                if count > 0:
-                    content = new_content
-                    total_replacements += count
-            except Exception as e:
-                print(f"⚠️ 正则表达式错误: {pattern.get('search', '')} - {e}")
+                rules_hash = self.rule_set.rules_hash(op_indices)
+                entry = manifest.get(rel_key)
+                known_hash = None
+                if entry and entry.get("rules") == rules_hash:
+                    if fused:
+                        source_entry = entry.get("source") or {}
+                        try:
+                            target_stat = target_path.stat()
+                        except FileNotFoundError:
+                            target_stat = None
+                        if target_stat is not None and entry.get("size") == target_stat.st_size \
+                                and entry.get("mtime_ns") == target_stat.st_mtime_ns:
+                            st = file_path.stat()
+                            if source_entry.get("size") == st.st_size and source_entry.get("mtime_ns") == st.st_mtime_ns:
+                                skip(rel_key, op_indices, entry)
+                                continue
+                            # 源文件元数据变化时再比较源内容哈希
+                            known_hash = source_entry.get("sha256")
+                    else:
+                        st = file_path.stat()
+                        if entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+                            skip(rel_key, op_indices, entry)
+                            continue
+                        # 元数据变化时再比较内容哈希
+                        known_hash = entry.get("sha256")
+                tasks.append((file_path, op_indices, known_hash, target_path))
         
-        return content, total_replacements
-    
-    def upgrade_datapack(self, datapack_path):
-        """升级整个数据包"""
-        datapack_path = Path(datapack_path)
-        if not datapack_path.exists():
-            print(f"❌ 数据包路径不存在: {datapack_path}")
-            return False
+        for file_path, op_indices, op_counts, entry, error in self.iter_file_results(tasks, write, jobs,
+                                                                                      record_plan):
+            rel_path = file_path.relative_to(source_root)
+            rel_key = rel_path.as_posix()
+            if error is not None:
+                for op_index in op_indices:
+                    op_results[op_index].append((rel_path, 0, f"{file_path} - {error}"))
+                continue
+            
+            if op_counts is None:
+                skip(rel_key, op_indices, {**manifest.get(rel_key, {}), **entry})
+                continue
+            
+            entry["rules"] = self.rule_set.rules_hash(op_indices)
+            plan = entry.pop("plan", None)
+            if plan:
+                self.plan_files.append({"path": rel_key, "rules": entry["rules"], **plan})
+            profile = entry.pop("profile", None)
+            if profile:
+                self.profile.add(rel_key, profile["size"], profile["timings"])
+            for warning in entry.pop("warnings", []):
+                self.reporter.error(f"  ⚠️ {rel_key} - {warning}")
+            new_manifest[rel_key] = entry
+            for op_index, replacements in op_counts:
+                op_results[op_index].append((rel_path, replacements, None))
         
-        print(f"\n开始升级数据包: {datapack_path.name}")
-        print("=" * 60)
+        # 预览模式不更新清单
+        if write:
+            self.save_manifest(target_root, new_manifest)
         
-        # 重置统计
+        return op_results
+    
+    def report_operations(self, op_results, preview=False, operations=None):
+        """按操作分组输出处理结果并累计统计（operations 默认为当前配置）"""
         self.total_replacements = 0
         self.total_files_processed = 0
         self.total_files_modified = 0
+        processed_files = set()
+        modified_files = set()
         
-        # 处理每个升级操作
-        for operation in self.config:
-            print(f"\n▶ 执行操作: {operation['name']}")
-            print(f"  {operation['description']}")
+        reporter = self.reporter
+        for op_index, (operation, results) in enumerate(zip(operations or self.config, op_results)):
+            reporter.log(f"\n▶ {'操作预览' if preview else '执行操作'}: {operation['name']}")
+            reporter.log(f"  {operation['description']}")
             
-            # 查找匹配的文件
-            files = self.find_files(datapack_path, operation.get("path", "**/*.json"), 
-                                  operation.get("recursive", True))
+            skipped = self.op_files_skipped[op_index] if op_index < len(self.op_files_skipped) else 0
+            if skipped:
+                reporter.count(operation['name'], "skipped", skipped)
+                reporter.log(f"  ⏩ {skipped} 个匹配文件自上次升级后未变化，已跳过")
             
-            if not files:
-                print("  ⚠ 没有找到匹配的文件")
+            if not results:
+                if not skipped:
+                    reporter.log("  ⚠ 没有找到匹配的文件")
                 continue
             
             op_replacements = 0
             op_files_modified = 0
             
-            for file_path in files:
-                self.total_files_processed += 1
-                
-                try:
-                    # 读取文件内容
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # 应用替换规则
-                    new_content, replacements = self.apply_replacements(
-                        content, operation["patterns"]
-                    )
-                    
-                    if replacements > 0:
-                        # 写回修改后的内容
-                        with open(file_path, 'w', encoding='utf-8') as f:
-                            f.write(new_content)
-                        
-                        print(f"  ✅ {file_path.relative_to(datapack_path)} - 修改了 {replacements} 处")
-                        self.total_replacements += replacements
-                        op_replacements += replacements
-                        self.total_files_modified += 1
-                        op_files_modified += 1
+            for rel_path, replacements, error in results:
+                processed_files.add(rel_path)
+                if error:
+                    reporter.record(operation['name'], rel_path, "error", f"  ❌ 处理文件失败: {error}",
+                                    error=error)
+                elif replacements > 0:
+                    if preview:
+                        message = f"  🔍 {rel_path} - 将修改 {replacements} 处"
                     else:
-                        print(f"  ⏩ {file_path.relative_to(datapack_path)} - 无修改")
-                
-                except Exception as e:
-                    print(f"  ❌ 处理文件失败: {file_path} - {str(e)}")
+                        message = f"  ✅ {rel_path} - 修改了 {replacements} 处"
+                    reporter.record(operation['name'], rel_path.as_posix(), "modified", message,
+                                    replacements=replacements)
+                    self.total_replacements += replacements
+                    op_replacements += replacements
+                    modified_files.add(rel_path)
+                    op_files_modified += 1
+                else:
+                    # 未变化的文件默认只计数，不格式化输出
+                    reporter.record(operation['name'], rel_path, "unchanged",
+                                    f"  ⏩ {rel_path} - 无修改" if reporter.verbose else None)
             
-            print(f"  {op_files_modified} 个文件被修改，共 {op_replacements} 处更改")
+            reporter.count(operation['name'], "replacements", op_replacements)
+            if preview:
+                reporter.log(f"  {op_files_modified} 个文件将被修改，共 {op_replacements} 处更改")
+            else:
+                reporter.log(f"  {op_files_modified} 个文件被修改，共 {op_replacements} 处更改")
+        
+        self.total_files_processed = len(processed_files)
+        self.total_files_modified = len(modified_files)
+        reporter.count("total", "processed", self.total_files_processed)
+        reporter.count("total", "modified", self.total_files_modified)
+        reporter.count("total", "skipped", self.total_files_skipped)
+        reporter.count("total", "replacements", self.total_replacements)
+    
+    def upgrade_datapack(self, datapack_path, jobs=1, incremental=True):
+        """升级整个数据包"""
+        datapack_path = Path(datapack_path)
+        if not datapack_path.exists():
+            self.reporter.error(f"❌ 数据包路径不存在: {datapack_path}")
+            return False
+        
+        self.reporter.summary(f"\n开始升级数据包: {datapack_path.name}")
+        self.reporter.summary("=" * 60)
+        
+        # 单次遍历处理所有升级操作
+        op_results = self.run_operations(datapack_path, write=True, jobs=jobs, incremental=incremental)
+        self.report_operations(op_results)
         
         # 打印总统计
-        print("\n" + "=" * 60)
-        print("升级完成!")
-        print(f"处理文件总数: {self.total_files_processed}")
-        print(f"修改文件数: {self.total_files_modified}")
-        print(f"总修改处数: {self.total_replacements}")
-        print("=" * 60)
+        self.reporter.summary("\n" + "=" * 60)
+        self.reporter.summary("升级完成!")
+        self.reporter.summary(f"处理文件总数: {self.total_files_processed}")
+        self.reporter.summary(f"修改文件数: {self.total_files_modified}")
+        self.reporter.summary(f"跳过未变化文件数: {self.total_files_skipped}")
+        self.reporter.summary(f"总修改处数: {self.total_replacements}")
+        self.reporter.summary("=" * 60)
+        
+        return True
+    
+    def upgrade_from(self, source_dir, datapack_path, jobs=1, incremental=True, link_mode='copy'):
+        """从源目录复制并升级到目标数据包（流式处理，每个目标文件只写一次）"""
+        source_path = Path(source_dir)
+        datapack_path = Path(datapack_path)
+        if not source_path.exists():
+            self.reporter.error(f"❌ 源目录不存在: {source_path}")
+            return False
+        
+        self.reporter.summary(f"\n复制并升级数据包: {source_path} -> {datapack_path}")
+        self.reporter.summary("=" * 60)
+        
+        datapack_path.mkdir(parents=True, exist_ok=True)
+        op_results = self.run_operations(datapack_path, write=True, jobs=jobs, incremental=incremental,
+                                         source_path=source_path, link_mode=link_mode)
+        self.report_operations(op_results)
+        
+        # 打印总统计
+        stats = self.copy_stats
+        self.reporter.summary("\n" + "=" * 60)
+        self.reporter.summary("复制并升级完成!")
+        self.reporter.summary(f"目录数: {stats['dirs']}")
+        self.reporter.summary(f"直接复制文件数: {stats['copy']} (硬链接: {stats['hardlink']}, 克隆: {stats['reflink']})")
+        self.reporter.summary(f"未变化未复制文件数: {stats['unchanged']}")
+        if stats['errors']:
+            self.reporter.summary(f"复制失败文件数: {stats['errors']}")
+        self.reporter.summary(f"升级处理文件总数: {self.total_files_processed}")
+        self.reporter.summary(f"修改文件数: {self.total_files_modified}")
+        self.reporter.summary(f"跳过未变化文件数: {self.total_files_skipped}")
+        self.reporter.summary(f"总修改处数: {self.total_replacements}")
+        self.reporter.summary("=" * 60)
         
         return True
     
-    def preview_upgrade(self, datapack_path):
-        """预览升级将做的更改（不实际修改文件）"""
+    def preview_upgrade(self, datapack_path, jobs=1, incremental=True, plan_path=None):
+        """
+        预览升级将做的更改（不实际修改文件）；指定 plan_path 时保存可直接应用的升级计划
+        
+        保存计划时总会处理所有文件（不使用增量清单），计划中不会遗漏清单跳过的文件
+        """
         datapack_path = Path(datapack_path)
         if not datapack_path.exists():
-            print(f"❌ 数据包路径不存在: {datapack_path}")
+            self.reporter.error(f"❌ 数据包路径不存在: {datapack_path}")
             return False
+        if plan_path:
+            incremental = False
         
-        print(f"\n预览数据包升级: {datapack_path.name}")
-        print("=" * 60)
-        print("注意: 此操作不会实际修改文件\n")
+        self.reporter.summary(f"\n预览数据包升级: {datapack_path.name}")
+        self.reporter.summary("=" * 60)
+        self.reporter.summary("注意: 此操作不会实际修改文件\n")
         
-        # 重置统计
-        total_replacements = 0
-        total_files_processed = 0
-        total_files_modified = 0
+        # 单次遍历计算所有操作的更改（但不保存）
+        op_results = self.run_operations(datapack_path, write=False, jobs=jobs, incremental=incremental,
+                                         record_plan=plan_path is not None)
+        self.report_operations(op_results, preview=True)
         
-        # 处理每个升级操作
-        for operation in self.config:
-            print(f"\n▶ 操作预览: {operation['name']}")
-            print(f"  {operation['description']}")
-            
-            # 查找匹配的文件
-            files = self.find_files(datapack_path, operation.get("path", "**/*.json"), 
-                                  operation.get("recursive", True))
-            
-            if not files:
-                print("  ⚠ 没有找到匹配的文件")
-                continue
-            
-            op_replacements = 0
-            op_files_modified = 0
+        # 打印总统计
+        self.reporter.summary("\n" + "=" * 60)
+        self.reporter.summary("升级预览完成!")
+        self.reporter.summary(f"将处理文件总数: {self.total_files_processed}")
+        self.reporter.summary(f"将修改文件数: {self.total_files_modified}")
+        self.reporter.summary(f"跳过未变化文件数: {self.total_files_skipped}")
+        self.reporter.summary(f"将修改处数: {self.total_replacements}")
+        self.reporter.summary("=" * 60)
+        
+        if plan_path:
+            self.save_plan(plan_path, datapack_path)
+        
+        return True
+    
+    def save_plan(self, plan_path, datapack_path):
+        """保存升级计划（文件、规则、字节偏移、新旧片段和源文件哈希）"""
+        plan = {
+            "version": self.PLAN_VERSION,
+            "datapack": str(Path(datapack_path).resolve()),
+            "operations": [
+                {"name": operation["name"], "description": operation["description"]}
+                for operation in self.config
+            ],
+            "files": self.plan_files,
+        }
+        try:
+            with open(plan_path, 'w', encoding='utf-8') as f:
+                json.dump(plan, f, indent=1, ensure_ascii=False)
+            self.reporter.summary(f"✅ 升级计划已保存到: {plan_path} ({len(self.plan_files)} 个文件)")
+        except Exception as e:
+            self.reporter.error(f"❌ 保存升级计划失败: {e}")
+    
+    @staticmethod
+    def apply_plan_steps(data, steps):
+        """按顺序应用计划中的编辑（不运行任何正则），返回新的字节内容"""
+        for step in steps:
+            pieces = []
+            last = 0
+            for edit in step["edits"]:
+                start, end = edit["start"], edit["end"]
+                if start < last or data[start:end] != edit["old"].encode('utf-8'):
+                    raise ValueError(f"编辑位置与原内容不符: {start}-{end}")
+                pieces.append(data[last:start])
+                pieces.append(edit["new"].encode('utf-8'))
+                last = end
+            pieces.append(data[last:])
+            data = b''.join(pieces)
+        return data
+    
+    def apply_plan(self, datapack_path, plan_path):
+        """直接应用升级计划；源文件哈希不一致的文件会被跳过"""
+        datapack_path = Path(datapack_path)
+        if not datapack_path.exists():
+            self.reporter.error(f"❌ 数据包路径不存在: {datapack_path}")
+            return False
+        
+        try:
+            with open(plan_path, 'r', encoding='utf-8') as f:
+                plan = json.load(f)
+            if plan.get("version") != self.PLAN_VERSION:
+                raise ValueError(f"不支持的计划版本: {plan.get('version')}")
+        except Exception as e:
+            self.reporter.error(f"❌ 读取升级计划失败: {e}")
+            return False
+        
+        # 计划只能应用到生成它的数据包
+        if plan.get("datapack") != str(datapack_path.resolve()):
+            self.reporter.error(f"❌ 升级计划属于另一个数据包: {plan.get('datapack')}（当前: {datapack_path.resolve()}）")
+            return False
+        
+        self.reporter.summary(f"\n应用升级计划: {plan_path} -> {datapack_path.name}")
+        self.reporter.summary("=" * 60)
+        
+        operations = plan["operations"]
+        op_results = [[] for _ in operations]
+        self.op_files_skipped = []
+        manifest = self.load_manifest(datapack_path)
+        stale_files = 0
+        
+        for file_plan in plan["files"]:
+            rel_path = Path(file_plan["path"])
+            file_path = datapack_path / rel_path
+            op_counts = {}
+            for step in file_plan["steps"]:
+                count = step.get("count", len(step["edits"]))
+                op_counts[step["op_index"]] = op_counts.get(step["op_index"], 0) + count
             
-            for file_path in files:
-                total_files_processed += 1
+            try:
+                with open(file_path, 'rb') as f:
+                    raw = f.read()
+                if hashlib.sha256(raw).hexdigest() != file_plan["sha256"]:
+                    self.reporter.error(f"  ⚠️ 文件自预览后已变化，跳过: {rel_path}")
+                    stale_files += 1
+                    continue
                 
-                try:
-                    # 读取文件内容
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # 应用替换规则（但不保存）
-                    _, replacements = self.apply_replacements(
-                        content, operation["patterns"]
-                    )
-                    
-                    if replacements > 0:
-                        print(f"  🔍 {file_path.relative_to(datapack_path)} - 将修改 {replacements} 处")
-                        total_replacements += replacements
-                        op_replacements += replacements
-                        total_files_modified += 1
-                        op_files_modified += 1
-                    else:
-                        print(f"  ⏩ {file_path.relative_to(datapack_path)} - 无修改")
+                # 与升级时一致：统一换行符后按字节偏移应用编辑
+                content = raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+                data = self.apply_plan_steps(content.encode('utf-8'), file_plan["steps"])
+                if hashlib.sha256(data).hexdigest() != file_plan["result_sha256"]:
+                    raise ValueError("应用结果与计划不一致")
                 
-                except Exception as e:
-                    print(f"  ❌ 处理文件失败: {file_path} - {str(e)}")
+                # 替换为新文件：不改动与之硬链接的文件，中断时也不会留下写了一半的文件
+                data = data.decode('utf-8').replace('\n', os.linesep).encode('utf-8')
+                self._write_new_file(file_path, data, mode_source=file_path)
+                
+                entry = self._file_entry(file_path, hashlib.sha256(data).hexdigest())
+                entry["rules"] = file_plan["rules"]
+                manifest[file_plan["path"]] = entry
+                for op_index, count in op_counts.items():
+                    op_results[op_index].append((rel_path, count, None))
             
-            print(f"  {op_files_modified} 个文件将被修改，共 {op_replacements} 处更改")
+            except Exception as e:
+                for op_index in op_counts:
+                    op_results[op_index].append((rel_path, 0, f"{file_path} - {str(e)}"))
+        
+        self.report_operations(op_results, operations=operations)
+        self.save_manifest(datapack_path, manifest)
         
         # 打印总统计
-        print("\n" + "=" * 60)
-        print("升级预览完成!")
-        print(f"将处理文件总数: {total_files_processed}")
-        print(f"将修改文件数: {total_files_modified}")
-        print(f"将修改处数: {total_replacements}")
-        print("=" * 60)
+        self.reporter.summary("\n" + "=" * 60)
+        self.reporter.summary("升级计划应用完成!")
+        self.reporter.summary(f"修改文件数: {self.total_files_modified}")
+        self.reporter.summary(f"已变化而跳过的文件数: {stale_files}")
+        self.reporter.summary(f"总修改处数: {self.total_replacements}")
+        self.reporter.summary("=" * 60)
         
         return True
 
+# 进程池子进程中的升级器（每个子进程初始化时编译一次规则）
+_worker_upgrader = None
+
+def _init_worker(config, profiling=False):
+    """进程池初始化函数"""
+    global _worker_upgrader
+    _worker_upgrader = MinecraftUpgrader()
+    _worker_upgrader.set_config(config, report_errors=False)
+    _worker_upgrader.profiling = profiling
+
+def _upgrade_file_worker(file_path, op_indices, write, known_hash, target_path, record):
+    """在子进程中处理单个文件，返回 (结果, 清单条目, 错误)"""
+    try:
+        return _worker_upgrader.upgrade_file(file_path, op_indices, write, known_hash,
+                                             target_path, record) + (None,)
+    except Exception as e:
+        return None, None, str(e)
+
 def main():
     parser = argparse.ArgumentParser(description='Minecraft 数据包升级助手')
     parser.add_argument('datapack', type=str, help='数据包路径')
     parser.add_argument('--config', type=str, default=None, help='自定义配置文件路径')
     parser.add_argument('--preview', action='store_true', help='预览升级将做的更改（不实际修改文件）')
+    parser.add_argument('--plan', type=str, default=None, help='与--preview同用：把预览结果保存为JSON升级计划')
+    parser.add_argument('--apply-plan', type=str, default=None, help='直接应用--plan生成的升级计划（不重新运行正则）')
     parser.add_argument('--save-config', type=str, default=None, help='保存当前配置到文件')
     parser.add_argument('--copy-from', type=str, default=None, help='复制源目录路径')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='并行处理文件的进程数（默认1，即单进程）')
+    parser.add_argument('--full', action='store_true', help='忽略增量升级清单，重新处理所有文件')
+    parser.add_argument('--link-mode', choices=['copy', 'hardlink', 'reflink'], default='copy',
+                        help='--copy-from 时无需升级的文件的复制方式（默认copy：内核零拷贝复制）')
+    parser.add_argument('--from-format', type=int, default=None, help='源数据包的pack_format（默认从pack.mcmeta识别）')
+    parser.add_argument('--target-format', type=int, default=None, help='目标pack_format（默认迁移到最新版本）')
+    parser.add_argument('--profile', type=str, nargs='?', const='upgrade_profile.json', default=None,
+                        help='统计每条规则的耗时、命中和最慢文件并写出JSON（默认upgrade_profile.json；会处理所有文件）')
+    add_reporter_arguments(parser)
     
     args = parser.parse_args()
     
-    # 创建升级器
-    upgrader = MinecraftUpgrader(args.config)
+    # 创建输出器和升级器
+    reporter = reporter_from_args(args)
+    upgrader = MinecraftUpgrader(args.config, reporter)
+    
+    try:
+        run_upgrader(upgrader, args)
+    finally:
+        reporter.flush()
+        if upgrader.profile is not None:
+            upgrader.profile.report(args.profile)
+        if args.report_json:
+            reporter.write_json(args.report_json, datapack=args.datapack)
+
+def run_upgrader(upgrader, args):
+    """按命令行参数执行保存配置、应用计划、升级或预览"""
+    # 性能分析需要实际扫描每个文件，因此忽略增量清单
+    if args.profile:
+        upgrader.profiling = True
+        args.full = True
     
     # 保存配置（如果需要）
     if args.save_config:
         upgrader.save_config(args.save_config)
         return
     
+    # 应用已审阅的升级计划
+    if args.apply_plan:
+        upgrader.apply_plan(args.datapack, args.apply_plan)
+        return
+    
+    # 根据数据包版本选择并融合迁移步骤
+    if not upgrader.select_migrations(args.copy_from or args.datapack, args.from_format, args.target_format):
+        upgrader.reporter.error("❌ 无法确定迁移路径，升级中止")
+        return
+    if not upgrader.config and not args.copy_from:
+        return
+    
+    # 复制并升级：在复制途中完成转换，每个文件只写一次
+    if args.copy_from and not args.preview:
+        upgrader.upgrade_from(args.copy_from, args.datapack, jobs=args.jobs,
+                              incremental=not args.full, link_mode=args.link_mode)
+        return
+    
     # 执行目录复制（如果需要）
     if args.copy_from:
-        if not upgrader.copy_directory(args.copy_from, args.datapack):
-            print("❌ 目录复制失败，升级中止")
+        if not upgrader.copy_directory(args.copy_from, args.datapack, args.link_mode):
+            upgrader.reporter.error("❌ 目录复制失败，升级中止")
             return
     
     # 执行升级或预览
     if args.preview:
-        upgrader.preview_upgrade(args.datapack)
+        upgrader.preview_upgrade(args.datapack, jobs=args.jobs, incremental=not args.full,
+                                 plan_path=args.plan)
     else:
-        upgrader.upgrade_datapack(args.datapack)
+        upgrader.upgrade_datapack(args.datapack, jobs=args.jobs, incremental=not args.full)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
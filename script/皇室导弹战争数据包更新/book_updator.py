@@ -1,38 +1,40 @@
-import pandas as pd
 import json
 import os
 import copy
 from pathlib import Path
 import re
+import argparse
+from reporter import Reporter, add_reporter_arguments, reporter_from_args
+from item_catalog import load_catalog
+from pack_files import PackFiles
 
 class BookModifierUpdater:
-    def __init__(self, excel_path, config):
+    def __init__(self, excel_path, config, reporter=None, files=None):
         self.excel_path = excel_path
         self.config = config
         self.items = []
+        self.reporter = reporter or Reporter()
+        # 数据包文件读写（UpdateSession 中为内存覆盖层）
+        self.files = files or PackFiles()
     
     def load_excel(self):
         """加载Excel数据，所有值作为字符串处理"""
         try:
-            # 读取Excel，不转换数据类型
-            df = pd.read_excel(self.excel_path, dtype=str, keep_default_na=False)
-            print(f"✅ 成功读取Excel文件: {self.excel_path}")
-            
-            # 替换可能的NaN值为空字符串
-            df = df.fillna('')
-            
-            # 转换为道具字典列表，所有值保持字符串格式
-            self.items = df.to_dict('records')
-            print(f"共读取 {len(self.items)} 个道具信息")
+            # 读取Excel（使用道具目录缓存），所有值保持字符串格式，空单元格为空字符串
+            self.items = load_catalog(self.excel_path).string_records()
+            self.reporter.summary(f"✅ 成功读取Excel文件: {self.excel_path}")
+            self.reporter.summary(f"共读取 {len(self.items)} 个道具信息")
             
             # 打印前5个道具作为示例
-            print("\n前5个道具示例:")
-            for i, item in enumerate(self.items[:5], 1):
-                print(f"  道具{i}: {item}")
+            if self.reporter.verbose:
+                self.reporter.log("\n前5个道具示例:", Reporter.VERBOSE)
+                for i, item in enumerate(self.items[:5], 1):
+                    self.reporter.log(f"  道具{i}: {item}", Reporter.VERBOSE)
             
             return True
         except Exception as e:
-            print(f"❌ 读取Excel失败: {e}")
+            self.reporter.error(f"❌ 读取Excel失败: {e}")
+            self.reporter.flush()
             import traceback
             traceback.print_exc()
             return False
@@ -42,9 +44,9 @@ class BookModifierUpdater:
         if not self.load_excel():
             return False
         
-        print("\n" + "=" * 50)
-        print("开始更新书本修饰器数据")
-        print("=" * 50)
+        self.reporter.summary("\n" + "=" * 50)
+        self.reporter.summary("开始更新书本修饰器数据")
+        self.reporter.summary("=" * 50)
         
         success = True
         for file_config in self.config:
@@ -53,53 +55,53 @@ class BookModifierUpdater:
                 if not result:
                     success = False
             except Exception as e:
-                print(f"❌ 处理文件配置时出错: {e}")
+                self.reporter.error(f"❌ 处理文件配置时出错: {e}")
+                self.reporter.flush()
                 import traceback
                 traceback.print_exc()
                 success = False
         
-        print("\n" + "=" * 50)
+        self.reporter.summary("\n" + "=" * 50)
         if success:
-            print("✅ 书本修饰器更新完成！")
+            self.reporter.summary("✅ 书本修饰器更新完成！")
         else:
-            print("⚠️ 更新过程中出现错误")
-        print("=" * 50)
+            self.reporter.error("⚠️ 更新过程中出现错误")
+        self.reporter.summary("=" * 50)
+        self.reporter.flush()
         
         return success
     
     def process_file(self, config):
         """处理单个文件配置"""
         file_path = Path(config['file_path'])
-        print(f"\n处理文件: {file_path}")
+        self.reporter.section(f"\n处理文件: {file_path}")
         
         # 检查文件是否存在
-        if not file_path.exists():
+        if not self.files.exists(file_path):
             if config.get('create_if_missing', False):
-                print(f"创建新文件: {file_path}")
-                file_path.parent.mkdir(parents=True, exist_ok=True)
+                self.reporter.log(f"创建新文件: {file_path}")
                 # 创建包含基本结构的空书本文件
                 base_structure = {
                     "function": "set_written_book_pages",
                     "mode": "append",
                     "pages": []
                 }
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(base_structure, f, indent=2, ensure_ascii=False)
+                self.files.write_text(file_path, json.dumps(base_structure, indent=2, ensure_ascii=False))
             else:
-                print(f"❌ 文件不存在: {file_path}")
+                self.reporter.error(f"❌ 文件不存在: {file_path}")
                 return False
         
         # 读取文件内容
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            original_text = self.files.read_text(file_path)
+            data = json.loads(original_text)
         except Exception as e:
-            print(f"❌ JSON解析错误: {e}")
+            self.reporter.error(f"❌ JSON解析错误: {e}")
             return False
         
         # 确保文件包含pages数组
         if 'pages' not in data or not isinstance(data['pages'], list):
-            print(f"❌ 文件缺少有效的pages数组: {file_path}")
+            self.reporter.error(f"❌ 文件缺少有效的pages数组: {file_path}")
             return False
         
         modified = False
@@ -115,11 +117,11 @@ class BookModifierUpdater:
             filtered_items = self.filter_items(condition)
             
             if not filtered_items:
-                print(f"  ⏩ 没有符合条件的道具，跳过规则: {rule.get('description', '')}")
+                self.reporter.log(f"  ⏩ 没有符合条件的道具，跳过规则: {rule.get('description', '')}", Reporter.VERBOSE)
                 continue
             
-            print(f"  应用规则: {rule.get('description', '')}")
-            print(f"  符合条件道具数: {len(filtered_items)}")
+            self.reporter.log(f"  应用规则: {rule.get('description', '')}", Reporter.VERBOSE)
+            self.reporter.log(f"  符合条件道具数: {len(filtered_items)}", Reporter.VERBOSE)
             
             # 第一阶段：收集需要删除的页面
             for item in filtered_items:
@@ -137,7 +139,9 @@ class BookModifierUpdater:
                     for element in page:
                         if isinstance(element, dict) and element.get('text') == match_value:
                             pages_to_delete.add(page_index)
-                            print(f"    🔍 在页面 {page_index} 找到道具: {match_value}，标记为删除")
+                            if self.reporter.verbose:
+                                self.reporter.log(f"    🔍 在页面 {page_index} 找到道具: {match_value}，标记为删除",
+                                                  Reporter.VERBOSE)
                             found = True
                             break
                     if found:
@@ -159,7 +163,8 @@ class BookModifierUpdater:
                 
                 # 添加到新页面列表
                 new_pages_to_add.append(new_page)
-                print(f"    ➕ 生成新页面: {item.get('名称', '?')}")
+                if self.reporter.verbose:
+                    self.reporter.log(f"    ➕ 生成新页面: {item.get('名称', '?')}", Reporter.VERBOSE)
         
         # 执行删除操作（按索引从大到小删除）
         if pages_to_delete:
@@ -167,27 +172,35 @@ class BookModifierUpdater:
             for idx in sorted_indices:
                 if idx < len(data['pages']):
                     del data['pages'][idx]
-            print(f"    🗑️ 已删除 {len(pages_to_delete)} 个旧页面")
             modified = True
         
         # 添加新页面（统一添加到文件末尾）
         if new_pages_to_add:
             data['pages'].extend(new_pages_to_add)
-            print(f"    📥 已添加 {len(new_pages_to_add)} 个新页面")
             modified = True
         
+        # 重新生成的页面与原内容完全相同时不算修改
+        new_text = json.dumps(data, indent=2, ensure_ascii=False)
+        if modified and new_text == original_text:
+            modified = False
+        
         # 如果有修改则写回文件
         if modified:
             try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                print(f"✅ 书本修饰器文件已更新: {file_path}")
+                self.files.write_text(file_path, new_text)
+                if pages_to_delete:
+                    self.reporter.log(f"    🗑️ 已删除 {len(pages_to_delete)} 个旧页面")
+                if new_pages_to_add:
+                    self.reporter.log(f"    📥 已添加 {len(new_pages_to_add)} 个新页面")
+                self.reporter.record("书本修饰器", file_path, "modified", f"✅ 书本修饰器文件已更新: {file_path}",
+                                     deleted=len(pages_to_delete), added=len(new_pages_to_add))
                 return True
             except Exception as e:
-                print(f"❌ 写入文件失败: {e}")
+                self.reporter.record("书本修饰器", file_path, "error", f"❌ 写入文件失败: {e}")
                 return False
         else:
-            print(f"⏩ 文件无需修改: {file_path}")
+            self.reporter.record("书本修饰器", file_path, "unchanged",
+                                 f"⏩ 文件无需修改: {file_path}" if self.reporter.verbose else None)
             return True
     
     def filter_items(self, condition):
@@ -339,11 +352,20 @@ BOOK_MODIFIER_CONFIG = [
 ]
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='更新书本修饰器数据')
+    add_reporter_arguments(parser)
+    args = parser.parse_args()
+    reporter = reporter_from_args(args)
+    
     # 初始化书本修饰器更新器
     updater = BookModifierUpdater(
         excel_path= "../../doc/道具信息.xlsx",
-        config=BOOK_MODIFIER_CONFIG
+        config=BOOK_MODIFIER_CONFIG,
+        reporter=reporter
     )
     
     # 执行更新
-    updater.run()
\ No newline at end of file
+    updater.run()
+    reporter.flush()
+    if args.report_json:
+        reporter.write_json(args.report_json)
\ No newline at end of file
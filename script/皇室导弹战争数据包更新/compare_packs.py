@@ -1,153 +1,701 @@
 import os
-import filecmp
 import difflib
 import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 import argparse
+from reporter import Reporter, add_reporter_arguments, reporter_from_args
+from diff_report import REPORT_WRITERS, open_report, take_lines
+from diff_algorithms import DIFF_ALGORITHMS
+from pack_sources import CACHE_DIR, open_source, common_algorithm, confirm_crc_digests, walk_order_key
 
-def compare_data_packs(new_data_dir, old_data_dir, output_file=None):
+def read_text_lines(source, rel_path):
+    """从数据包来源按行读取文本文件，无法读取或无法按UTF-8解码时返回None"""
+    try:
+        return source.read_bytes(rel_path).decode('utf-8').splitlines(True)
+    except Exception:
+        return None
+
+def find_similar_renames(added, removed, new_source, old_source, new_files, old_files,
+                         threshold=0.5, max_candidates=20):
+    """
+    为内容有改动的重命名文件寻找最相似的来源
+    
+    候选只限于扩展名相同、大小相近的已删除文件（同名文件优先），
+    每个新增文件最多比较 max_candidates 个候选。返回 [(旧路径, 新路径, 相似度), ...]
+    """
+    by_suffix = {}
+    for old_key in removed:
+        by_suffix.setdefault(Path(old_key).suffix, []).append(old_key)
+    
+    used = set()
+    old_lines_cache = {}
+    renames = []
+    for new_key in added:
+        new_size = new_files[new_key]["size"]
+        new_name = Path(new_key).name
+        candidates = []
+        for old_key in by_suffix.get(Path(new_key).suffix, []):
+            if old_key in used:
+                continue
+            old_size = old_files[old_key]["size"]
+            if max(old_size, new_size) and min(old_size, new_size) / max(old_size, new_size) < threshold:
+                continue
+            candidates.append((Path(old_key).name != new_name, abs(old_size - new_size), old_key))
+        if not candidates:
+            continue
+        
+        new_lines = read_text_lines(new_source, new_key)
+        if new_lines is None:
+            continue
+        
+        best_key, best_score = None, threshold
+        for _, _, old_key in sorted(candidates)[:max_candidates]:
+            if old_key not in old_lines_cache:
+                old_lines_cache[old_key] = read_text_lines(old_source, old_key)
+            old_lines = old_lines_cache[old_key]
+            if old_lines is None:
+                continue
+            matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+            if matcher.real_quick_ratio() < best_score or matcher.quick_ratio() < best_score:
+                continue
+            score = matcher.ratio()
+            if score >= best_score:
+                best_key, best_score = old_key, score
+        
+        if best_key is not None:
+            used.add(best_key)
+            renames.append((best_key, new_key, best_score))
+    return renames
+
+def diff_trees(new_files, old_files, new_source, old_source, similarity=0.5):
+    """
+    比较两个内容清单，返回按路径顺序排列的变化列表 [(状态, 旧路径, 新路径, 相似度), ...]
+    
+    状态为 identical / modified / added / removed / renamed。
+    重命名先通过摘要索引一次匹配（内容完全相同），其余新增和删除的文件再按内容相似度匹配；
+    similarity 为 None 时不做相似度匹配
+    """
+    # 摘要 -> 已删除文件列表（旧目录中存在、新目录中不存在）
+    removed_by_digest = {}
+    for old_key, old_entry in old_files.items():
+        if old_key not in new_files:
+            removed_by_digest.setdefault(old_entry["digest"], []).append(old_key)
+    
+    changes = []
+    renamed_from = {}
+    added = []
+    for new_key, new_entry in new_files.items():
+        old_entry = old_files.get(new_key)
+        if old_entry is not None:
+            status = "identical" if new_entry["digest"] == old_entry["digest"] else "modified"
+            changes.append((status, new_key, new_key, None))
+            continue
+        
+        # 内容完全相同的重命名（同名文件优先）
+        sources = removed_by_digest.get(new_entry["digest"])
+        if sources:
+            name = Path(new_key).name
+            index = next((i for i, old_key in enumerate(sources) if Path(old_key).name == name), 0)
+            old_key = sources.pop(index)
+            renamed_from[old_key] = new_key
+            changes.append(("renamed", old_key, new_key, 1.0))
+        else:
+            added.append(new_key)
+            changes.append(("added", None, new_key, None))
+    
+    removed = [old_key for old_key in old_files if old_key not in new_files and old_key not in renamed_from]
+    
+    # 内容有改动的重命名
+    if similarity is not None and added and removed:
+        similar = find_similar_renames(added, removed, new_source, old_source,
+                                       new_files, old_files, similarity)
+        matched = {new_key: (old_key, score) for old_key, new_key, score in similar}
+        for old_key, _, _ in similar:
+            renamed_from[old_key] = True
+        changes = [
+            ("renamed", matched[new_key][0], new_key, matched[new_key][1])
+            if status == "added" and new_key in matched else (status, old_key, new_key, score)
+            for status, old_key, new_key, score in changes
+        ]
+    
+    for old_key in old_files:
+        if old_key not in new_files and old_key not in renamed_from:
+            changes.append(("removed", old_key, None, None))
+    return changes
+
+def open_report_writer(reporter, output_file, report_format, max_total_lines, new_label, old_label,
+                       base_label=None):
+    """打开流式报告并写出标题，未指定输出文件或无法创建时返回None"""
+    if not output_file:
+        return None
+    try:
+        writer = open_report(output_file, report_format, max_total_lines)
+        writer.begin(new_label, old_label, base_label)
+        return writer
+    except Exception as e:
+        reporter.error(f"❌ 无法创建报告文件: {e}")
+        return None
+
+def emit_file(reporter, writer, show_diff, status, path, result_line, diff_lines=None, truncated=False, **fields):
+    """输出一个文件的比较结果（差异行已按单文件上限截断）"""
+    if diff_lines is not None and show_diff:
+        for line in diff_lines:
+            reporter.log(line)
+        if truncated:
+            reporter.log("... 差异已截断")
+        reporter.log('=' * 80)
+    if writer:
+        writer.file(status, str(path), result_line, diff_lines, truncated, **fields)
+
+def start_diff_pool(tasks, sources, diff_jobs=None):
+    """
+    在进程池中生成差异，返回 (进程池, 结果迭代器)
+    
+    任务中的来源为 sources 中的序号，sources 在每个子进程启动时传入一次；
+    结果按任务顺序返回，报告顺序与单进程时一致；只有一个进程或任务不足两个时不创建进程池
+    """
+    diff_jobs = diff_jobs or os.cpu_count() or 1
+    if diff_jobs <= 1 or len(tasks) <= 1:
+        return None, map(partial(compute_diff, sources=sources), tasks)
+    executor = ProcessPoolExecutor(max_workers=min(diff_jobs, len(tasks)), initializer=_init_diff_worker,
+                                   initargs=(sources,))
+    return executor, executor.map(_diff_worker, tasks, chunksize=max(1, len(tasks) // (diff_jobs * 4)))
+
+def compare_data_packs(new_data_dir, old_data_dir, output_file=None, reporter=None, jobs=None,
+                       use_cache=True, similarity=0.5, json_mode='semantic', report_format=None,
+                       max_file_lines=1000, max_total_lines=50000, diff_jobs=None, diff_algorithm='difflib',
+                       git_repo='.', verify_crc=False):
     """
     比较两个数据包目录中的文件差异
     
     参数:
-    new_data_dir -- 修改后的数据包data目录
-    old_data_dir -- 原始数据包的data目录
+    new_data_dir -- 修改后的数据包data目录（也可以是 xxx.zip[:子目录] 或 git:<版本>:<路径>）
+    old_data_dir -- 原始数据包的data目录（同上）
     output_file  -- 差异输出文件路径（可选）
+    reporter     -- 输出器（可选，默认只输出不同的文件；verbose 时也列出相同的文件）
+    jobs         -- 计算摘要的线程数（默认按CPU数）
+    use_cache    -- 是否使用内容清单缓存（只重新计算大小或修改时间变化的文件）
+    similarity   -- 改动后重命名的最低相似度（None 表示只识别内容完全相同的重命名）
+    json_mode    -- JSON文件的比较方式：semantic（按路径比较，只有格式不同视为相同）或 text（逐行比较）
+    report_format   -- 报告格式 text / jsonl / html（默认按输出文件扩展名判断）
+    max_file_lines  -- 每个文件最多输出的差异行数（0 表示不限制）
+    max_total_lines -- 报告最多写出的差异行数（0 表示不限制）
+    diff_jobs       -- 生成差异的进程数（默认按CPU数，1 表示在当前进程中生成）
+    diff_algorithm  -- 差异算法 difflib / patience
+    git_repo        -- git来源所在的仓库目录
+    verify_crc      -- 两侧都是zip时，大小和CRC都相同的文件再读取内容确认（默认直接视为相同）
     """
-    # 确保目录存在
-    new_path = Path(new_data_dir)
-    old_path = Path(old_data_dir)
+    reporter = reporter or Reporter()
     
-    if not new_path.exists():
-        print(f"❌ 新数据包目录不存在: {new_path}")
+    # 确保数据包存在（目录、zip发布包或git版本）
+    try:
+        new_source = open_source(new_data_dir, git_repo)
+    except Exception as e:
+        reporter.error(f"❌ 新数据包不存在: {e}")
+        reporter.flush()
         return False
     
-    if not old_path.exists():
-        print(f"❌ 原始数据包目录不存在: {old_path}")
+    try:
+        old_source = open_source(old_data_dir, git_repo)
+    except Exception as e:
+        reporter.error(f"❌ 原始数据包不存在: {e}")
+        reporter.flush()
         return False
     
-    print(f"开始比较数据包:")
-    print(f"  新数据包: {new_path}")
-    print(f"  原始数据包: {old_path}")
+    reporter.summary(f"开始比较数据包:")
+    reporter.summary(f"  新数据包: {new_source.label}")
+    reporter.summary(f"  原始数据包: {old_source.label}")
     
-    # 收集所有修改过的文件
-    modified_files = []
-    for root, dirs, files in os.walk(new_path):
-        for file in files:
-            # 跳过非文本文件（如图片、声音等）
-            if file.split('.')[-1].lower() in ['png', 'jpg', 'ogg', 'wav', 'mp3']:
-                continue
-                
-            rel_path = Path(root).relative_to(new_path)
-            new_file = new_path / rel_path / file
-            old_file = old_path / rel_path / file
-            
-            # 只比较在原始数据包中存在的文件
-            if old_file.exists():
-                modified_files.append((new_file, old_file, rel_path / file))
-    
-    print(f"找到 {len(modified_files)} 个需要比对的文件")
-    
-    # 比较结果
-    diff_count = 0
-    identical_count = 0
-    output_lines = []
-    
-    # 添加标题
-    title = f"数据包差异报告\n新旧目录对比:\n  新: {new_path}\n  旧: {old_path}\n\n"
-    output_lines.append(title)
-    
-    for new_file, old_file, rel_path in modified_files:
-        # 比较文件内容
-        if filecmp.cmp(new_file, old_file, shallow=False):
-            # 文件内容完全相同
-            identical_count += 1
-            result_line = f"✅ 文件相同: {rel_path}\n"
-            output_lines.append(result_line)
-        else:
-            # 文件内容不同
-            diff_count += 1
-            result_line = f"❌ 文件不同: {rel_path}\n"
-            output_lines.append(result_line)
-            
-            # 获取文件差异
-            diff = get_file_diff(old_file, new_file)
-            if diff:
-                output_lines.append(diff)
-    
-    # 添加摘要
-    summary = f"\n比较结果摘要:\n"
-    summary += f"  总文件数: {len(modified_files)}\n"
-    summary += f"  相同文件: {identical_count}\n"
-    summary += f"  不同文件: {diff_count}\n"
-    output_lines.append(summary)
-    
-    # 输出结果
-    report = ''.join(output_lines)
-    
-    if output_file:
-        try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(report)
-            print(f"✅ 差异报告已保存到: {output_file}")
-        except Exception as e:
-            print(f"❌ 保存报告失败: {e}")
+    # 读取两侧的内容清单（摘要相同的文件无需再读取内容）；
+    # 两侧使用同一种摘要，zip的CRC和git的对象ID可直接使用
+    algorithm = common_algorithm(new_source, old_source)
+    cache_dir = CACHE_DIR if use_cache else None
+    new_files = new_source.manifest(algorithm, cache_dir, jobs)
+    old_files = old_source.manifest(algorithm, cache_dir, jobs)
+    reporter.log(f"计算摘要 ({algorithm}): 新 {new_source.hashed} 个, 旧 {old_source.hashed} 个 "
+                 f"(其余使用缓存或zip/git中记录的校验值)")
+    if algorithm == 'crc32':
+        confirmed = confirm_crc_digests([new_source, old_source], [new_files, old_files], verify_crc)
+        if verify_crc:
+            reporter.log(f"大小和CRC相同的 {confirmed} 个文件已用内容摘要确认")
     
-    # 控制台输出
-    print(report)
+    # 新增、删除、修改和重命名的文件
+    changes = diff_trees(new_files, old_files, new_source, old_source, similarity)
+    counts = {"identical": 0, "modified": 0, "added": 0, "removed": 0, "renamed": 0, "formatting": 0}
+    for change in changes:
+        counts[change[0]] += 1
+    
+    reporter.summary(f"找到 {counts['identical'] + counts['modified']} 个需要比对的文件")
+    
+    # 报告边比较边写出，不在内存中累积
+    writer = open_report_writer(reporter, output_file, report_format, max_total_lines,
+                                new_source.label, old_source.label)
+    
+    # 有报告文件时控制台只列出文件名，差异详情写入报告（verbose 时也输出到控制台）
+    emit = partial(emit_file, reporter, writer, reporter.verbose or not output_file)
+    
+    # 需要生成差异的文件（修改的文件和改动后重命名的文件），按比较顺序在进程池中生成
+    tasks = [
+        (1, old_key, 0, new_key, json_mode, diff_algorithm, max_file_lines)
+        for status, old_key, new_key, score in changes
+        if status == "modified" or (status == "renamed" and score < 1)
+    ]
+    executor, results = start_diff_pool(tasks, [new_source, old_source], diff_jobs)
     
-    return True
-
-def get_file_diff(old_file, new_file):
-    """获取两个文件的差异对比"""
     try:
-        # 读取文件内容
-        with open(old_file, 'r', encoding='utf-8') as f:
-            old_lines = f.readlines()
+        for status, old_key, new_key, score in changes:
+            if status == "identical":
+                # 文件内容完全相同（默认只计数）
+                if reporter.verbose:
+                    result_line = f"✅ 文件相同: {new_key}"
+                    reporter.record("比较", new_key, "unchanged", result_line)
+                    emit("identical", new_key, result_line)
+                else:
+                    reporter.record("比较", new_key, "unchanged")
+            elif status == "modified":
+                equivalent, diff_lines, truncated = next(results)
+                if equivalent:
+                    # 只有格式不同，视为相同（不生成逐行差异）
+                    counts["modified"] -= 1
+                    counts["identical"] += 1
+                    counts["formatting"] += 1
+                    if reporter.verbose:
+                        result_line = f"✅ 文件相同（仅格式不同）: {new_key}"
+                        reporter.record("比较", new_key, "formatting", result_line)
+                        emit("formatting", new_key, result_line)
+                    else:
+                        reporter.count("比较", "formatting")
+                    continue
+                
+                # 文件内容不同
+                result_line = f"❌ 文件不同: {new_key}"
+                reporter.record("比较", new_key, "modified", result_line)
+                emit("modified", new_key, result_line, diff_lines, truncated)
+            elif status == "added":
+                result_line = f"➕ 新增文件: {new_key}"
+                reporter.record("比较", new_key, "added", result_line)
+                emit("added", new_key, result_line)
+            elif status == "removed":
+                result_line = f"➖ 删除文件: {old_key}"
+                reporter.record("比较", old_key, "removed", result_line)
+                emit("removed", old_key, result_line)
+            else:
+                if score < 1:
+                    result_line = f"🔀 重命名并修改: {old_key} -> {new_key} (相似度 {score:.0%})"
+                else:
+                    result_line = f"🔀 重命名: {old_key} -> {new_key}"
+                reporter.record("比较", new_key, "renamed", result_line, old_path=old_key,
+                                similarity=round(score, 3))
+                diff_lines, truncated = None, False
+                if score < 1:
+                    equivalent, diff_lines, truncated = next(results)
+                    if equivalent:
+                        diff_lines = None
+                emit("renamed", new_key, result_line, diff_lines, truncated, old_path=old_key,
+                     similarity=round(score, 3))
         
-        with open(new_file, 'r', encoding='utf-8') as f:
-            new_lines = f.readlines()
+        # 添加摘要
+        summary = f"\n比较结果摘要:\n"
+        summary += f"  总文件数: {counts['identical'] + counts['modified']}\n"
+        summary += f"  相同文件: {counts['identical']}"
+        summary += f" (其中仅格式不同: {counts['formatting']})\n" if counts['formatting'] else "\n"
+        summary += f"  不同文件: {counts['modified']}\n"
+        summary += f"  新增文件: {counts['added']}\n"
+        summary += f"  删除文件: {counts['removed']}\n"
+        summary += f"  重命名文件: {counts['renamed']}\n"
         
-        # 生成差异
-        diff = difflib.unified_diff(
-            old_lines, new_lines,
-            fromfile=str(old_file),
-            tofile=str(new_file),
-            lineterm=''
-        )
+        # 控制台输出摘要
+        reporter.summary(summary.rstrip('\n'))
         
-        # 格式化差异
-        diff_text = ''.join(diff)
-        return f"差异详情:\n{diff_text}\n{'='*80}\n"
+        if writer:
+            writer.end(counts, summary)
+            if writer.total_truncated:
+                reporter.summary(f"⚠️ 报告中有 {writer.total_truncated} 个文件的差异被截断")
+            reporter.summary(f"✅ 差异报告已保存到: {output_file}")
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+        if writer:
+            writer.close()
+        for source in (new_source, old_source):
+            source.close()
     
-    except UnicodeDecodeError:
-        # 尝试二进制比较
+    reporter.flush()
+    return True
+
+# 三方比较的分类：状态 -> (图标, 说明)
+THREE_WAY_KINDS = {
+    "changed_a": ("➡️", "仅A修改（需移植到B）"),
+    "changed_b": ("⬅️", "仅B修改（需移植到A）"),
+    "changed_both": ("🟰", "两侧相同修改"),
+    "conflict": ("⚠️", "两侧修改不同"),
+}
+
+def classify_three_way(base_digest, a_digest, b_digest):
+    """
+    按三个摘要（文件不存在时为None）分类，返回 unchanged / changed_a / changed_b / changed_both / conflict
+    """
+    a_changed = a_digest != base_digest
+    b_changed = b_digest != base_digest
+    if not a_changed and not b_changed:
+        return "unchanged"
+    if a_changed and b_changed:
+        return "changed_both" if a_digest == b_digest else "conflict"
+    return "changed_a" if a_changed else "changed_b"
+
+def describe_change(base_digest, digest):
+    """单侧相对基准的变化：新增 / 删除 / 修改"""
+    if base_digest is None:
+        return "新增"
+    if digest is None:
+        return "删除"
+    return "修改"
+
+def three_way_compare(base_dir, a_dir, b_dir, output_file=None, reporter=None, jobs=None, use_cache=True,
+                      json_mode='semantic', report_format=None, max_file_lines=1000, max_total_lines=50000,
+                      diff_jobs=None, diff_algorithm='difflib', git_repo='.', verify_crc=False):
+    """
+    三方比较：以共同基准比较两个并行维护的变体（如 src/1.21 和 src/1.21.5-1.21.8）
+    
+    每个文件分类为 仅A修改 / 仅B修改 / 两侧相同修改 / 两侧修改不同，
+    仅一侧修改的文件即为还需要移植到另一侧的修改。三个来源各自只读取一次内容清单（共用同一种摘要），
+    只有需要显示差异的文件才读取内容。
+    
+    参数与 compare_data_packs 相同；base_dir / a_dir / b_dir 可以是目录、zip或git来源
+    """
+    reporter = reporter or Reporter()
+    
+    sources = {}
+    for name, spec in (("基准", base_dir), ("A", a_dir), ("B", b_dir)):
         try:
-            with open(old_file, 'rb') as f:
-                old_data = f.read()
-            
-            with open(new_file, 'rb') as f:
-                new_data = f.read()
+            sources[name] = open_source(spec, git_repo)
+        except Exception as e:
+            reporter.error(f"❌ {name}数据包不存在: {e}")
+            reporter.flush()
+            return False
+    base_source, a_source, b_source = sources["基准"], sources["A"], sources["B"]
+    
+    reporter.summary(f"开始三方比较:")
+    reporter.summary(f"  基准: {base_source.label}")
+    reporter.summary(f"  A: {a_source.label}")
+    reporter.summary(f"  B: {b_source.label}")
+    
+    # 三个来源共用同一种摘要，各读取一次内容清单
+    algorithm = common_algorithm(base_source, a_source, b_source)
+    cache_dir = CACHE_DIR if use_cache else None
+    base_files = base_source.manifest(algorithm, cache_dir, jobs)
+    a_files = a_source.manifest(algorithm, cache_dir, jobs)
+    b_files = b_source.manifest(algorithm, cache_dir, jobs)
+    reporter.log(f"计算摘要 ({algorithm}): 基准 {base_source.hashed} 个, A {a_source.hashed} 个, "
+                 f"B {b_source.hashed} 个 (其余使用缓存或zip/git中记录的校验值)")
+    if algorithm == 'crc32':
+        confirmed = confirm_crc_digests([base_source, a_source, b_source], [base_files, a_files, b_files],
+                                        verify_crc)
+        if verify_crc:
+            reporter.log(f"大小和CRC相同的 {confirmed} 个文件已用内容摘要确认")
+    
+    # 合并三侧的路径（按目录遍历顺序）
+    keys = sorted({*a_files, *b_files, *base_files}, key=walk_order_key)
+    
+    def digest(files, key):
+        entry = files.get(key)
+        return entry["digest"] if entry else None
+    
+    entries = []
+    for key in keys:
+        base_digest, a_digest, b_digest = digest(base_files, key), digest(a_files, key), digest(b_files, key)
+        kind = classify_three_way(base_digest, a_digest, b_digest)
+        # 需要生成的差异：单侧修改显示相对基准的差异，冲突时两侧都显示（两侧都新增时直接比较A和B）
+        diffs = []
+        if kind in ("changed_a", "conflict") and base_digest and a_digest:
+            diffs.append(("A", base_source, a_source))
+        if kind in ("changed_b", "conflict") and base_digest and b_digest:
+            diffs.append(("B", base_source, b_source))
+        if kind == "conflict" and not base_digest:
+            diffs.append(("B -> A", b_source, a_source))
+        entries.append((key, kind, base_digest, a_digest, b_digest, diffs))
+    
+    counts = {"unchanged": 0, "changed_a": 0, "changed_b": 0, "changed_both": 0, "conflict": 0}
+    for entry in entries:
+        counts[entry[1]] += 1
+    
+    reporter.summary(f"找到 {len(keys)} 个文件")
+    
+    writer = open_report_writer(reporter, output_file, report_format, max_total_lines,
+                                a_source.label, b_source.label, base_source.label)
+    emit = partial(emit_file, reporter, writer, reporter.verbose or not output_file)
+    
+    source_list = [base_source, a_source, b_source]
+    tasks = [
+        (source_list.index(old_source), key, source_list.index(new_source), key, json_mode, diff_algorithm,
+         max_file_lines)
+        for key, _, _, _, _, diffs in entries
+        for _, old_source, new_source in diffs
+    ]
+    executor, results = start_diff_pool(tasks, source_list, diff_jobs)
+    
+    try:
+        for key, kind, base_digest, a_digest, b_digest, diffs in entries:
+            if kind == "unchanged":
+                reporter.record("三方比较", key, "unchanged")
+                continue
             
-            if old_data == new_data:
-                return "⚠️ 文件内容相同（但文本比较失败）\n"
+            icon, title = THREE_WAY_KINDS[kind]
+            if kind == "changed_a":
+                detail = describe_change(base_digest, a_digest)
+            elif kind == "changed_b":
+                detail = describe_change(base_digest, b_digest)
             else:
-                return "⚠️ 文件内容不同（二进制文件，无法显示差异）\n"
+                detail = f"A{describe_change(base_digest, a_digest)}, B{describe_change(base_digest, b_digest)}"
+            result_line = f"{icon} {title}: {key} ({detail})"
+            
+            # 两侧相同的修改已经同步，默认只计数
+            if kind == "changed_both" and not reporter.verbose:
+                reporter.count("三方比较", kind)
+                continue
+            reporter.record("三方比较", key, kind, result_line, detail=detail)
+            
+            # 合并该文件的各段差异（每段标明是哪一侧的修改）
+            diff_lines, truncated = [], False
+            for side, _, _ in diffs:
+                equivalent, side_lines, side_truncated = next(results)
+                if equivalent:
+                    diff_lines.append(f"[{side}] 仅格式不同")
+                    continue
+                diff_lines.append(f"[{side}]")
+                diff_lines.extend(side_lines)
+                truncated = truncated or side_truncated
+            emit(kind, key, result_line, diff_lines or None, truncated, detail=detail)
         
-        except Exception as e:
-            return f"⚠️ 无法比较文件: {e}\n"
+        summary = f"\n三方比较结果摘要:\n"
+        summary += f"  总文件数: {len(keys)}\n"
+        summary += f"  未修改: {counts['unchanged']}\n"
+        summary += f"  仅A修改（需移植到B）: {counts['changed_a']}\n"
+        summary += f"  仅B修改（需移植到A）: {counts['changed_b']}\n"
+        summary += f"  两侧相同修改: {counts['changed_both']}\n"
+        summary += f"  两侧修改不同: {counts['conflict']}\n"
+        reporter.summary(summary.rstrip('\n'))
+        
+        if writer:
+            writer.end(counts, summary)
+            if writer.total_truncated:
+                reporter.summary(f"⚠️ 报告中有 {writer.total_truncated} 个文件的差异被截断")
+            reporter.summary(f"✅ 差异报告已保存到: {output_file}")
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+        if writer:
+            writer.close()
+        for source in source_list:
+            source.close()
     
+    reporter.flush()
+    return True
+
+def compute_diff(task, sources):
+    """
+    生成一个文件的差异（可在子进程中运行），返回 (是否仅格式不同, 差异行, 是否被截断)
+    
+    task 为 (旧来源序号, 旧路径, 新来源序号, 新路径, JSON比较方式, 差异算法, 单文件差异行上限)，
+    来源序号指向 sources；差异行在子进程中就按上限截断，只把需要输出的部分传回主进程
+    """
+    old_index, old_key, new_index, new_key, json_mode, diff_algorithm, max_file_lines = task
+    old_source, new_source = sources[old_index], sources[new_index]
+    try:
+        old_data = old_source.read_bytes(old_key)
+        new_data = new_source.read_bytes(new_key)
     except Exception as e:
-        return f"⚠️ 比较文件时出错: {e}\n"
+        return False, [f"⚠️ 比较文件时出错: {e}"], False
+    
+    if json_mode == 'semantic' and new_key.endswith('.json'):
+        semantic = get_json_diff(old_data, new_data)
+        if semantic is not None:
+            if semantic[0]:
+                return True, None, False
+            return (False, *take_lines(semantic[1], max_file_lines))
+    diff_lines = get_file_diff(old_data, new_data, f"{old_source.label}/{old_key}",
+                               f"{new_source.label}/{new_key}", diff_algorithm)
+    return (False, *take_lines(diff_lines, max_file_lines))
+
+# 子进程中的数据包来源（进程池初始化时传入；zip文件和git进程随子进程退出而关闭）
+_worker_sources = None
+
+def _init_diff_worker(sources):
+    """进程池初始化函数"""
+    global _worker_sources
+    _worker_sources = sources
+
+def _diff_worker(task):
+    """在子进程中生成一个文件的差异"""
+    return compute_diff(task, _worker_sources)
+
+def json_path_join(path, key):
+    """拼接JSON路径：数组下标为 [i]，对象键为 .key（根部的键不带点）"""
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else key
+
+def iter_json_changes(old, new, path=''):
+    """
+    递归比较两个JSON值，产出 (类型, 路径, 旧值, 新值)，类型为 changed / added / removed
+    
+    数组先按元素的规范化序列对齐（插入或删除元素不会导致后续元素全部显示为修改），
+    对齐后长度相同的替换块再逐个递归比较
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, old_value in old.items():
+            if key not in new:
+                yield "removed", json_path_join(path, key), old_value, None
+            else:
+                yield from iter_json_changes(old_value, new[key], json_path_join(path, key))
+        for key, new_value in new.items():
+            if key not in old:
+                yield "added", json_path_join(path, key), None, new_value
+    elif isinstance(old, list) and isinstance(new, list):
+        old_keys = [json.dumps(value, sort_keys=True) for value in old]
+        new_keys = [json.dumps(value, sort_keys=True) for value in new]
+        matcher = difflib.SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+            if tag == 'replace' and i2 - i1 == j2 - j1:
+                for offset in range(i2 - i1):
+                    yield from iter_json_changes(old[i1 + offset], new[j1 + offset],
+                                                 json_path_join(path, j1 + offset))
+                continue
+            
+            # 长度不同的替换块：按顺序把旧元素与最相似的新元素配对，其余视为新增或删除
+            pairs = []
+            if tag == 'replace' and (i2 - i1) * (j2 - j1) <= 2500:
+                next_j = j1
+                for i in range(i1, i2):
+                    best_j, best_score = None, 0.5
+                    for j in range(next_j, j2):
+                        score = difflib.SequenceMatcher(None, old_keys[i], new_keys[j]).ratio()
+                        if score > best_score:
+                            best_j, best_score = j, score
+                    if best_j is not None:
+                        pairs.append((i, best_j))
+                        next_j = best_j + 1
+            
+            paired_old = {i for i, _ in pairs}
+            paired_new = dict((j, i) for i, j in pairs)
+            for i in range(i1, i2):
+                if i not in paired_old:
+                    yield "removed", json_path_join(path, i), old[i], None
+            for j in range(j1, j2):
+                if j in paired_new:
+                    yield from iter_json_changes(old[paired_new[j]], new[j], json_path_join(path, j))
+                else:
+                    yield "added", json_path_join(path, j), None, new[j]
+    elif old != new or type(old) is not type(new):
+        yield "changed", path, old, new
+
+def format_json_value(value, limit=120):
+    """把JSON值格式化为单行文本（过长时截断）"""
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= limit else text[:limit - 3] + '...'
+
+def get_json_diff(old_data, new_data):
+    """
+    语义比较两个JSON文件的内容（字节）
+    
+    返回 (是否等价, 差异行列表)：只有格式不同时视为等价且不生成差异；
+    任一文件无法解析时返回None（由调用方改用文本差异）
+    """
+    try:
+        old_data = json.loads(old_data.decode('utf-8-sig'))
+        new_data = json.loads(new_data.decode('utf-8-sig'))
+    except ValueError:
+        return None
+    
+    if old_data == new_data:
+        return True, []
+    
+    lines = []
+    for kind, path, old_value, new_value in iter_json_changes(old_data, new_data):
+        path = path or '(根)'
+        if kind == "changed":
+            lines.append(f"  {path}: {format_json_value(old_value)} → {format_json_value(new_value)}")
+        elif kind == "added":
+            lines.append(f"  + {path}: {format_json_value(new_value)}")
+        else:
+            lines.append(f"  - {path}: {format_json_value(old_value)}")
+    return False, [f"JSON差异 ({len(lines)} 处):"] + lines
+
+def get_file_diff(old_data, new_data, fromfile, tofile, algorithm='difflib'):
+    """
+    逐行产出两个文件内容（字节）的差异对比（不含换行符）
+    
+    差异行是惰性生成的，调用方截断后不会再计算剩余部分；algorithm 为 DIFF_ALGORITHMS 中的算法名
+    """
+    try:
+        old_lines = old_data.decode('utf-8').splitlines()
+        new_lines = new_data.decode('utf-8').splitlines()
+    except UnicodeDecodeError:
+        # 按二进制比较
+        if old_data == new_data:
+            yield "⚠️ 文件内容相同（但文本比较失败）"
+        else:
+            yield "⚠️ 文件内容不同（二进制文件，无法显示差异）"
+        return
+    
+    # 生成差异
+    yield "差异详情:"
+    yield from DIFF_ALGORITHMS[algorithm](
+        old_lines, new_lines,
+        fromfile=fromfile,
+        tofile=tofile
+    )
 
 if __name__ == "__main__":
     # 设置命令行参数
     parser = argparse.ArgumentParser(description='比较两个数据包目录中的文件差异')
-    parser.add_argument('new_data', help='修改后的数据包data目录路径')
-    parser.add_argument('old_data', help='原始数据包的data目录路径')
+    parser.add_argument('new_data', help='修改后的数据包data目录路径（也可以是 xxx.zip[:子目录] 或 git:<版本>:<路径>）')
+    parser.add_argument('old_data', help='原始数据包的data目录路径（同上）')
     parser.add_argument('-o', '--output', help='差异报告输出文件路径（可选）')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='计算摘要的线程数（默认按CPU数）')
+    parser.add_argument('--no-cache', action='store_true', help='不使用内容清单缓存，重新计算所有摘要')
+    parser.add_argument('--similarity', type=float, default=0.5,
+                        help='识别改动后重命名的最低相似度（0-1，默认0.5；设为1只识别内容相同的重命名）')
+    parser.add_argument('--json-diff', choices=['semantic', 'text'], default='semantic',
+                        help='JSON文件的比较方式（默认semantic：按路径列出变化，只有格式不同视为相同）')
+    parser.add_argument('--format', choices=sorted(REPORT_WRITERS), default=None,
+                        help='差异报告格式（默认按输出文件扩展名判断：.html 为HTML，.jsonl 为JSON Lines，其余为纯文本）')
+    parser.add_argument('--max-file-lines', type=int, default=1000,
+                        help='每个文件最多输出的差异行数（默认1000，0表示不限制）')
+    parser.add_argument('--max-total-lines', type=int, default=50000,
+                        help='差异报告最多写出的差异行数（默认50000，0表示不限制）')
+    parser.add_argument('--diff-jobs', type=int, default=None,
+                        help='生成差异的进程数（默认按CPU数，1表示不使用进程池）')
+    parser.add_argument('--diff-algorithm', choices=sorted(DIFF_ALGORITHMS), default='difflib',
+                        help='差异算法（默认difflib；patience 对大型生成文件更快，对齐也更稳定）')
+    parser.add_argument('--base', default=None,
+                        help='三方比较的共同基准（此时 new_data 和 old_data 分别作为变体A和B，列出还需要移植的修改）')
+    parser.add_argument('--verify-crc', action='store_true',
+                        help='比较两个zip时，大小和CRC都相同的文件再读取内容确认（默认直接视为相同）')
+    parser.add_argument('--git-repo', default='.', help='git:<版本>:<路径> 所在的仓库目录（如子模块目录，默认当前目录）')
+    add_reporter_arguments(parser)
     
     args = parser.parse_args()
+    reporter = reporter_from_args(args)
     
     # 执行比较
-    compare_data_packs(args.new_data, args.old_data, args.output)
\ No newline at end of file
+    if args.base:
+        three_way_compare(args.base, args.new_data, args.old_data, args.output, reporter, jobs=args.jobs,
+                          use_cache=not args.no_cache, json_mode=args.json_diff, report_format=args.format,
+                          max_file_lines=args.max_file_lines, max_total_lines=args.max_total_lines,
+                          diff_jobs=args.diff_jobs, diff_algorithm=args.diff_algorithm, git_repo=args.git_repo,
+                          verify_crc=args.verify_crc)
+    else:
+        compare_data_packs(args.new_data, args.old_data, args.output, reporter, jobs=args.jobs,
+                           use_cache=not args.no_cache, similarity=args.similarity, json_mode=args.json_diff,
+                           report_format=args.format, max_file_lines=args.max_file_lines,
+                           max_total_lines=args.max_total_lines, diff_jobs=args.diff_jobs,
+                           diff_algorithm=args.diff_algorithm, git_repo=args.git_repo,
+                           verify_crc=args.verify_crc)
+    if args.report_json:
+        extra = {"base": args.base} if args.base else {}
+        reporter.write_json(args.report_json, new_data=args.new_data, old_data=args.old_data, **extra)
\ No newline at end of file
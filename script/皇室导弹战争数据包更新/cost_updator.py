@@ -1,10 +1,35 @@
-import pandas as pd
 import os
 import re
 import json
 from pathlib import Path
-import shutil
 import copy
+import argparse
+from reporter import Reporter, add_reporter_arguments, reporter_from_args
+from item_catalog import load_catalog
+from pack_files import PackFiles
+
+# 输出器（在命令行入口按参数重新创建）
+reporter = Reporter()
+
+# 数据包文件读写（UpdateSession 中替换为内存覆盖层）
+pack = PackFiles()
+
+def load_items(excel_path, column_mapping=None):
+    """读取道具信息（使用道具目录缓存），返回 {道具代号（小写）: 道具数据}"""
+    catalog = load_catalog(excel_path)
+    
+    # 应用列名映射
+    if column_mapping:
+        reporter.log(f"已应用列名映射: {column_mapping}")
+    
+    # 创建道具名称到数据的映射
+    # 使用道具代号作为主键（小写处理）
+    items = {str(row['id']).lower(): row for row in catalog.records(column_mapping=column_mapping)}
+    
+    # 添加原始道具名称到字典
+    for key, item in items.items():
+        item['道具名称'] = item.get('name', '')  # 保留中文名称
+    return items
 
 def update_datapack(excel_path, config, column_mapping = None):
     """
@@ -14,51 +39,35 @@ def update_datapack(excel_path, config, column_mapping = None):
     excel_path -- Excel文件路径
     config -- 配置字典，包含文件处理规则
     """
-    # 读取Excel数据
+    # 读取Excel数据（使用道具目录缓存，表格未变化时不重新解析）
     try:
-        df = pd.read_excel(excel_path)
-        
-        # 应用列名映射
-        if column_mapping:
-            df.rename(columns=column_mapping, inplace=True)
-            print(f"已应用列名映射: {column_mapping}")
-        
-        # 创建道具名称到数据的映射
-        # 使用道具代号作为主键（小写处理）
-        items = {str(row['id']).lower(): row.to_dict() for _, row in df.iterrows()}
-        
-        # 添加原始道具名称到字典
-        for key, item in items.items():
-            item['道具名称'] = item.get('name', '')  # 保留中文名称
-            
-        print(f"成功读取 {len(items)} 个道具信息")
+        items = load_items(excel_path, column_mapping)
+        reporter.summary(f"成功读取 {len(items)} 个道具信息")
     except Exception as e:
-        print(f"读取Excel失败: {e}")
+        reporter.error(f"读取Excel失败: {e}")
         return
-
+    
     # 处理所有目标文件
     if 'item_loot_table' in config:
         process_item_loot_table(items, config['item_loot_table'])
-
+    
     for file_path, file_config in config.items():
-
+        
         # 处理 cost_group 类型（Xcost.json 文件组）
         if file_config.get('type') == 'cost_group':
             process_cost_group_files(items, file_config)
             continue
         file_path = Path(file_path)
-        if not file_path.exists():
+        if not pack.exists(file_path):
             # 如果文件不存在但需要自动创建
             if file_config.get('create_if_missing', False):
-                print(f"创建新文件: {file_path}")
-                file_path.parent.mkdir(parents=True, exist_ok=True)
+                reporter.log(f"创建新文件: {file_path}")
                 if file_config['type'] == 'text':
-                    file_path.touch()
+                    pack.write_text(file_path, '')
                 elif file_config['type'] == 'json':
-                    with open(file_path, 'w') as f:
-                        json.dump([], f, indent=2)
+                    pack.write_text(file_path, json.dumps([], indent=2))
             else:
-                print(f"文件不存在且未配置自动创建: {file_path}")
+                reporter.error(f"文件不存在且未配置自动创建: {file_path}")
                 continue
         
         try:
@@ -68,164 +77,266 @@ def update_datapack(excel_path, config, column_mapping = None):
             # JSON文件处理
             elif file_config['type'] == 'json':
                 process_json_file(file_path, items, file_config)
-                
+        
         except Exception as e:
-            print(f"处理文件 {file_path} 时出错: {e}")
+            reporter.error(f"处理文件 {file_path} 时出错: {e}")
+            reporter.flush()
             import traceback
             traceback.print_exc()
 
+def compile_rule(pattern, item_ids):
+    """
+    把规则编译为匹配所有道具代号的单个正则（忽略大小写）
+    
+    第一个 <ID> 替换为所有道具代号的候选分组 (?P<id>...)（按长度降序，优先匹配较长的代号），
+    之后的 <ID> 用反向引用，保证同一处匹配中的代号相同。规则中没有 <ID> 时返回普通正则
+    """
+    if '<ID>' not in pattern:
+        return re.compile(pattern, re.IGNORECASE)
+    alternation = '|'.join(re.escape(item_id) for item_id in sorted(item_ids, key=len, reverse=True))
+    first, rest = pattern.split('<ID>', 1)
+    return re.compile(f"{first}(?P<id>{alternation}){rest.replace('<ID>', '(?P=id)')}", re.IGNORECASE)
+
+class InsertionBuffer:
+    """
+    按锚点（如 #扣费、#发牌）缓冲待追加的内容，最后一次性写入文件内容
+    
+    与逐条拼接文件内容的结果相同：内容按 order（逐条拼接时的追加顺序）排列，而不是按缓冲的先后；
+    同一锚点后的内容按追加顺序倒序排列（后追加的在锚点正下方），
+    没有锚点或锚点不存在的内容按顺序追加到文件末尾
+    """
+    def __init__(self):
+        # 锚点正则 -> [[追加内容, 顺序], ...]（用列表保存，后续规则可以改写已缓冲的内容）
+        self.anchored = {}
+        self.tail = []
+        self.lines = None
+    
+    def __bool__(self):
+        return bool(self.anchored or self.tail)
+    
+    def entries(self):
+        """所有已缓冲的内容（可原地修改的 [文本] 列表）"""
+        for entries in self.anchored.values():
+            yield from entries
+        yield from self.tail
+    
+    def apply(self, function):
+        """对已缓冲的内容执行替换（与逐条拼接时后续规则也作用于已追加内容一致）"""
+        for entry in self.entries():
+            entry[0] = function(entry[0])
+        self.lines = None
+    
+    def contains(self, content, text):
+        """
+        文件内容（含已缓冲的内容）中是否已有该行（忽略大小写），用于避免重复追加
+        
+        行集合只在内容变化后第一次检查时扫描一次，之后追加的内容直接加入集合
+        """
+        if '\n' in text.strip('\n'):
+            return re.search(re.escape(text), content + ''.join(entry[0] for entry in self.entries()),
+                             re.IGNORECASE) is not None
+        if self.lines is None:
+            self.lines = {line.lower() for line in content.split('\n')}
+            for entry in self.entries():
+                self.lines.update(line.lower() for line in entry[0].split('\n'))
+        return text.strip('\n').lower() in self.lines
+    
+    def add(self, anchor, text, order=()):
+        """缓冲一条追加内容（anchor 为None时追加到文件末尾；order 为逐条拼接时的追加顺序）"""
+        if anchor is None:
+            self.tail.append([text, order])
+        else:
+            self.anchored.setdefault(anchor, []).append([text, order])
+        if self.lines is not None:
+            self.lines.update(line.lower() for line in text.split('\n'))
+    
+    def materialize(self, content):
+        """把缓冲的内容写入文件内容（只拼接一次）"""
+        pieces = []
+        last = 0
+        tail = list(self.tail)
+        inserts = []
+        for anchor, entries in self.anchored.items():
+            match = re.search(anchor, content)
+            if match:
+                inserts.append((match.end(), entries))
+            else:
+                tail.extend(entries)
+        for pos, entries in sorted(inserts, key=lambda insert: insert[0]):
+            pieces.append(content[last:pos])
+            pieces.extend('\n' + entry[0] for entry in sorted(entries, key=lambda entry: entry[1], reverse=True))
+            last = pos
+        pieces.append(content[last:])
+        pieces.extend('\n' + entry[0] for entry in sorted(tail, key=lambda entry: entry[1]))
+        return ''.join(pieces)
+
 def process_text_file(file_path, items, config):
     """处理文本文件"""
-    with open(file_path, 'r+', encoding='utf-8') as f:
-        content = f.read()
-        original_content = content
-        modified = False
-        appended_items = set()
+    content, modified = render_text(pack.read_text(file_path), items, config, file_path.name)
+    
+    # 如果有修改则写回文件
+    if modified:
+        pack.write_text(file_path, content)
+        reporter.record("费用", file_path, "modified", f"✅ 已更新文件: {file_path}")
+    else:
+        reporter.record("费用", file_path, "unchanged",
+                        f"⏩ 未找到需要修改的内容: {file_path}" if reporter.verbose else None)
+
+def render_text(content, items, config, name, out=None):
+    """
+    按规则更新文本内容，返回 (新内容, 是否修改)（不读写文件，消息输出到 out）
+    
+    每条规则只编译一次、只扫描内容一次：匹配到的道具代号按字典分派到对应道具的替换内容；
+    缺少的道具按锚点缓冲，最后按逐个道具处理时的顺序（先道具、后规则）一次性写入
+    """
+    out = out or reporter
+    # 道具代号（小写）-> 道具数据
+    items_by_id = {str(item_data['id']).lower(): item_data for item_data in items.values()}
+    
+    modified = False
+    insertions = InsertionBuffer()
+    # 已找到的道具：某条规则匹配到道具后，其后的规则不再为它追加内容
+    found = set()
+    
+    # 应用所有规则
+    for rule_index, rule in enumerate(config['rules']):
+        if not items_by_id:
+            break
+        regex = compile_rule(rule['pattern'], [str(item_data['id']) for item_data in items_by_id.values()])
         
-        # 处理每个道具
-        for item_key, item_data in items.items():
-            item_id = item_data['id']  # 道具代号
-            item_cost = item_data['cost']  # 费用
-            
-            found = False
-            
-            # 应用所有规则
-            for rule in config['rules']:
-                # 准备正则表达式 - 使用道具代号替换<ID>占位符
-                # 对道具代号进行正则转义（处理特殊字符）
-                escaped_code = re.escape(item_id)
-                pattern = rule['pattern'].replace('<ID>', escaped_code)
-                
-                # 编译正则表达式
-                regex = re.compile(pattern, re.IGNORECASE)
-                
-                # 准备替换内容
-                replacement = rule['replacement'].format(
-                    id=item_id,
-                    cost=item_cost
-                )
-                
-                # 执行替换
-                new_content, count = regex.subn(replacement, content)
-                if count > 0:
-                    print(f"在 {file_path.name} 中更新了 {item_data['id']} ({count} 处)")
+        if 'id' not in regex.groupindex:
+            # 与道具无关的规则只执行一次
+            item_data = next(iter(items_by_id.values()))
+            replacement = rule['replacement'].format(id=item_data['id'], cost=item_data['cost'])
+            new_content, count = regex.subn(replacement, content)
+            if insertions:
+                # 已缓冲的追加内容同样应用规则
+                for entry in insertions.entries():
+                    entry[0], entry_count = regex.subn(replacement, entry[0])
+                    count += entry_count
+                insertions.lines = None
+            if count > 0:
+                if new_content != content:
+                    out.log(f"在 {name} 中更新了 {count} 处")
                     content = new_content
                     modified = True
-                    found = True
+                found.update(items_by_id)
+        else:
+            # 每个道具的替换内容只格式化一次
+            replacements = {}
+            counts = {}
+            changed = set()
+            
+            def dispatch(match):
+                key = match.group('id').lower()
+                if key not in replacements:
+                    item_data = items_by_id[key]
+                    replacements[key] = rule['replacement'].format(id=item_data['id'], cost=item_data['cost'])
+                counts[key] = counts.get(key, 0) + 1
+                text = match.expand(replacements[key])
+                # 替换结果与原内容相同时只记为已找到
+                if text != match.group(0):
+                    changed.add(key)
+                return text
             
-                # 如果没有找到匹配项且配置了追加规则
-                if not found and 'append_template' in rule:
-                    append_content = rule['append_template'].format(
-                        id=item_id,
-                        cost=item_cost
-                    )
-                    
-                    # 检查是否已存在类似内容（避免重复追加）
-                    if not re.search(re.escape(append_content), content, re.IGNORECASE):
-                        # 确定追加位置
-                        if 'append_after' in rule:
-                            append_after_regex = re.compile(rule['append_after'])
-                            match = append_after_regex.search(content)
-                            if match:
-                                pos = match.end()
-                                content = content[:pos] + '\n' + append_content + content[pos:]
-                            else:
-                                content += '\n' + append_content
-                        else:
-                            content += '\n' + append_content
-                        
-                        print(f"在 {file_path.name} 中添加了新道具: {item_data['id']}")
-                        modified = True
-                        appended_items.add(item_id)
+            content = regex.sub(dispatch, content)
+            insertions.apply(lambda text: regex.sub(dispatch, text))
+            for key in items_by_id:
+                if key in changed:
+                    out.log(f"在 {name} 中更新了 {items_by_id[key]['id']} ({counts[key]} 处)")
+            modified = modified or bool(changed)
+            found.update(counts)
         
-        # 如果有修改则写回文件
-        if modified:
-            f.seek(0)
-            f.write(content)
-            f.truncate()
-            print(f"✅ 已更新文件: {file_path}")
-        else:
-            print(f"⏩ 未找到需要修改的内容: {file_path}")
+        # 没有找到匹配项的道具按追加规则追加（确定锚点后缓冲）
+        if 'append_template' not in rule:
+            continue
+        anchor = rule.get('append_after')
+        if anchor is not None and not re.search(anchor, content):
+            anchor = None
+        for position, (key, item_data) in enumerate(items_by_id.items()):
+            if key in found:
+                continue
+            item_id = item_data['id']  # 道具代号
+            append_content = rule['append_template'].format(
+                id=item_id,
+                cost=item_data['cost']
+            )
+            
+            # 检查是否已存在相同的行（避免重复追加）
+            if not insertions.contains(content, append_content):
+                insertions.add(anchor, append_content, (position, rule_index))
+                out.log(f"在 {name} 中添加了新道具: {item_id}")
+                modified = True
+    
+    if modified:
+        content = insertions.materialize(content)
+    return content, modified
 
 def process_json_file(file_path, items, config):
     """处理JSON文件"""
-    with open(file_path, 'r+', encoding='utf-8') as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            print(f"JSON解析错误，创建新结构: {file_path}")
-            data = []
-        
-        # 定位目标列表
-        target_list = data
+    text, modified, new_items_added = render_json(pack.read_text(file_path), items, config, file_path)
+    
+    # 如果有修改则写回文件
+    if modified:
+        pack.write_text(file_path, text)
+        reporter.record("费用", file_path, "modified",
+                        f"✅ 已更新JSON文件: {file_path} (添加了 {new_items_added} 个新道具)",
+                        added=new_items_added)
+    else:
+        reporter.record("费用", file_path, "unchanged",
+                        f"⏩ JSON文件无需修改: {file_path}" if reporter.verbose else None)
+
+def render_json(text, items, config, file_path, out=None):
+    """按配置更新JSON内容，返回 (新内容, 是否修改, 新增道具数)（不读写文件，消息输出到 out）"""
+    out = out or reporter
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        out.error(f"JSON解析错误，创建新结构: {file_path}")
+        data = []
+    
+    # 定位目标列表
+    target_list = data
+    if 'json_path' in config:
+        path_parts = config['json_path'].split('.')
+        for part in path_parts:
+            if part:  # 跳过空部分
+                if part not in target_list:
+                    target_list[part] = []
+                target_list = target_list[part]
+    
+    if not isinstance(target_list, list):
+        out.error(f"目标路径不是列表，创建新列表: {config['json_path']}")
+        target_list = []
         if 'json_path' in config:
-            path_parts = config['json_path'].split('.')
-            for part in path_parts:
-                if part:  # 跳过空部分
-                    if part not in target_list:
-                        target_list[part] = []
-                    target_list = target_list[part]
-        
-        if not isinstance(target_list, list):
-            print(f"目标路径不是列表，创建新列表: {config['json_path']}")
-            target_list = []
-            if 'json_path' in config:
-                # 重建路径
-                current = data
-                parts = config['json_path'].split('.')
-                for part in parts[:-1]:
-                    if part not in current:
-                        current[part] = {}
-                    current = current[part]
-                current[parts[-1]] = target_list
-        
-        modified = False
-        new_items_added = 0
+            # 重建路径
+            current = data
+            parts = config['json_path'].split('.')
+            for part in parts[:-1]:
+                if part not in current:
+                    current[part] = {}
+                current = current[part]
+            current[parts[-1]] = target_list
+    
+    modified = False
+    new_items_added = 0
+    
+    # 处理每个道具
+    for item_key, item_data in items.items():
+        item_name = item_data['name']
+        found = False
         
-        # 处理每个道具
-        for item_key, item_data in items.items():
-            item_name = item_data['name']
-            found = False
-            
-            # 在列表中查找道具
-            for obj in target_list:
-                # 检查匹配条件
-                if config['match_key'] in obj and str(obj[config['match_key']]).lower() == item_key:
-                    # 更新现有道具
-                    for field, template in config['update_fields'].items():
-                        # 处理特殊字段（如NBT路径）
-                        if field.startswith('nbt:'):
-                            nbt_path = field[4:]
-                            current = obj
-                            parts = nbt_path.split('.')
-                            for part in parts[:-1]:
-                                if part not in current:
-                                    current[part] = {}
-                                current = current[part]
-                            current[parts[-1]] = template.format(**item_data)
-                        else:
-                            # 更新普通字段
-                            obj[field] = template.format(**item_data)
-                    
-                    print(f"在 {file_path.name} 中更新了 {item_name}")
-                    modified = True
-                    found = True
-                    break
-            
-            # 如果没找到且需要添加新道具
-            if not found and config.get('add_new_items', True):
-                # 创建新道具对象
-                new_obj = {}
-                
-                # 添加匹配键
-                new_obj[config['match_key']] = item_name
-                
-                # 添加其他字段
+        # 在列表中查找道具
+        for obj in target_list:
+            # 检查匹配条件
+            if config['match_key'] in obj and str(obj[config['match_key']]).lower() == item_key:
+                # 更新现有道具（内容未变化时不算修改）
+                before = copy.deepcopy(obj)
                 for field, template in config['update_fields'].items():
-                    # 处理特殊字段
+                    # 处理特殊字段（如NBT路径）
                     if field.startswith('nbt:'):
                         nbt_path = field[4:]
-                        current = new_obj
+                        current = obj
                         parts = nbt_path.split('.')
                         for part in parts[:-1]:
                             if part not in current:
@@ -233,23 +344,48 @@ def process_json_file(file_path, items, config):
                             current = current[part]
                         current[parts[-1]] = template.format(**item_data)
                     else:
-                        # 添加普通字段
-                        new_obj[field] = template.format(**item_data)
+                        # 更新普通字段
+                        obj[field] = template.format(**item_data)
                 
-                # 添加到列表
-                target_list.append(new_obj)
-                print(f"在 {file_path.name} 中添加了新道具: {item_name}")
-                modified = True
-                new_items_added += 1
+                if obj != before:
+                    out.log(f"在 {file_path.name} 中更新了 {item_name}")
+                    modified = True
+                found = True
+                break
         
-        # 如果有修改则写回文件
-        if modified:
-            f.seek(0)
-            json.dump(data, f, indent=2, ensure_ascii=False)
-            f.truncate()
-            print(f"✅ 已更新JSON文件: {file_path} (添加了 {new_items_added} 个新道具)")
-        else:
-            print(f"⏩ JSON文件无需修改: {file_path}")
+        # 如果没找到且需要添加新道具
+        if not found and config.get('add_new_items', True):
+            # 创建新道具对象
+            new_obj = {}
+            
+            # 添加匹配键
+            new_obj[config['match_key']] = item_name
+            
+            # 添加其他字段
+            for field, template in config['update_fields'].items():
+                # 处理特殊字段
+                if field.startswith('nbt:'):
+                    nbt_path = field[4:]
+                    current = new_obj
+                    parts = nbt_path.split('.')
+                    for part in parts[:-1]:
+                        if part not in current:
+                            current[part] = {}
+                        current = current[part]
+                    current[parts[-1]] = template.format(**item_data)
+                else:
+                    # 添加普通字段
+                    new_obj[field] = template.format(**item_data)
+            
+            # 添加到列表
+            target_list.append(new_obj)
+            out.log(f"在 {file_path.name} 中添加了新道具: {item_name}")
+            modified = True
+            new_items_added += 1
+    
+    if modified:
+        text = json.dumps(data, indent=2, ensure_ascii=False)
+    return text, modified, new_items_added
 
 def process_cost_group_files(items, config):
     """
@@ -267,7 +403,7 @@ def process_cost_group_files(items, config):
     min_cost = config.get('min_cost', 1)
     max_cost = config.get('max_cost', 10)
     
-    print(f"\n处理费用分组文件: {file_template} (费用范围: {min_cost}-{max_cost})")
+    reporter.summary(f"\n处理费用分组文件: {file_template} (费用范围: {min_cost}-{max_cost})")
     
     # 按费用分组道具
     cost_groups = {}
@@ -279,9 +415,10 @@ def process_cost_group_files(items, config):
                     cost_groups[cost] = []
                 cost_groups[cost].append(item_code)
         except (KeyError, ValueError, TypeError):
-            print(f"⚠️ 道具 {item_code} 的费用无效: {item_data.get('cost')}")
+            reporter.error(f"⚠️ 道具 {item_code} 的费用无效: {item_data.get('cost')}")
     
-    print(f"道具按费用分组: {cost_groups}")
+    if reporter.verbose:
+        reporter.log(f"道具按费用分组: {cost_groups}", Reporter.VERBOSE)
     
     # 处理每个费用文件
     for cost in range(min_cost, max_cost + 1):
@@ -289,16 +426,16 @@ def process_cost_group_files(items, config):
         path = Path(file_path)
         
         # 跳过不存在的文件
-        if not path.exists():
-            print(f"⏩ 文件不存在: {path} (跳过)")
+        if not pack.exists(path):
+            if reporter.verbose:
+                reporter.log(f"⏩ 文件不存在: {path} (跳过)", Reporter.VERBOSE)
             continue
         
         # 读取文件内容
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = json.loads(pack.read_text(path))
         except Exception as e:
-            print(f"读取文件失败: {path} - {e}")
+            reporter.error(f"读取文件失败: {path} - {e}")
             continue
         
         # 更新 values 数组
@@ -306,19 +443,24 @@ def process_cost_group_files(items, config):
             # 获取当前费用的道具列表
             current_items = cost_groups.get(cost, [])
             
+            # 道具列表未变化时不重写文件
+            if data["values"] == current_items:
+                reporter.record("费用分组", path, "unchanged",
+                                f"⏩ 文件无需修改: {path}" if reporter.verbose else None)
+                continue
+            
             # 保留原始格式（字符串数组）
             data["values"] = current_items
-            print(f"更新文件 {path.name}: 设置 {len(current_items)} 个道具")
+            reporter.log(f"更新文件 {path.name}: 设置 {len(current_items)} 个道具")
             
             # 写回文件
             try:
-                with open(path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                print(f"✅ 已更新: {path}")
+                pack.write_text(path, json.dumps(data, indent=2, ensure_ascii=False))
+                reporter.record("费用分组", path, "modified", f"✅ 已更新: {path}", items=len(current_items))
             except Exception as e:
-                print(f"写入文件失败: {path} - {e}")
+                reporter.record("费用分组", path, "error", f"写入文件失败: {path} - {e}")
         else:
-            print(f"⚠️ 文件 {path} 缺少 'values' 键")
+            reporter.error(f"⚠️ 文件 {path} 缺少 'values' 键")
 
 def process_item_loot_table(items, config):
     """
@@ -333,9 +475,6 @@ def process_item_loot_table(items, config):
     directory = Path(config['directory'])
     template = config['template']
     
-    # 确保目录存在
-    directory.mkdir(parents=True, exist_ok=True)
-    
     created_count = 0
     skipped_count = 0
     
@@ -344,18 +483,18 @@ def process_item_loot_table(items, config):
         file_path = directory / f"{item_code}.json"
         
         # 如果文件已存在，则跳过（根据需求，只创建不更新）
-        if file_path.exists():
+        if pack.exists(file_path):
             # 可选：验证文件内容是否正确
             if config.get('verify_content', False):
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        existing_data = json.load(f)
+                    existing_data = json.loads(pack.read_text(file_path))
                     # 检查道具ID是否正确
                     if existing_data['pools'][0]['entries'][0]['name'] != item_code:
-                        print(f"⚠️ 文件 {file_path.name} 中的道具ID不匹配，但跳过更新")
+                        reporter.error(f"⚠️ 文件 {file_path.name} 中的道具ID不匹配，但跳过更新")
                 except Exception as e:
-                    print(f"⚠️ 验证文件 {file_path.name} 失败: {e}")
+                    reporter.error(f"⚠️ 验证文件 {file_path.name} 失败: {e}")
             skipped_count += 1
+            reporter.count("战利品表", "unchanged")
             continue
         
         # 创建新的战利品表文件
@@ -367,240 +506,291 @@ def process_item_loot_table(items, config):
             loot_table['pools'][0]['entries'][0]['name'] = item_code
             
             # 写入文件
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(loot_table, f, indent=2, ensure_ascii=False)
+            pack.write_text(file_path, json.dumps(loot_table, indent=2, ensure_ascii=False))
             
-            print(f"✅ 创建战利品表文件: {file_path.name}")
+            reporter.record("战利品表", file_path, "created", f"✅ 创建战利品表文件: {file_path.name}")
             created_count += 1
         except Exception as e:
-            print(f"创建文件 {file_path.name} 失败: {e}")
+            reporter.record("战利品表", file_path, "error", f"创建文件 {file_path.name} 失败: {e}")
+    
+    reporter.summary(f"战利品表处理完成: 创建了 {created_count} 个新文件, 跳过了 {skipped_count} 个已存在文件")
+
+def process_per_item_files(items, per_item_configs):
+    """
+    批量生成每个道具的专属文件
+    
+    参数:
+    items -- 道具字典 {道具代号: 道具数据}（只加载一次，所有模板共用）
+    per_item_configs -- {文件路径模板 (如 ".../{name}.json"): 文件配置}
+    
+    每个 (模板, 道具) 按该道具的数据在内存中渲染，只写回渲染结果与现有内容不同的文件
+    """
+    rendered = 0
+    written = 0
+    for template_path, file_config in per_item_configs.items():
+        for item_key, item_data in items.items():
+            # 读取现有内容（不存在且允许创建时从空内容开始渲染）
+            file_path = Path(template_path.format(name=item_data['name']))
+            if pack.exists(file_path):
+                original = pack.read_text(file_path)
+            elif file_config.get('create_if_missing', False):
+                original = None
+            else:
+                reporter.record("专属文件", file_path, "error", f"文件不存在且未配置自动创建: {file_path}")
+                continue
+            
+            # 在内存中渲染，只写回有变化的文件
+            rendered += 1
+            try:
+                if file_config['type'] == 'text':
+                    text, _ = render_text(original or '', {item_key: item_data}, file_config, file_path.name)
+                else:
+                    text = original if original is not None else json.dumps([], indent=2)
+                    text, _, _ = render_json(text, {item_key: item_data}, file_config, file_path)
+            except Exception as e:
+                reporter.record("专属文件", file_path, "error", f"处理文件 {file_path} 时出错: {e}")
+                continue
+            if text == original:
+                reporter.record("专属文件", file_path, "unchanged",
+                                f"⏩ 专属文件无需修改: {file_path}" if reporter.verbose else None)
+                continue
+            pack.write_text(file_path, text)
+            written += 1
+            reporter.record("专属文件", file_path, "created" if original is None else "modified",
+                            f"✅ {'创建' if original is None else '更新'}专属文件: {file_path}")
     
-    print(f"战利品表处理完成: 创建了 {created_count} 个新文件, 跳过了 {skipped_count} 个已存在文件")
+    reporter.summary(f"专属文件处理完成: 渲染了 {rendered} 个文件, 写回了 {written} 个")
 
 def backup_file(file_path):
     """创建文件备份"""
-    backup_path = file_path.with_suffix(file_path.suffix + '.bak')
-    shutil.copyfile(file_path, backup_path)
-    print(f"创建备份: {backup_path}")
-
-if __name__ == "__main__":
-    # =============== 配置区域 ===============
-    # Excel文件路径（包含道具名称和费用）
-    EXCEL_PATH = "../../doc/道具信息.xlsx"
-
-    #列名映射
-    COLUMN_MAPPING = {
-    '道具名称': 'name',
-    '物品代号': 'id',
-    '费用': 'cost'
-    }
-    
-    # 文件处理配置
-    CONFIG = {
-        # 扣费
-        "data/missile_royale/function/game/cost/remove.mcfunction": {
-            "type": "text",
-            "rules": [
-                {
-                    "pattern": r'xp add @a\[team=!,scores=\{use\.<ID>=1\.\.\}\] -\d+ levels',
-                    "replacement": 'xp add @a[team=!,scores={{use.{id}=1..}}] -{cost} levels',
-                    "append_template": '\nxp add @a[team=!,scores={{use.{id}=1..}}] -{cost} levels',
-                    "append_after": r'#扣费'
-                },
-                {
-                    "pattern": r'execute as @a\[team=!,scores=\{use\.<ID>=1\.\.\}\] run function missile_royale:game/deal/deal',
-                    "replacement": 'execute as @a[team=!,scores={{use.{id}=1..}}] run function missile_royale:game/deal/deal',
-                    "append_template": '\nexecute as @a[team=!,scores={{use.{id}=1..}}] run function missile_royale:game/deal/deal',
-                    "append_after": r'#发牌'
-                },
-                {
-                    "pattern": r'scoreboard players reset @a\[team=!\] use\.<ID>',
-                    "replacement": 'scoreboard players reset @a[team=!] use.{id}',
-                    "append_template": '\nscoreboard players reset @a[team=!] use.{id}',
-                    "append_after": r'#重置道具使用变量'
-                }
-            ],
-            "create_if_missing": True
-        },
-        
-        # 初始化计分板
-        "data/missile_royale/function/initiate/initiation.mcfunction": {
-            "type": "text",
-            "rules": [
-                {
-                    "pattern": r'scoreboard objectives add use\.<ID> minecraft\.used:minecraft\.<ID>',
-                    "replacement": 'scoreboard objectives add use.{id} minecraft.used:minecraft.{id}',
-                    "append_template": '\nscoreboard objectives add use.{id} minecraft.used:minecraft.{id}',
-                    "append_after": r'#设置道具使用变量'
-                }
-            ]
-        },
-
-        # 清除卡牌存储
-        "data/missile_royale/function/game/choose/remove_saves.mcfunction": {
-            "type": "text",
-            "rules": [
-                {
-                    "pattern": r'tag @s remove <ID>',
-                    "replacement": 'tag @s remove {id}',
-                    "append_template": 'tag @s remove {id}\n'
-                }
-            ]
-        },
+    backup_path = pack.backup(file_path)
+    if backup_path:
+        reporter.log(f"创建备份: {backup_path}", Reporter.VERBOSE)
 
-        # 保存新卡组
-        "data/missile_royale/function/game/choose/save_cards.mcfunction": {
-            "type": "text",
-            "rules": [
-                {
-                    "pattern": r'execute if items entity @s hotbar\.\* minecraft:<ID> run tag @s add <ID>',
-                    "replacement": 'execute if items entity @s hotbar.* minecraft:{id} run tag @s add {id}',
-                    "append_template": '\nexecute if items entity @s hotbar.* minecraft:{id} run tag @s add {id}',
-                    "append_after": r'#保存玩家卡组'
-                }
-            ]
-        },
+# =============== 配置区域 ===============
+# Excel文件路径（包含道具名称和费用）
+EXCEL_PATH = "../../doc/道具信息.xlsx"
 
-        # 载入玩家保存的卡组
-        "data/missile_royale/function/game/choose/previous_cards.mcfunction": {
-            "type": "text",
-            "rules": [
-                {
-                    "pattern": r'give @s\[tag=<ID>\] <ID>',
-                    "replacement": 'give @s[tag={id}] {id}',
-                    "append_template": '\ngive @s[tag={id}] {id}',
-                    "append_after": r'#每位玩家保留上一局游戏所用卡组'
-                }
-            ]
-        },
+#列名映射
+COLUMN_MAPPING = {
+'道具名称': 'name',
+'物品代号': 'id',
+'费用': 'cost'
+}
 
-        # 开场清除道具使用记录
-        "data/missile_royale/function/game/tp.mcfunction": {
-            "type": "text",
-            "rules": [
+# 文件处理配置
+CONFIG = {
+    # 扣费
+    "data/missile_royale/function/game/cost/remove.mcfunction": {
+        "type": "text",
+        "rules": [
+            {
+                "pattern": r'xp add @a\[team=!,scores=\{use\.<ID>=1\.\.\}\] -\d+ levels',
+                "replacement": 'xp add @a[team=!,scores={{use.{id}=1..}}] -{cost} levels',
+                "append_template": '\nxp add @a[team=!,scores={{use.{id}=1..}}] -{cost} levels',
+                "append_after": r'#扣费'
+            },
+            {
+                "pattern": r'execute as @a\[team=!,scores=\{use\.<ID>=1\.\.\}\] run function missile_royale:game/deal/deal',
+                "replacement": 'execute as @a[team=!,scores={{use.{id}=1..}}] run function missile_royale:game/deal/deal',
+                "append_template": '\nexecute as @a[team=!,scores={{use.{id}=1..}}] run function missile_royale:game/deal/deal',
+                "append_after": r'#发牌'
+            },
+            {
+                "pattern": r'scoreboard players reset @a\[team=!\] use\.<ID>',
+                "replacement": 'scoreboard players reset @a[team=!] use.{id}',
+                "append_template": '\nscoreboard players reset @a[team=!] use.{id}',
+                "append_after": r'#重置道具使用变量'
+            }
+        ],
+        "create_if_missing": True
+    },
+    
+    # 初始化计分板
+    "data/missile_royale/function/initiate/initiation.mcfunction": {
+        "type": "text",
+        "rules": [
+            {
+                "pattern": r'scoreboard objectives add use\.<ID> minecraft\.used:minecraft\.<ID>',
+                "replacement": 'scoreboard objectives add use.{id} minecraft.used:minecraft.{id}',
+                "append_template": '\nscoreboard objectives add use.{id} minecraft.used:minecraft.{id}',
+                "append_after": r'#设置道具使用变量'
+            }
+        ]
+    },
+    
+    # 清除卡牌存储
+    "data/missile_royale/function/game/choose/remove_saves.mcfunction": {
+        "type": "text",
+        "rules": [
+            {
+                "pattern": r'tag @s remove <ID>',
+                "replacement": 'tag @s remove {id}',
+                "append_template": 'tag @s remove {id}\n'
+            }
+        ]
+    },
+    
+    # 保存新卡组
+    "data/missile_royale/function/game/choose/save_cards.mcfunction": {
+        "type": "text",
+        "rules": [
+            {
+                "pattern": r'execute if items entity @s hotbar\.\* minecraft:<ID> run tag @s add <ID>',
+                "replacement": 'execute if items entity @s hotbar.* minecraft:{id} run tag @s add {id}',
+                "append_template": '\nexecute if items entity @s hotbar.* minecraft:{id} run tag @s add {id}',
+                "append_after": r'#保存玩家卡组'
+            }
+        ]
+    },
+    
+    # 载入玩家保存的卡组
+    "data/missile_royale/function/game/choose/previous_cards.mcfunction": {
+        "type": "text",
+        "rules": [
+            {
+                "pattern": r'give @s\[tag=<ID>\] <ID>',
+                "replacement": 'give @s[tag={id}] {id}',
+                "append_template": '\ngive @s[tag={id}] {id}',
+                "append_after": r'#每位玩家保留上一局游戏所用卡组'
+            }
+        ]
+    },
+    
+    # 开场清除道具使用记录
+    "data/missile_royale/function/game/tp.mcfunction": {
+        "type": "text",
+        "rules": [
+            {
+                "pattern": r'scoreboard players reset @a\[team=!\] use\.<ID>',
+                "replacement": 'scoreboard players reset @a[team=!] use.{id}',
+                "append_template": '\nscoreboard players reset @a[team=!] use.{id}',
+                "append_after": r'#清空道具使用记录'
+            }
+        ]
+    },
+    
+    #发牌
+    "data/missile_royale/function/game/deal/deal.mcfunction": {
+        "type": "text",
+        "rules": [
+            {
+                "pattern": r'loot give @s\[team=!,tag=<ID>\].*',
+                "replacement": 'loot give @s[team=!,tag={id}] loot {{pools:[{{rolls:1,entries:[{{type:"minecraft:loot_table",value:"missile_wars:items/{id}",functions:[{{function:"reference",name:"missile_royale:cost_display"}}]}}]}}]}}',
+                "append_template": '\nloot give @s[team=!,tag={id}] loot {{pools:[{{rolls:1,entries:[{{type:"minecraft:loot_table",value:"missile_wars:items/{id}",functions:[{{function:"reference",name:"missile_royale:cost_display"}}]}}]}}]}}',
+                "append_after": r'#分发新卡'
+            },
+            {
+                "pattern": r'value:"missile_wars:items/trident",functions:\[(.*?)\]',
+                "replacement": 'value:"missile_wars:items/trident"'
+            }
+        ]
+    },
+    
+    # Xcost.json 文件组配置
+    "cost_group_files": {
+        "type": "cost_group",
+        "file_template": "data/missile_royale/tags/item/cost/{cost}cost.json",
+        "min_cost": 1,
+        "max_cost": 10
+    },
+    
+    # 道具专属战利品表配置
+    "item_loot_table": {
+        "type": "item_loot_table",
+        "directory": "data/missile_wars/loot_table/items",
+        "template": {
+            "pools": [
                 {
-                    "pattern": r'scoreboard players reset @a\[team=!\] use\.<ID>',
-                    "replacement": 'scoreboard players reset @a[team=!] use.{id}',
-                    "append_template": '\nscoreboard players reset @a[team=!] use.{id}',
-                    "append_after": r'#清空道具使用记录'
+                    "entries": [
+                        {
+                            "type": "item",
+                            "name": "PLACEHOLDER",  # 占位符，将在处理时替换
+                        }
+                    ],
+                    "rolls": 1
                 }
-            ]
-        },
-
-        #发牌
-        "data/missile_royale/function/game/deal/deal.mcfunction": {
-            "type": "text",
-            "rules": [
+            ],
+            "functions": [
                 {
-                    "pattern": r'loot give @s\[team=!,tag=<ID>\].*',
-                    "replacement": 'loot give @s[team=!,tag={id}] loot {{pools:[{{rolls:1,entries:[{{type:"minecraft:loot_table",value:"missile_wars:items/{id}",functions:[{{function:"reference",name:"missile_royale:cost_display"}}]}}]}}]}}',
-                    "append_template": '\nloot give @s[team=!,tag={id}] loot {{pools:[{{rolls:1,entries:[{{type:"minecraft:loot_table",value:"missile_wars:items/{id}",functions:[{{function:"reference",name:"missile_royale:cost_display"}}]}}]}}]}}',
-                    "append_after": r'#分发新卡'
+                    "function": "minecraft:reference",
+                    "name": "missile_wars:item/green_items",
+                    "conditions": [
+                        {
+                            "condition": "entity_properties",
+                            "entity": "this",
+                            "predicate": {
+                                "team": "green"
+                            }
+                        }
+                    ]
                 },
                 {
-                    "pattern": r'value:"missile_wars:items/trident",functions:\[(.*?)\]',
-                    "replacement": 'value:"missile_wars:items/trident"'
+                    "function": "minecraft:reference",
+                    "name": "missile_wars:item/orange_items",
+                    "conditions": [
+                        {
+                            "condition": "entity_properties",
+                            "entity": "this",
+                            "predicate": {
+                                "team": "orange"
+                            }
+                        }
+                    ]
                 }
             ]
         },
+        # 可选：验证已存在文件的内容
+        "verify_content": True
+    },
 
-        # Xcost.json 文件组配置
-        "cost_group_files": {
-            "type": "cost_group",
-            "file_template": "data/missile_royale/tags/item/cost/{cost}cost.json",
-            "min_cost": 1,
-            "max_cost": 10
-        },
+}
 
-        # 道具专属战利品表配置
-        "item_loot_table": {
-            "type": "item_loot_table",
-            "directory": "data/missile_wars/loot_table/items",
-            "template": {
-                "pools": [
-                    {
-                        "entries": [
-                            {
-                                "type": "item",
-                                "name": "PLACEHOLDER",  # 占位符，将在处理时替换
-                            }
-                        ],
-                        "rolls": 1
-                    }
-                ],
-                "functions": [
-                    {
-                        "function": "minecraft:reference",
-                        "name": "missile_wars:item/green_items",
-                        "conditions": [
-                            {
-                                "condition": "entity_properties",
-                                "entity": "this",
-                                "predicate": {
-                                    "team": "green"
-                                }
-                            }
-                        ]
-                    },
-                    {
-                        "function": "minecraft:reference",
-                        "name": "missile_wars:item/orange_items",
-                        "conditions": [
-                            {
-                                "condition": "entity_properties",
-                                "entity": "this",
-                                "predicate": {
-                                    "team": "orange"
-                                }
-                            }
-                        ]
-                    }
-                ]
-            },
-            # 可选：验证已存在文件的内容
-            "verify_content": True
-        },
+# 创建备份（可选）
+CREATE_BACKUPS = True
 
-    }
-    
-    # 创建备份（可选）
-    CREATE_BACKUPS = True
+def update_costs(excel_path=EXCEL_PATH, config=CONFIG, column_mapping=COLUMN_MAPPING, create_backups=CREATE_BACKUPS):
+    """执行全部费用更新（备份、主要更新和每个道具的专属文件）"""
+    config = dict(config)
     
-    # =============== 执行更新 ===============
     # 备份文件
-    if CREATE_BACKUPS:
-        for file_path in CONFIG:
-            if not CONFIG[file_path].get('is_per_item_file', False):
+    if create_backups:
+        for file_path in config:
+            if not config[file_path].get('is_per_item_file', False):
                 path = Path(file_path)
-                if path.exists():
+                if pack.exists(path):
                     backup_file(path)
     
     # 处理专属JSON文件（需要特殊处理）
     per_item_configs = {}
-    for file_path, file_config in list(CONFIG.items()):
+    for file_path, file_config in list(config.items()):
         if file_config.get('is_per_item_file', False):
             per_item_configs[file_path] = file_config
-            del CONFIG[file_path]  # 从主配置中移除
+            del config[file_path]  # 从主配置中移除
     
     # 执行主要更新
-    update_datapack(EXCEL_PATH, CONFIG, column_mapping=COLUMN_MAPPING)
+    update_datapack(excel_path, config, column_mapping=column_mapping)
     
-    # 处理每个道具的专属文件
+    # 批量生成每个道具的专属文件（道具信息只读取一次）
     if per_item_configs:
-        # 读取Excel数据
-        df = pd.read_excel(EXCEL_PATH)
-        items = {str(row['name']).lower(): row.to_dict() for _, row in df.iterrows()}
-        
-        for template_path, file_config in per_item_configs.items():
-            for item_key, item_data in items.items():
-                item_name = item_data['name']
-                # 动态生成文件路径
-                actual_path = template_path.format(name=item_name)
-                # 创建单文件配置
-                item_config = {actual_path: dict(file_config)}
-                # 更新专属文件
-                update_datapack(EXCEL_PATH, item_config)
-    
-    print("=" * 50)
-    print("数据包更新完成！")
-    print("=" * 50)
\ No newline at end of file
+        try:
+            items = load_items(excel_path, column_mapping)
+        except Exception as e:
+            reporter.error(f"读取Excel失败: {e}")
+            return
+        process_per_item_files(items, per_item_configs)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='根据道具信息更新费用相关数据')
+    add_reporter_arguments(parser)
+    args = parser.parse_args()
+    reporter = reporter_from_args(args)
+    
+    update_costs()
+    
+    reporter.summary("=" * 50)
+    reporter.summary("数据包更新完成！")
+    reporter.summary("=" * 50)
+    reporter.flush()
+    if args.report_json:
+        reporter.write_json(args.report_json)
\ No newline at end of file
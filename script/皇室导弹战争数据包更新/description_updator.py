@@ -1,39 +1,41 @@
-import pandas as pd
 import json
 import re
 import os
 import copy
 from pathlib import Path
 from functools import reduce
+import argparse
+from reporter import Reporter, add_reporter_arguments, reporter_from_args
+from item_catalog import load_catalog
+from pack_files import PackFiles
 
 class DataPackUpdater:
-    def __init__(self, excel_path, config):
+    def __init__(self, excel_path, config, reporter=None, files=None):
         self.excel_path = excel_path
         self.config = config
         self.items = []
+        self.reporter = reporter or Reporter()
+        # 数据包文件读写（UpdateSession 中为内存覆盖层）
+        self.files = files or PackFiles()
     
     def load_excel(self):
         """加载Excel数据，所有值作为字符串处理"""
         try:
-            # 读取Excel，不转换数据类型
-            df = pd.read_excel(self.excel_path, dtype=str, keep_default_na=False)
-            print(f"✅ 成功读取Excel文件: {self.excel_path}")
-            
-            # 替换可能的NaN值为空字符串
-            df = df.fillna('')
-            
-            # 转换为道具字典列表，所有值保持字符串格式
-            self.items = df.to_dict('records')
-            print(f"共读取 {len(self.items)} 个道具信息")
+            # 读取Excel（使用道具目录缓存），所有值保持字符串格式，空单元格为空字符串
+            self.items = load_catalog(self.excel_path).string_records()
+            self.reporter.summary(f"✅ 成功读取Excel文件: {self.excel_path}")
+            self.reporter.summary(f"共读取 {len(self.items)} 个道具信息")
             
             # 打印前5个道具作为示例
-            print("\n前5个道具示例:")
-            for i, item in enumerate(self.items[:5], 1):
-                print(f"  道具{i}: {item}")
+            if self.reporter.verbose:
+                self.reporter.log("\n前5个道具示例:", Reporter.VERBOSE)
+                for i, item in enumerate(self.items[:5], 1):
+                    self.reporter.log(f"  道具{i}: {item}", Reporter.VERBOSE)
             
             return True
         except Exception as e:
-            print(f"❌ 读取Excel失败: {e}")
+            self.reporter.error(f"❌ 读取Excel失败: {e}")
+            self.reporter.flush()
             import traceback
             traceback.print_exc()
             return False
@@ -43,9 +45,9 @@ class DataPackUpdater:
         if not self.load_excel():
             return False
         
-        print("\n" + "=" * 50)
-        print("开始更新数据包")
-        print("=" * 50)
+        self.reporter.summary("\n" + "=" * 50)
+        self.reporter.summary("开始更新数据包")
+        self.reporter.summary("=" * 50)
         
         success = True
         for file_config in self.config:
@@ -54,33 +56,34 @@ class DataPackUpdater:
                 if not result:
                     success = False
             except Exception as e:
-                print(f"❌ 处理文件配置时出错: {e}")
+                self.reporter.error(f"❌ 处理文件配置时出错: {e}")
+                self.reporter.flush()
                 import traceback
                 traceback.print_exc()
                 success = False
         
-        print("\n" + "=" * 50)
+        self.reporter.summary("\n" + "=" * 50)
         if success:
-            print("✅ 数据包更新完成！")
+            self.reporter.summary("✅ 数据包更新完成！")
         else:
-            print("⚠️ 数据包更新过程中出现错误")
-        print("=" * 50)
+            self.reporter.error("⚠️ 数据包更新过程中出现错误")
+        self.reporter.summary("=" * 50)
+        self.reporter.flush()
         
         return success
     
     def process_file(self, config):
         """处理单个文件配置"""
         file_path = Path(config['file_path'])
-        print(f"\n处理文件: {file_path}")
+        self.reporter.section(f"\n处理文件: {file_path}")
         
         # 检查文件是否存在
-        if not file_path.exists():
+        if not self.files.exists(file_path):
             if config.get('create_if_missing', False):
-                print(f"创建新文件: {file_path}")
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.touch()
+                self.reporter.log(f"创建新文件: {file_path}")
+                self.files.write_text(file_path, '')
             else:
-                print(f"❌ 文件不存在: {file_path}")
+                self.reporter.error(f"❌ 文件不存在: {file_path}")
                 return False
         
         # 根据文件类型处理
@@ -90,17 +93,16 @@ class DataPackUpdater:
         elif file_type == 'json':
             return self.process_json_file(file_path, config)
         else:
-            print(f"❌ 未知文件类型: {file_type}")
+            self.reporter.error(f"❌ 未知文件类型: {file_type}")
             return False
     
     def process_text_file(self, file_path, config):
         """处理文本文件"""
         # 读取文件内容
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = self.files.read_text(file_path)
         except Exception as e:
-            print(f"❌ 读取文件失败: {e}")
+            self.reporter.error(f"❌ 读取文件失败: {e}")
             return False
         
         modified = False
@@ -113,11 +115,11 @@ class DataPackUpdater:
             filtered_items = self.filter_items(condition)
             
             if not filtered_items:
-                print(f"  ⏩ 没有符合条件的道具，跳过规则: {rule.get('description', '')}")
+                self.reporter.log(f"  ⏩ 没有符合条件的道具，跳过规则: {rule.get('description', '')}", Reporter.VERBOSE)
                 continue
             
-            print(f"  应用规则: {rule.get('description', '')}")
-            print(f"  符合条件道具数: {len(filtered_items)}")
+            self.reporter.log(f"  应用规则: {rule.get('description', '')}", Reporter.VERBOSE)
+            self.reporter.log(f"  符合条件道具数: {len(filtered_items)}", Reporter.VERBOSE)
             
             # 处理每个符合条件的道具
             for item in filtered_items:
@@ -128,9 +130,12 @@ class DataPackUpdater:
                 # 尝试替换
                 regex = re.compile(re.escape(search_pattern))
                 if regex.search(new_content):
-                    new_content = regex.sub(replace_template, new_content)
-                    print(f"    ✅ 更新道具: {item.get('名称', '?')}")
-                    modified = True
+                    # 替换结果与原内容相同时不算修改
+                    updated_content = regex.sub(replace_template, new_content)
+                    if updated_content != new_content:
+                        new_content = updated_content
+                        self.reporter.log(f"    ✅ 更新道具: {item.get('名称', '?')}")
+                        modified = True
                 else:
                     # 未找到，需要插入
                     insert_location = rule.get('insert_location', 'end')
@@ -144,7 +149,7 @@ class DataPackUpdater:
                             lambda m: m.group(0) + '\n' + replace_template, 
                             new_content
                         )
-                        print(f"    ➕ 在 '{insert_after}' 后新增道具: {item.get('名称', '?')}")
+                        self.reporter.log(f"    ➕ 在 '{insert_after}' 后新增道具: {item.get('名称', '?')}")
                         modified = True
                     elif insert_before:
                         # 在指定内容前插入
@@ -153,41 +158,40 @@ class DataPackUpdater:
                             lambda m: replace_template + '\n' + m.group(0), 
                             new_content
                         )
-                        print(f"    ➕ 在 '{insert_before}' 前新增道具: {item.get('名称', '?')}")
+                        self.reporter.log(f"    ➕ 在 '{insert_before}' 前新增道具: {item.get('名称', '?')}")
                         modified = True
                     elif insert_location == 'start':
                         # 在文件开头插入
                         new_content = replace_template + '\n' + new_content
-                        print(f"    ➕ 在文件开头新增道具: {item.get('名称', '?')}")
+                        self.reporter.log(f"    ➕ 在文件开头新增道具: {item.get('名称', '?')}")
                         modified = True
                     else:
                         # 默认在文件末尾插入
                         new_content += '\n' + replace_template
-                        print(f"    ➕ 在文件末尾新增道具: {item.get('名称', '?')}")
+                        self.reporter.log(f"    ➕ 在文件末尾新增道具: {item.get('名称', '?')}")
                         modified = True
         
         # 如果有修改则写回文件
         if modified:
             try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
-                print(f"✅ 文件已更新: {file_path}")
+                self.files.write_text(file_path, new_content)
+                self.reporter.record("描述", file_path, "modified", f"✅ 文件已更新: {file_path}")
                 return True
             except Exception as e:
-                print(f"❌ 写入文件失败: {e}")
+                self.reporter.record("描述", file_path, "error", f"❌ 写入文件失败: {e}")
                 return False
         else:
-            print(f"⏩ 未找到需要修改的内容: {file_path}")
+            self.reporter.record("描述", file_path, "unchanged",
+                                 f"⏩ 未找到需要修改的内容: {file_path}" if self.reporter.verbose else None)
             return True
     
     def process_json_file(self, file_path, config):
         """处理JSON文件（通用路径匹配）"""
         # 读取文件内容
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = json.loads(self.files.read_text(file_path))
         except Exception as e:
-            print(f"❌ JSON解析错误: {e}")
+            self.reporter.error(f"❌ JSON解析错误: {e}")
             return False
         
         modified = False
@@ -199,11 +203,11 @@ class DataPackUpdater:
             filtered_items = self.filter_items(condition)
             
             if not filtered_items:
-                print(f"  ⏩ 没有符合条件的道具，跳过规则: {rule.get('description', '')}")
+                self.reporter.log(f"  ⏩ 没有符合条件的道具，跳过规则: {rule.get('description', '')}", Reporter.VERBOSE)
                 continue
             
-            print(f"  应用规则: {rule.get('description', '')}")
-            print(f"  符合条件道具数: {len(filtered_items)}")
+            self.reporter.log(f"  应用规则: {rule.get('description', '')}", Reporter.VERBOSE)
+            self.reporter.log(f"  符合条件道具数: {len(filtered_items)}", Reporter.VERBOSE)
             
             # 新增：处理嵌套数组索引路径 (如 "pages.0")
             array_index = rule.get('array_index')
@@ -213,7 +217,7 @@ class DataPackUpdater:
                 parent_array = self.get_by_path(data, parent_path)
                 
                 if not isinstance(parent_array, list):
-                    print(f"  ❌ 父路径不是数组: {parent_path}")
+                    self.reporter.error(f"  ❌ 父路径不是数组: {parent_path}")
                     continue
                 
                 try:
@@ -221,16 +225,16 @@ class DataPackUpdater:
                     if 0 <= index < len(parent_array):
                         target_array = parent_array[index]
                     else:
-                        print(f"  ❌ 索引超出范围: {array_index}")
+                        self.reporter.error(f"  ❌ 索引超出范围: {array_index}")
                         continue
                 except ValueError:
-                    print(f"  ❌ 无效的索引格式: {array_index}")
+                    self.reporter.error(f"  ❌ 无效的索引格式: {array_index}")
                     continue
             
             # 处理嵌套数组的特殊情况
             if rule.get('is_nested_array', False):
                 if not isinstance(target_array, list):
-                    print(f"  ❌ 目标路径不是数组: {target_path}")
+                    self.reporter.error(f"  ❌ 目标路径不是数组: {target_path}")
                     continue
                 
                 modified_in_rule = False
@@ -255,10 +259,12 @@ class DataPackUpdater:
                                         'search_value': match_value,
                                         'update_template': rule['update_template']
                                     }
+                                    before = copy.deepcopy(array_element)
                                     self.update_object(array_element, update_template, item)
-                                    print(f"    ✅ 更新道具: {item.get('名称', '?')} ({match_value})")
-                                    modified = True
-                                    modified_in_rule = True
+                                    if array_element != before:
+                                        self.reporter.log(f"    ✅ 更新道具: {item.get('名称', '?')} ({match_value})")
+                                        modified = True
+                                        modified_in_rule = True
                                     found = True
                                     break
                         if found:
@@ -275,10 +281,10 @@ class DataPackUpdater:
                         insert_position = rule.get('insert_position', 'end')
                         if insert_position == 'start':
                             target_array.insert(0, new_obj)
-                            print(f"    ➕ 在位置 0 添加道具: {item.get('名称', '?')} ({match_value})")
+                            self.reporter.log(f"    ➕ 在位置 0 添加道具: {item.get('名称', '?')} ({match_value})")
                         else:
                             target_array.append(new_obj)
-                            print(f"    ➕ 在末尾添加道具: {item.get('名称', '?')} ({match_value})")
+                            self.reporter.log(f"    ➕ 在末尾添加道具: {item.get('名称', '?')} ({match_value})")
                         modified = True
                     
                     if modified_in_rule:
@@ -290,7 +296,7 @@ class DataPackUpdater:
                 target_array = self.get_by_path(data, target_path)
                 
                 if not isinstance(target_array, list):
-                    print(f"  ❌ 目标路径不是数组: {target_path}")
+                    self.reporter.error(f"  ❌ 目标路径不是数组: {target_path}")
                     continue
                 
                 # 处理每个符合条件的道具
@@ -304,10 +310,12 @@ class DataPackUpdater:
                         # 使用指定路径获取值并匹配
                         current_value = self.get_by_path(obj, rule['match_path'])
                         if current_value == match_value:
-                            # 更新现有对象
+                            # 更新现有对象（内容未变化时不算修改）
+                            before = copy.deepcopy(obj)
                             self.update_object(obj, rule['update_template'], item)
-                            print(f"    ✅ 更新道具: {item.get('name', '?')} ({match_value})")
-                            modified = True
+                            if obj != before:
+                                self.reporter.log(f"    ✅ 更新道具: {item.get('name', '?')} ({match_value})")
+                                modified = True
                             found = True
                             break
                     
@@ -344,21 +352,21 @@ class DataPackUpdater:
                         
                         # 插入新对象
                         target_array.insert(insert_index, new_obj)
-                        print(f"    ➕ 在位置 {insert_index} 添加道具: {item.get('name', '?')} ({match_value})")
+                        self.reporter.log(f"    ➕ 在位置 {insert_index} 添加道具: {item.get('name', '?')} ({match_value})")
                         modified = True
         
         # 如果有修改则写回文件
         if modified:
             try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                print(f"✅ JSON文件已更新: {file_path}")
+                self.files.write_text(file_path, json.dumps(data, indent=2, ensure_ascii=False))
+                self.reporter.record("描述", file_path, "modified", f"✅ JSON文件已更新: {file_path}")
                 return True
             except Exception as e:
-                print(f"❌ 写入JSON文件失败: {e}")
+                self.reporter.record("描述", file_path, "error", f"❌ 写入JSON文件失败: {e}")
                 return False
         else:
-            print(f"⏩ JSON文件无需修改: {file_path}")
+            self.reporter.record("描述", file_path, "unchanged",
+                                 f"⏩ JSON文件无需修改: {file_path}" if self.reporter.verbose else None)
             return True
     
     def filter_items(self, condition):
@@ -854,11 +862,20 @@ CONFIG = [
 ]
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='根据道具信息更新数据包描述')
+    add_reporter_arguments(parser)
+    args = parser.parse_args()
+    reporter = reporter_from_args(args)
+    
     # 初始化更新器
     updater = DataPackUpdater(
         excel_path="../../doc/道具信息.xlsx",
-        config=CONFIG
+        config=CONFIG,
+        reporter=reporter
     )
     
     # 执行更新
-    updater.run()
\ No newline at end of file
+    updater.run()
+    reporter.flush()
+    if args.report_json:
+        reporter.write_json(args.report_json)
\ No newline at end of file
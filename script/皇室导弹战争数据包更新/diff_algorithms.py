@@ -0,0 +1,153 @@
+import difflib
+from bisect import bisect_left
+from difflib import Match, SequenceMatcher
+
+# 没有唯一行可作锚点的区段，超过该规模（行数乘积）时不再细分，整段视为替换
+FALLBACK_LIMIT = 1_000_000
+
+def unique_anchors(a, alo, ahi, b, blo, bhi):
+    """
+    两段中都只出现一次的行作为锚点，返回按顺序一致的最长锚点序列 [(i, j), ...]
+    
+    锚点按在 a 中的位置排列后，用耐心排序求 b 下标的最长递增子序列
+    """
+    counts = {}
+    for i in range(alo, ahi):
+        entry = counts.get(a[i])
+        if entry is None:
+            counts[a[i]] = [1, i, 0, None]
+        else:
+            entry[0] += 1
+    for j in range(blo, bhi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[2] += 1
+            entry[3] = j
+    pairs = sorted((i, j) for count_a, i, count_b, j in counts.values() if count_a == 1 and count_b == 1)
+    
+    tails = []
+    tail_index = []
+    previous = [None] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_index.append(k)
+        else:
+            tails[pos] = j
+            tail_index[pos] = k
+        previous[k] = tail_index[pos - 1] if pos else None
+    
+    anchors = []
+    k = tail_index[-1] if tail_index else None
+    while k is not None:
+        anchors.append(pairs[k])
+        k = previous[k]
+    anchors.reverse()
+    return anchors
+
+def patience_matches(a, b):
+    """
+    耐心差异算法：返回按顺序排列的匹配行 [(i, j), ...]
+    
+    先匹配公共前后缀，再以两侧都唯一的行为锚点切分区段逐段处理（用显式栈代替递归）；
+    没有锚点的小区段交给 SequenceMatcher
+    """
+    def split(alo, ahi, blo, bhi):
+        """处理一个区段，按顺序返回其中的匹配行 (i, j) 和待细分的子区段 (alo, ahi, blo, bhi)"""
+        items = []
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            items.append((alo, blo))
+            alo += 1
+            blo += 1
+        suffix = []
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            suffix.append((ahi, bhi))
+        
+        if alo < ahi and blo < bhi:
+            anchors = unique_anchors(a, alo, ahi, b, blo, bhi)
+            if anchors:
+                for i, j in anchors:
+                    items.append((alo, i, blo, j))
+                    items.append((i, j))
+                    alo, blo = i + 1, j + 1
+                items.append((alo, ahi, blo, bhi))
+            elif (ahi - alo) * (bhi - blo) <= FALLBACK_LIMIT:
+                matcher = SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+                for i, j, size in matcher.get_matching_blocks():
+                    items.extend((alo + i + k, blo + j + k) for k in range(size))
+        
+        items.extend(reversed(suffix))
+        return items
+    
+    matches = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        item = stack.pop()
+        if len(item) == 2:
+            matches.append(item)
+        else:
+            stack.extend(reversed(split(*item)))
+    return matches
+
+class PatienceMatcher(SequenceMatcher):
+    """用耐心算法计算匹配块的 SequenceMatcher（get_opcodes / get_grouped_opcodes 照常可用）"""
+    def __init__(self, a, b):
+        super().__init__(None, a, b, autojunk=False)
+    
+    def get_matching_blocks(self):
+        if self.matching_blocks is not None:
+            return self.matching_blocks
+        blocks = []
+        for i, j in patience_matches(self.a, self.b):
+            if blocks and blocks[-1][0] + blocks[-1][2] == i and blocks[-1][1] + blocks[-1][2] == j:
+                blocks[-1][2] += 1
+            else:
+                blocks.append([i, j, 1])
+        blocks.append([len(self.a), len(self.b), 0])
+        self.matching_blocks = [Match(*block) for block in blocks]
+        return self.matching_blocks
+
+def format_range(start, stop):
+    """统一差异格式的行范围（与 difflib 相同）"""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+def patience_unified_diff(a, b, fromfile='', tofile='', n=3):
+    """与 difflib.unified_diff(lineterm='') 输出格式相同，但用耐心算法对齐"""
+    started = False
+    for group in PatienceMatcher(a, b).get_grouped_opcodes(n):
+        if not started:
+            started = True
+            yield f"--- {fromfile}"
+            yield f"+++ {tofile}"
+        first, last = group[0], group[-1]
+        yield f"@@ -{format_range(first[1], last[2])} +{format_range(first[3], last[4])} @@"
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                for line in a[i1:i2]:
+                    yield ' ' + line
+                continue
+            if tag in ('replace', 'delete'):
+                for line in a[i1:i2]:
+                    yield '-' + line
+            if tag in ('replace', 'insert'):
+                for line in b[j1:j2]:
+                    yield '+' + line
+
+def difflib_unified_diff(a, b, fromfile='', tofile='', n=3):
+    """标准库的统一差异"""
+    return difflib.unified_diff(a, b, fromfile=fromfile, tofile=tofile, n=n, lineterm='')
+
+# 可选的差异算法
+DIFF_ALGORITHMS = {
+    'difflib': difflib_unified_diff,
+    'patience': patience_unified_diff,
+}
\ No newline at end of file
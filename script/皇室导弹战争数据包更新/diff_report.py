@@ -0,0 +1,195 @@
+import json
+import html
+from itertools import islice
+from pathlib import Path
+
+def take_lines(lines, limit):
+    """
+    从差异行迭代器中取出最多 limit 行，返回 (行列表, 是否被截断)
+    
+    limit 为 0 或 None 时不限制；取满 limit 行后只再看一行判断是否截断，不生成其余差异
+    """
+    if not limit:
+        return list(lines), False
+    taken = list(islice(lines, limit + 1))
+    if len(taken) > limit:
+        return taken[:limit], True
+    return taken, False
+
+class ReportWriter:
+    """
+    差异报告的流式写出器：每比较完一个文件就写出，不在内存中累积报告
+    
+    max_total_lines -- 整个报告最多写出的差异行数（0 表示不限制），超出后只写文件状态行
+    """
+    def __init__(self, stream, max_total_lines=0):
+        self.stream = stream
+        self.max_total_lines = max_total_lines
+        self.total_lines = 0
+        # 差异被截断的文件数
+        self.total_truncated = 0
+    
+    def budget(self, lines):
+        """按总行数上限裁剪本文件的差异行，返回 (可写出的行, 是否被截断)"""
+        if not self.max_total_lines:
+            return lines, False
+        remaining = max(self.max_total_lines - self.total_lines, 0)
+        if len(lines) <= remaining:
+            return lines, False
+        return lines[:remaining], True
+    
+    def file(self, status, path, message, diff_lines=None, truncated=False, **fields):
+        """写出一个文件的比较结果（diff_lines 已按单文件上限裁剪，truncated 表示单文件差异是否被截断）"""
+        diff_lines = diff_lines or []
+        diff_lines, over_total = self.budget(diff_lines)
+        truncated = truncated or over_total
+        self.total_lines += len(diff_lines)
+        if truncated:
+            self.total_truncated += 1
+        self.write_file(status, path, message, diff_lines, truncated, fields)
+    
+    def begin(self, new_root, old_root, base_root=None):
+        """写出报告标题（base_root 不为空时为三方比较，new_root 和 old_root 分别为变体A和B）"""
+        raise NotImplementedError
+    
+    def write_file(self, status, path, message, diff_lines, truncated, fields):
+        raise NotImplementedError
+    
+    def end(self, counts, summary):
+        raise NotImplementedError
+    
+    def close(self):
+        self.stream.close()
+
+class TextReportWriter(ReportWriter):
+    """纯文本报告（与控制台输出格式一致）"""
+    def begin(self, new_root, old_root, base_root=None):
+        if base_root is not None:
+            self.stream.write(f"数据包三方比较报告\n  基准: {base_root}\n  A: {new_root}\n  B: {old_root}\n\n")
+        else:
+            self.stream.write(f"数据包差异报告\n新旧目录对比:\n  新: {new_root}\n  旧: {old_root}\n\n")
+    
+    def write_file(self, status, path, message, diff_lines, truncated, fields):
+        self.stream.write(message + '\n')
+        if diff_lines or truncated:
+            for line in diff_lines:
+                self.stream.write(line + '\n')
+            if truncated:
+                self.stream.write("... 差异已截断\n")
+            self.stream.write('=' * 80 + '\n')
+    
+    def end(self, counts, summary):
+        if self.total_truncated:
+            summary += f"  差异被截断的文件: {self.total_truncated}\n"
+        self.stream.write(summary)
+
+class JsonLinesReportWriter(ReportWriter):
+    """JSON Lines 报告：每行一个JSON对象（header / file / summary）"""
+    def begin(self, new_root, old_root, base_root=None):
+        if base_root is not None:
+            self.write_record({"type": "header", "base": str(base_root), "a": str(new_root), "b": str(old_root)})
+        else:
+            self.write_record({"type": "header", "new": str(new_root), "old": str(old_root)})
+    
+    def write_file(self, status, path, message, diff_lines, truncated, fields):
+        record = {"type": "file", "status": status, "path": path, **fields}
+        if diff_lines:
+            record["diff"] = diff_lines
+        if truncated:
+            record["truncated"] = True
+        self.write_record(record)
+    
+    def end(self, counts, summary):
+        self.write_record({"type": "summary", **counts, "truncated": self.total_truncated})
+    
+    def write_record(self, record):
+        self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+class HtmlReportWriter(ReportWriter):
+    """自包含的HTML报告（内联样式，无外部资源）"""
+    STYLE = """
+body { font-family: sans-serif; margin: 1.5em; }
+details { margin: 0.2em 0; }
+summary { cursor: pointer; font-family: monospace; }
+pre { background: #f6f8fa; padding: 0.5em; overflow-x: auto; margin: 0.3em 0 0.8em 1.2em; }
+.add { color: #22863a; background: #f0fff4; }
+.del { color: #b31d28; background: #ffeef0; }
+.hunk { color: #6f42c1; }
+.note { color: #888; }
+.modified summary { color: #b31d28; }
+.added summary { color: #22863a; }
+.removed summary { color: #6a737d; }
+.renamed summary { color: #6f42c1; }
+.changed_a summary, .changed_b summary { color: #b08800; }
+.conflict summary { color: #b31d28; font-weight: bold; }
+"""
+    
+    def begin(self, new_root, old_root, base_root=None):
+        if base_root is not None:
+            title = "数据包三方比较报告"
+            roots = (f"基准: {html.escape(str(base_root))}<br>A: {html.escape(str(new_root))}"
+                     f"<br>B: {html.escape(str(old_root))}")
+        else:
+            title = "数据包差异报告"
+            roots = f"新: {html.escape(str(new_root))}<br>旧: {html.escape(str(old_root))}"
+        self.stream.write(
+            "<!DOCTYPE html>\n<html lang=\"zh\">\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{title}</title>\n<style>{self.STYLE}</style>\n</head>\n<body>\n"
+            f"<h1>{title}</h1>\n<p>{roots}</p>\n"
+        )
+    
+    def line_class(self, line):
+        """差异行的样式"""
+        if line.startswith('+') and not line.startswith('+++'):
+            return 'add'
+        if line.startswith('-') and not line.startswith('---'):
+            return 'del'
+        if line.startswith('@@'):
+            return 'hunk'
+        if line.startswith('  + '):
+            return 'add'
+        if line.startswith('  - '):
+            return 'del'
+        return None
+    
+    def write_file(self, status, path, message, diff_lines, truncated, fields):
+        title = html.escape(message)
+        if not diff_lines and not truncated:
+            self.stream.write(f"<div class=\"{status}\"><details><summary>{title}</summary></details></div>\n")
+            return
+        self.stream.write(f"<div class=\"{status}\"><details><summary>{title}</summary><pre>")
+        for line in diff_lines:
+            css = self.line_class(line)
+            text = html.escape(line)
+            self.stream.write(f"<span class=\"{css}\">{text}</span>\n" if css else text + '\n')
+        if truncated:
+            self.stream.write("<span class=\"note\">... 差异已截断</span>\n")
+        self.stream.write("</pre></details></div>\n")
+    
+    def end(self, counts, summary):
+        if self.total_truncated:
+            summary += f"  差异被截断的文件: {self.total_truncated}\n"
+        self.stream.write(f"<h2>比较结果摘要</h2>\n<pre>{html.escape(summary.strip())}</pre>\n</body>\n</html>\n")
+
+REPORT_WRITERS = {
+    'text': TextReportWriter,
+    'jsonl': JsonLinesReportWriter,
+    'html': HtmlReportWriter,
+}
+
+def report_format_for(output_file, report_format=None):
+    """确定报告格式：显式指定优先，否则按文件扩展名判断（默认纯文本）"""
+    if report_format:
+        return report_format
+    suffix = Path(output_file).suffix.lower()
+    if suffix in ('.html', '.htm'):
+        return 'html'
+    if suffix in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    return 'text'
+
+def open_report(output_file, report_format=None, max_total_lines=0):
+    """打开流式报告写出器"""
+    writer_class = REPORT_WRITERS[report_format_for(output_file, report_format)]
+    stream = open(output_file, 'w', encoding='utf-8')
+    return writer_class(stream, max_total_lines)
\ No newline at end of file
@@ -0,0 +1,191 @@
+import os
+import json
+import math
+import time
+import sqlite3
+from pathlib import Path
+from pack_sources import file_digest
+
+# 道具信息表格的解析缓存（按表格绝对路径区分）
+CATALOG_CACHE = Path(__file__).resolve().parent / '.catalog_cache.sqlite'
+
+# pandas 默认识别为空值的文本（keep_default_na=True 时）
+DEFAULT_NA_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+
+def normalize_cell(value):
+    """单元格的原始值：整数、小数、布尔值或文本，空单元格为None"""
+    if value is None or value == '':
+        return None
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        # numpy 标量转换为 Python 值
+        value = value.item()
+    if isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    return str(value)
+
+def parse_workbook(excel_path):
+    """用 pandas 解析表格，返回 (列名列表, 行列表)（只在缓存失效时调用）"""
+    import pandas as pd
+    df = pd.read_excel(excel_path, dtype=object, keep_default_na=False)
+    columns = [str(column) for column in df.columns]
+    rows = [[normalize_cell(value) for value in row] for row in df.itertuples(index=False, name=None)]
+    return columns, rows
+
+class ItemCatalog:
+    """
+    道具信息表格（道具信息.xlsx）的缓存目录
+    
+    解析结果按表格的 (大小, 修改时间, 摘要) 缓存在 SQLite 中：大小和修改时间不变时直接读取缓存；
+    只有修改时间变化时重新计算摘要，内容相同则只更新修改时间；内容变化时才用 pandas 重新解析。
+    缓存保存单元格的原始值，读取时不需要导入 pandas
+    """
+    VERSION = 1
+    # 修改时间距现在太近的表格可能在同一时间刻度内再次保存，此时总是比较摘要
+    RACY_SECONDS = 2
+    
+    def __init__(self, excel_path, cache_path=CATALOG_CACHE):
+        self.excel_path = Path(excel_path)
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.columns = []
+        self.rows = []
+        self.stat = None
+        # 本次是否重新解析了表格
+        self.parsed = False
+        self.load()
+    
+    @property
+    def key(self):
+        return str(self.excel_path.resolve())
+    
+    def connect(self):
+        connection = sqlite3.connect(self.cache_path)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS workbooks (path TEXT PRIMARY KEY, version INTEGER, size INTEGER, "
+            "mtime_ns INTEGER, digest TEXT, columns TEXT)"
+        )
+        connection.execute("CREATE TABLE IF NOT EXISTS items (path TEXT, row INTEGER, cells TEXT, PRIMARY KEY (path, row))")
+        return connection
+    
+    def load(self):
+        """读取缓存，缓存失效时重新解析表格并写回缓存"""
+        st = os.stat(self.excel_path)
+        self.stat = (st.st_size, st.st_mtime_ns)
+        digest = None
+        if self.cache_path and self.cache_path.exists():
+            try:
+                connection = self.connect()
+                try:
+                    with connection:
+                        entry = connection.execute(
+                            "SELECT version, size, mtime_ns, digest, columns FROM workbooks WHERE path = ?", (self.key,)
+                        ).fetchone()
+                        if entry and entry[0] == self.VERSION and entry[1] == st.st_size:
+                            racy = st.st_mtime_ns >= time.time_ns() - self.RACY_SECONDS * 1_000_000_000
+                            if entry[2] != st.st_mtime_ns or racy:
+                                # 修改时间变化时比较摘要，内容相同则只更新缓存中的修改时间
+                                digest = file_digest(self.excel_path)
+                                if entry[3] == digest and entry[2] != st.st_mtime_ns:
+                                    connection.execute("UPDATE workbooks SET mtime_ns = ? WHERE path = ?",
+                                                       (st.st_mtime_ns, self.key))
+                            if entry[3] == digest or (entry[2] == st.st_mtime_ns and digest is None):
+                                self.columns = json.loads(entry[4])
+                                self.rows = [json.loads(cells) for (cells,) in connection.execute(
+                                    "SELECT cells FROM items WHERE path = ? ORDER BY row", (self.key,))]
+                                return
+                finally:
+                    connection.close()
+            except sqlite3.Error:
+                pass
+        
+        self.columns, self.rows = parse_workbook(self.excel_path)
+        self.parsed = True
+        if self.cache_path:
+            self.save(st, digest or file_digest(self.excel_path))
+    
+    def save(self, st, digest):
+        """写入缓存（一个事务内替换该表格的所有行）"""
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = self.connect()
+            try:
+                with connection:
+                    connection.execute("DELETE FROM items WHERE path = ?", (self.key,))
+                    connection.execute(
+                        "INSERT OR REPLACE INTO workbooks VALUES (?, ?, ?, ?, ?, ?)",
+                        (self.key, self.VERSION, st.st_size, st.st_mtime_ns, digest,
+                         json.dumps(self.columns, ensure_ascii=False))
+                    )
+                    connection.executemany(
+                        "INSERT INTO items VALUES (?, ?, ?)",
+                        ((self.key, index, json.dumps(row, ensure_ascii=False)) for index, row in enumerate(self.rows))
+                    )
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            pass
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def string_records(self):
+        """所有值为文本的道具列表，空单元格为空字符串（同 read_excel(dtype=str, keep_default_na=False)）"""
+        return [{column: '' if value is None else str(value) for column, value in zip(self.columns, row)}
+                for row in self.rows]
+    
+    def records(self, keep_default_na=True, column_mapping=None):
+        """
+        保留数据类型的道具列表（同 read_excel(keep_default_na=...)）
+        
+        keep_default_na 为True时空单元格和默认空值文本为 NaN，全为数字的列中有空值时整列转换为小数；
+        为False时空单元格为空字符串。column_mapping 为列名映射（同 DataFrame.rename）
+        """
+        columns = [column_mapping.get(column, column) if column_mapping else column for column in self.columns]
+        if not keep_default_na:
+            return [{column: '' if value is None else value for column, value in zip(columns, row)}
+                    for row in self.rows]
+        
+        def is_na(value):
+            return value is None or (isinstance(value, str) and value in DEFAULT_NA_VALUES)
+        
+        def is_number(value):
+            return isinstance(value, (int, float)) and not isinstance(value, bool)
+        
+        # 按 pandas 的类型推断：只含数字和空值的列，有空值或小数时整列为小数
+        float_columns = set()
+        for index in range(len(columns)):
+            values = [row[index] for row in self.rows if not is_na(row[index])]
+            if all(is_number(value) for value in values) and (
+                    len(values) < len(self.rows) or any(isinstance(value, float) for value in values)):
+                float_columns.add(index)
+        
+        records = []
+        for row in self.rows:
+            record = {}
+            for index, (column, value) in enumerate(zip(columns, row)):
+                if is_na(value):
+                    value = float('nan')
+                elif index in float_columns:
+                    value = float(value)
+                record[column] = value
+            records.append(record)
+        return records
+
+# 同一进程中已加载的目录（表格未变化时不再读取缓存）
+_loaded = {}
+
+def load_catalog(excel_path, cache_path=CATALOG_CACHE):
+    """加载道具目录（同一进程中表格未变化时直接返回已加载的目录）"""
+    key = str(Path(excel_path).resolve())
+    catalog = _loaded.get(key)
+    if catalog is not None:
+        st = os.stat(excel_path)
+        if catalog.stat == (st.st_size, st.st_mtime_ns):
+            return catalog
+    catalog = ItemCatalog(excel_path, cache_path)
+    _loaded[key] = catalog
+    return catalog
\ No newline at end of file
@@ -1,22 +1,23 @@
 import os
 import re
-import pandas as pd
 import argparse
 from pathlib import Path
-import shutil
-import logging
 import json
 from collections import defaultdict
-
-# 设置日志
-logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
-logger = logging.getLogger('FileSorter')
+from reporter import Reporter, add_reporter_arguments, reporter_from_args
+from item_catalog import load_catalog
+from pack_files import PackFiles
 
 class FileSorter:
-    def __init__(self, excel_path, config_path=None):
+    def __init__(self, excel_path, config_path=None, reporter=None, files=None):
         self.excel_path = excel_path
         self.config_path = config_path
-        self.items_df = None
+        self.reporter = reporter or Reporter()
+        # 数据包文件读写（UpdateSession 中为内存覆盖层）
+        self.files = files or PackFiles()
+        self.items = []
+        # 物品代号 -> 道具信息（同一代号出现多次时取第一行）
+        self.items_by_id = {}
         self.config = []
         self.file_stats = defaultdict(dict)
         
@@ -120,18 +121,23 @@ class FileSorter:
     def load_excel(self):
         """加载Excel数据"""
         try:
-            # 读取Excel，保留原始数据类型
-            self.items_df = pd.read_excel(self.excel_path, keep_default_na=False)
-            logger.info(f"✅ 成功读取Excel文件: {self.excel_path}")
-            logger.info(f"道具总数: {len(self.items_df)}")
+            # 读取Excel（使用道具目录缓存），保留原始数据类型
+            self.items = load_catalog(self.excel_path).records(keep_default_na=False)
+            self.items_by_id = {}
+            for item in self.items:
+                self.items_by_id.setdefault(item.get('物品代号'), item)
+            self.reporter.summary(f"✅ 成功读取Excel文件: {self.excel_path}")
+            self.reporter.summary(f"道具总数: {len(self.items)}")
             
             # 打印前5个道具作为示例
-            logger.info("\n前5个道具示例:")
-            logger.info(self.items_df.head().to_string(index=False))
+            if self.reporter.verbose:
+                self.reporter.log("\n前5个道具示例:", Reporter.VERBOSE)
+                for i, item in enumerate(self.items[:5], 1):
+                    self.reporter.log(f"  道具{i}: {item}", Reporter.VERBOSE)
             
             return True
         except Exception as e:
-            logger.error(f"❌ 读取Excel失败: {e}")
+            self.reporter.error(f"❌ 读取Excel失败: {e}")
             return False
 
     def load_config(self):
@@ -140,32 +146,33 @@ class FileSorter:
             try:
                 with open(self.config_path, 'r', encoding='utf-8') as f:
                     self.config = json.load(f)
-                logger.info(f"✅ 成功加载配置文件: {self.config_path}")
+                self.reporter.summary(f"✅ 成功加载配置文件: {self.config_path}")
             except Exception as e:
-                logger.error(f"❌ 加载配置文件失败: {e}")
-                logger.info("⚠️ 使用默认配置")
+                self.reporter.error(f"❌ 加载配置文件失败: {e}")
+                self.reporter.error("⚠️ 使用默认配置")
                 self.config = self.default_config
         else:
-            logger.info("⚠️ 未提供配置文件，使用默认配置")
+            self.reporter.log("⚠️ 未提供配置文件，使用默认配置")
             self.config = self.default_config
             
         # 打印配置摘要
-        logger.info("\n配置摘要:")
-        for i, cfg in enumerate(self.config, 1):
-            logger.info(f"  {i}. {cfg['description']}")
-            logger.info(f"     文件: {cfg['file_path']}")
-            logger.info(f"     排序字段: {', '.join(cfg['sort_by'])} ({cfg['sort_order']})")
-            logger.info(f"     备份: {'是' if cfg.get('backup', True) else '否'}")
+        if self.reporter.verbose:
+            self.reporter.log("\n配置摘要:", Reporter.VERBOSE)
+            for i, cfg in enumerate(self.config, 1):
+                self.reporter.log(f"  {i}. {cfg['description']}", Reporter.VERBOSE)
+                self.reporter.log(f"     文件: {cfg['file_path']}", Reporter.VERBOSE)
+                self.reporter.log(f"     排序字段: {', '.join(cfg['sort_by'])} ({cfg['sort_order']})", Reporter.VERBOSE)
+                self.reporter.log(f"     备份: {'是' if cfg.get('backup', True) else '否'}", Reporter.VERBOSE)
 
     def backup_file(self, file_path):
         """创建文件备份"""
-        backup_path = file_path.with_suffix(file_path.suffix + ".bak")
         try:
-            shutil.copy2(file_path, backup_path)
-            logger.info(f"🔁 创建备份: {backup_path}")
+            backup_path = self.files.backup(file_path)
+            if backup_path:
+                self.reporter.log(f"🔁 创建备份: {backup_path}", Reporter.VERBOSE)
             return True
         except Exception as e:
-            logger.error(f"❌ 创建备份失败: {e}")
+            self.reporter.error(f"❌ 创建备份失败: {e}")
             return False
 
     def find_item_block(self, content, start_index, end_index, item_id):
@@ -213,11 +220,11 @@ class FileSorter:
         # 创建排序键
         def get_sort_key(item, str_mode = False):
             key = []
-            item_row = self.items_df[self.items_df['物品代号'] == item['id']]
+            item_row = self.items_by_id.get(item['id'])
             
-            if not item_row.empty:
+            if item_row is not None:
                 for field in sort_fields:
-                    value = item_row[field].values[0]
+                    value = item_row[field]
                     
                     if str_mode:
                         # 如果需要字符串排序，直接使用字符串
@@ -225,8 +232,10 @@ class FileSorter:
                     else:
                         # 尝试转换为数字
                         try:
-                            # 检查是否为数字类型
-                            if isinstance(value, (int, float)):
+                            # 检查是否为数字类型（整数按字符串排序，与以前 pandas 读出的 numpy.int64 一致）
+                            if isinstance(value, int):
+                                key.append(str(value))
+                            elif isinstance(value, float):
                                 key.append(value)
                             else:
                                 # 尝试转换为数字
@@ -247,8 +256,8 @@ class FileSorter:
         try:
             sorted_items = sorted(items, key=get_sort_key, reverse=(sort_order.lower() == "desc"))
         except TypeError as e:
-            logger.error(f"❌ 排序失败: {e}")
-            logger.info("⚠️ 尝试使用字符串排序...")
+            self.reporter.error(f"❌ 排序失败: {e}")
+            self.reporter.log("⚠️ 尝试使用字符串排序...")
             # 使用字符串作为备选方案
             sorted_items = sorted(items, key=lambda x: str(get_sort_key(x,True)), 
                                  reverse=(sort_order.lower() == "desc"))
@@ -273,13 +282,11 @@ class FileSorter:
         sort_order = config.get('sort_order', 'asc')
         backup = config.get('backup', True)
         
-        logger.info(f"\n{'=' * 60}")
-        logger.info(f"处理文件: {file_path}")
-        logger.info(f"描述: {description}")
+        self.reporter.section(f"\n{'=' * 60}\n处理文件: {file_path}\n描述: {description}")
         
         # 检查文件是否存在
-        if not file_path.exists():
-            logger.error(f"❌ 文件不存在: {file_path}")
+        if not self.files.exists(file_path):
+            self.reporter.error(f"❌ 文件不存在: {file_path}")
             self.file_stats[str(file_path)] = {"status": "error", "message": "文件不存在"}
             return False
         
@@ -289,17 +296,16 @@ class FileSorter:
         
         # 读取文件内容
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = self.files.read_text(file_path)
         except Exception as e:
-            logger.error(f"❌ 读取文件失败: {e}")
+            self.reporter.error(f"❌ 读取文件失败: {e}")
             self.file_stats[str(file_path)] = {"status": "error", "message": str(e)}
             return False
         
         # 查找起始位置
         start_match = re.search(start_regex, content)
         if not start_match:
-            logger.error(f"❌ 未找到起始标记: {start_regex}")
+            self.reporter.error(f"❌ 未找到起始标记: {start_regex}")
             self.file_stats[str(file_path)] = {"status": "error", "message": "未找到起始标记"}
             return False
         
@@ -312,7 +318,7 @@ class FileSorter:
             if end_match:
                 end_index = start_index + end_match.start()
             else:
-                logger.warning("⚠️ 未找到结束标记，将使用文件末尾")
+                self.reporter.error("⚠️ 未找到结束标记，将使用文件末尾")
         
         # 提取区域内容
         region_content = content[start_index:end_index]
@@ -321,24 +327,25 @@ class FileSorter:
         items = self.extract_items_from_region(content, start_index, end_index, item_regex)
         
         if not items:
-            logger.warning("⚠️ 未找到任何条目块")
+            self.reporter.error("⚠️ 未找到任何条目块")
             self.file_stats[str(file_path)] = {"status": "warning", "message": "未找到条目块"}
             return True
         
-        logger.info(f"找到 {len(items)} 个条目块")
+        self.reporter.log(f"找到 {len(items)} 个条目块", Reporter.VERBOSE)
         
         # 排序条目
         sorted_items, order_changes = self.sort_items(items, sort_fields, sort_order)
         
         if not order_changes:
-            logger.info("✅ 条目已按所需顺序排列，无需更改")
+            self.reporter.record("排序", file_path, "unchanged",
+                                 "✅ 条目已按所需顺序排列，无需更改" if self.reporter.verbose else None)
             self.file_stats[str(file_path)] = {"status": "unchanged", "items_count": len(items)}
             return True
         
         # 打印顺序变化
-        logger.info("\n顺序变化:")
+        self.reporter.log("\n顺序变化:")
         for change in order_changes:
-            logger.info(f"  {change}")
+            self.reporter.log(f"  {change}")
         
         # 构建新的区域内容
         new_region_content = "\n".join(item['content'] for item in sorted_items)
@@ -352,11 +359,11 @@ class FileSorter:
         
         # 写回文件
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+            self.files.write_text(file_path, new_content)
             
-            logger.info(f"✅ 文件已更新: {file_path}")
-            logger.info(f"修改条目数: {len(order_changes)}/{len(items)}")
+            self.reporter.record("排序", file_path, "modified", f"✅ 文件已更新: {file_path}",
+                                 changed=len(order_changes), items=len(items))
+            self.reporter.log(f"修改条目数: {len(order_changes)}/{len(items)}")
             
             self.file_stats[str(file_path)] = {
                 "status": "updated",
@@ -365,19 +372,19 @@ class FileSorter:
             }
             return True
         except Exception as e:
-            logger.error(f"❌ 写入文件失败: {e}")
+            self.reporter.error(f"❌ 写入文件失败: {e}")
             self.file_stats[str(file_path)] = {"status": "error", "message": str(e)}
             return False
 
     def run(self):
         """执行所有文件处理"""
-        if self.items_df is None or self.items_df.empty:
-            logger.error("❌ Excel数据未加载，无法继续")
+        if not self.items:
+            self.reporter.error("❌ Excel数据未加载，无法继续")
             return False
         
-        logger.info("\n" + "=" * 60)
-        logger.info("开始处理文件")
-        logger.info("=" * 60)
+        self.reporter.summary("\n" + "=" * 60)
+        self.reporter.summary("开始处理文件")
+        self.reporter.summary("=" * 60)
         
         success = True
         for cfg in self.config:
@@ -385,41 +392,43 @@ class FileSorter:
             if not result:
                 success = False
         
-        logger.info("\n" + "=" * 60)
-        logger.info("处理完成!")
-        logger.info("=" * 60)
+        self.reporter.summary("\n" + "=" * 60)
+        self.reporter.summary("处理完成!")
+        self.reporter.summary("=" * 60)
         
         # 打印统计信息
-        logger.info("\n处理统计:")
+        self.reporter.summary("\n处理统计:")
         for file, stats in self.file_stats.items():
             status = stats['status']
             if status == "updated":
-                logger.info(f"  ✅ {file}: 更新了 {stats['changed_count']}/{stats['items_count']} 个条目")
+                self.reporter.summary(f"  ✅ {file}: 更新了 {stats['changed_count']}/{stats['items_count']} 个条目")
             elif status == "unchanged":
-                logger.info(f"  ⏩ {file}: {stats['items_count']} 个条目，无需更改")
+                if self.reporter.verbose:
+                    self.reporter.log(f"  ⏩ {file}: {stats['items_count']} 个条目，无需更改", Reporter.VERBOSE)
             elif status == "warning":
-                logger.info(f"  ⚠ {file}: {stats['message']}")
+                self.reporter.summary(f"  ⚠ {file}: {stats['message']}")
             else:
-                logger.info(f"  ❌ {file}: 错误 - {stats['message']}")
+                self.reporter.summary(f"  ❌ {file}: 错误 - {stats['message']}")
         
         return success
 
 def main():
-    # parser = argparse.ArgumentParser(description='文件条目排序工具')
+    parser = argparse.ArgumentParser(description='文件条目排序工具')
     # parser.add_argument('excel', type=str, help='Excel文件路径')
     # parser.add_argument('--config', type=str, default=None, help='配置文件路径')
-    # parser.add_argument('--log', type=str, default='INFO', 
-    #                     choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], 
-    #                     help='日志级别')
+    add_reporter_arguments(parser)
     
-    # args = parser.parse_args()
+    args = parser.parse_args()
     
-    # # 设置日志级别
-    # logger.setLevel(args.log.upper())
+    # 设置输出级别
+    reporter = reporter_from_args(args)
     
     # 创建处理器
-    sorter = FileSorter("../../doc/道具信息.xlsx", None)
+    sorter = FileSorter("../../doc/道具信息.xlsx", None, reporter)
     sorter.run()
+    reporter.flush()
+    if args.report_json:
+        reporter.write_json(args.report_json)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
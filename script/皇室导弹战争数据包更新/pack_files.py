@@ -0,0 +1,90 @@
+import os
+import shutil
+from pathlib import Path
+
+class PackFiles:
+    """
+    数据包文件的读写接口（直接读写磁盘）
+    
+    各更新器通过它读写文本文件；UpdateSession 中替换为 PackOverlay，修改先暂存在内存中
+    """
+    def exists(self, path):
+        return Path(path).is_file()
+    
+    def read_text(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    def write_text(self, path, text):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    
+    def backup_path(self, path):
+        path = Path(path)
+        return path.with_suffix(path.suffix + '.bak')
+    
+    def backup(self, path):
+        """把文件复制为 .bak 备份，返回备份路径"""
+        backup_path = self.backup_path(path)
+        shutil.copy2(path, backup_path)
+        return backup_path
+
+class PackOverlay(PackFiles):
+    """
+    数据包的内存覆盖层
+    
+    每个文件第一次访问时从磁盘读取一次，之后的读写都在内存中进行；
+    flush() 时先创建请求的备份，再只把内容与磁盘上不同的文件各写回一次
+    """
+    def __init__(self):
+        # 绝对路径 -> 当前内容（None 表示文件不存在）
+        self.files = {}
+        # 绝对路径 -> 磁盘上的原内容
+        self.originals = {}
+        # 请求备份的文件（flush 时从磁盘上的原文件复制）
+        self.backups = []
+    
+    def load(self, path):
+        """确保文件已读入覆盖层，返回其键"""
+        key = os.path.abspath(path)
+        if key not in self.files:
+            text = super().read_text(key) if os.path.isfile(key) else None
+            self.files[key] = text
+            self.originals[key] = text
+        return key
+    
+    def exists(self, path):
+        return self.files[self.load(path)] is not None
+    
+    def read_text(self, path):
+        text = self.files[self.load(path)]
+        if text is None:
+            raise FileNotFoundError(f"文件不存在: {path}")
+        return text
+    
+    def write_text(self, path, text):
+        self.files[self.load(path)] = text
+    
+    def backup(self, path):
+        """请求备份磁盘上的原文件（每个文件只备份一次，只在内存中创建的文件不备份）"""
+        key = self.load(path)
+        if key in self.backups or self.originals[key] is None:
+            return None
+        self.backups.append(key)
+        return self.backup_path(path)
+    
+    def dirty(self):
+        """内容与磁盘上不同的文件（按首次访问顺序）"""
+        return [key for key, text in self.files.items() if text is not None and text != self.originals[key]]
+    
+    def flush(self):
+        """创建备份并把修改过的文件写回磁盘，返回写回的文件列表"""
+        for key in self.backups:
+            super().backup(key)
+        self.backups = []
+        written = self.dirty()
+        for key in written:
+            super().write_text(key, self.files[key])
+            self.originals[key] = self.files[key]
+        return written
\ No newline at end of file
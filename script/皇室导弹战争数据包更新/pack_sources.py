@@ -0,0 +1,412 @@
+import os
+import time
+import json
+import zlib
+import hashlib
+import zipfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 跳过的非文本文件（如图片、声音等）
+SKIP_SUFFIXES = {'png', 'jpg', 'ogg', 'wav', 'mp3'}
+
+# 跳过的文件名（旧版本 sync_packs 写入目标目录中的校验清单，现在写在目标目录旁边）
+SKIP_NAMES = {'.sync_manifest.json'}
+
+# 内容清单缓存目录（按数据包目录的绝对路径区分）
+CACHE_DIR = Path(__file__).resolve().parent / '.compare_cache'
+
+def is_skipped(rel_path):
+    """是否跳过该文件（.git 目录中的文件、非文本文件和校验清单）"""
+    parts = rel_path.split('/')
+    return '.git' in parts[:-1] or parts[-1] in SKIP_NAMES or parts[-1].split('.')[-1].lower() in SKIP_SUFFIXES
+
+def walk_order_key(rel_path):
+    """与目录遍历相同的顺序：同一目录中先文件后子目录，均按名称排序"""
+    parts = rel_path.split('/')
+    return tuple((1, part) for part in parts[:-1]) + ((0, parts[-1]),)
+
+class Crc32:
+    """与 hashlib 摘要对象接口相同的CRC32（与zip中央目录中的校验值可直接比较）"""
+    def __init__(self):
+        self.value = 0
+    
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+    
+    def hexdigest(self):
+        return f"{self.value:08x}"
+
+def new_digest(algorithm, size):
+    """
+    创建摘要对象
+    
+    blake2 -- 目录之间比较（默认）
+    crc32  -- 与zip比较，可直接使用zip中记录的CRC
+    git    -- 与git版本比较，与git的blob对象ID相同
+    """
+    if algorithm == 'git':
+        digest = hashlib.sha1()
+        digest.update(b'blob %d\0' % size)
+        return digest
+    if algorithm == 'crc32':
+        return Crc32()
+    return hashlib.blake2b(digest_size=20)
+
+def file_digest(path, algorithm='blake2', chunk_size=1 << 20):
+    """计算文件内容的摘要"""
+    with open(path, 'rb') as f:
+        digest = new_digest(algorithm, os.fstat(f.fileno()).st_size)
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def bytes_digest(data, algorithm='blake2'):
+    """计算内存中内容的摘要"""
+    digest = new_digest(algorithm, len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+def confirm_crc_digests(sources, manifests, verify=False):
+    """
+    把各来源清单中的CRC32摘要改为 "大小:CRC"，大小和CRC都相同的文件视为相同（不读取内容）
+    
+    CRC只有32位，相同不代表内容相同；verify 为真时，大小和CRC都与其他条目相同的文件
+    再读取内容加上BLAKE2摘要，只有内容摘要也相同才视为相同。返回读取内容的文件数
+    """
+    groups = {}
+    for source, files in zip(sources, manifests):
+        for rel_path, entry in files.items():
+            groups.setdefault((entry["size"], entry["digest"]), []).append((source, rel_path, entry))
+    
+    confirmed = 0
+    for (size, crc), members in groups.items():
+        for source, rel_path, entry in members:
+            entry["digest"] = f"{size}:{crc}"
+            if verify and len(members) > 1:
+                entry["digest"] += ':' + bytes_digest(source.read_bytes(rel_path))
+                confirmed += 1
+    return confirmed
+
+class TreeManifest:
+    """
+    数据包目录的内容清单：相对路径 -> (大小, 修改时间, 摘要)
+    
+    清单缓存在 CACHE_DIR 中，只有大小或修改时间变化的文件才会重新计算摘要，
+    需要计算的摘要在线程池中并行计算
+    """
+    VERSION = 2
+    # 修改时间距扫描时刻太近的文件可能仍在写入，不缓存其摘要
+    RACY_SECONDS = 2
+    
+    def __init__(self, root, cache_dir=CACHE_DIR, jobs=None, algorithm='blake2'):
+        self.root = Path(root)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.jobs = jobs or min(32, (os.cpu_count() or 1) * 4)
+        self.algorithm = algorithm
+        self.files = {}
+        self.hashed = 0
+    
+    @property
+    def cache_path(self):
+        """缓存文件路径（由目录绝对路径和摘要算法的哈希命名）"""
+        key = f"{self.root.resolve()}\0{self.algorithm}"
+        return self.cache_dir / f"{hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()}.json"
+    
+    def load_cache(self):
+        """读取缓存的清单，不存在或无效时返回空字典"""
+        if not self.cache_dir or not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if (cache.get("version") != self.VERSION or cache.get("root") != str(self.root.resolve())
+                    or cache.get("algorithm") != self.algorithm):
+                return {}
+            return cache.get("files", {})
+        except Exception:
+            return {}
+    
+    def save_cache(self, files):
+        """写入清单缓存（先写临时文件再替换）"""
+        if not self.cache_dir:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.VERSION, "root": str(self.root.resolve()),
+                           "algorithm": self.algorithm, "files": files}, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_path)
+        except Exception:
+            pass
+    
+    def walk(self):
+        """按目录顺序遍历（先文件后子目录，均按名称排序），产出 (相对路径, stat结果)；跳过 .git、非文本文件和校验清单"""
+        stack = [(self.root, '')]
+        while stack:
+            directory, prefix = stack.pop()
+            with os.scandir(directory) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+            subdirs = []
+            for entry in entries:
+                rel_path = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != '.git':
+                        subdirs.append((entry.path, rel_path + '/'))
+                elif entry.is_file():
+                    if entry.name in SKIP_NAMES or entry.name.split('.')[-1].lower() in SKIP_SUFFIXES:
+                        continue
+                    yield rel_path, entry.stat()
+            stack.extend(reversed(subdirs))
+    
+    def scan(self):
+        """扫描目录并刷新清单，返回 {相对路径: {"size", "mtime_ns", "digest"}}"""
+        cached = self.load_cache()
+        scan_time_ns = time.time_ns()
+        files = {}
+        to_hash = []
+        for rel_path, st in self.walk():
+            entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": None}
+            old = cached.get(rel_path)
+            if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns and old.get("digest"):
+                entry["digest"] = old["digest"]
+            else:
+                to_hash.append(rel_path)
+            files[rel_path] = entry
+        
+        # 并行计算变化文件的摘要
+        if to_hash:
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                digests = executor.map(lambda rel_path: file_digest(self.root / rel_path, self.algorithm), to_hash)
+                for rel_path, digest in zip(to_hash, digests):
+                    files[rel_path]["digest"] = digest
+        self.hashed = len(to_hash)
+        
+        # 只在有变化时写回缓存
+        if to_hash or len(files) != len(cached):
+            racy_ns = scan_time_ns - self.RACY_SECONDS * 1_000_000_000
+            self.save_cache({
+                rel_path: entry for rel_path, entry in files.items()
+                if entry["mtime_ns"] < racy_ns
+            })
+        
+        self.files = files
+        return files
+
+class DirSource:
+    """目录中的数据包"""
+    kind = 'dir'
+    
+    def __init__(self, root):
+        self.root = Path(root)
+        self.hashed = 0
+        if not self.root.is_dir():
+            raise FileNotFoundError(f"目录不存在: {self.root}")
+    
+    @property
+    def label(self):
+        return str(self.root)
+    
+    def manifest(self, algorithm='blake2', cache_dir=CACHE_DIR, jobs=None):
+        """内容清单 {相对路径: {"size", "digest", ...}}（使用缓存，只计算变化文件的摘要）"""
+        tree = TreeManifest(self.root, cache_dir, jobs, algorithm)
+        files = tree.scan()
+        self.hashed = tree.hashed
+        return files
+    
+    def read_bytes(self, rel_path):
+        return (self.root / rel_path).read_bytes()
+    
+    def close(self):
+        pass
+
+class ZipSource:
+    """
+    zip发布包中的数据包（直接读取中央目录和条目，不解压到磁盘）
+    
+    prefix 为数据包在zip中的子目录（如 data），为空时使用zip的根目录
+    """
+    kind = 'zip'
+    
+    def __init__(self, zip_path, prefix=''):
+        self.zip_path = Path(zip_path)
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.hashed = 0
+        self.zip_file = None
+        if not self.zip_path.is_file():
+            raise FileNotFoundError(f"zip文件不存在: {self.zip_path}")
+    
+    def __getstate__(self):
+        # 打开的zip文件不能传给子进程，由子进程重新打开
+        state = self.__dict__.copy()
+        state["zip_file"] = None
+        return state
+    
+    @property
+    def label(self):
+        return f"{self.zip_path}:{self.prefix.rstrip('/')}" if self.prefix else str(self.zip_path)
+    
+    def archive(self):
+        if self.zip_file is None:
+            self.zip_file = zipfile.ZipFile(self.zip_path)
+        return self.zip_file
+    
+    def manifest(self, algorithm='crc32', cache_dir=None, jobs=None):
+        """内容清单；algorithm 为 crc32 时直接使用中央目录中的CRC，不读取条目内容"""
+        entries = []
+        for info in self.archive().infolist():
+            if info.is_dir() or not info.filename.startswith(self.prefix):
+                continue
+            rel_path = info.filename[len(self.prefix):]
+            if not is_skipped(rel_path):
+                entries.append((rel_path, info))
+        entries.sort(key=lambda item: walk_order_key(item[0]))
+        
+        files = {}
+        self.hashed = 0
+        for rel_path, info in entries:
+            if algorithm == 'crc32':
+                digest = f"{info.CRC:08x}"
+            else:
+                digest = bytes_digest(self.archive().read(info), algorithm)
+                self.hashed += 1
+            files[rel_path] = {"size": info.file_size, "digest": digest}
+        return files
+    
+    def read_bytes(self, rel_path):
+        return self.archive().read(self.prefix + rel_path)
+    
+    def close(self):
+        if self.zip_file is not None:
+            self.zip_file.close()
+            self.zip_file = None
+
+class GitSource:
+    """
+    git版本中的数据包（从git对象读取，不检出到磁盘）
+    
+    rev 为任意版本（提交、标签、分支），path 为数据包在仓库中的路径，repo 为仓库目录
+    """
+    kind = 'git'
+    
+    def __init__(self, rev, path='', repo='.'):
+        self.rev = rev
+        self.path = path.strip('/')
+        self.repo = str(repo)
+        self.hashed = 0
+        # 读取对象内容的 git cat-file --batch 进程（首次读取时启动）
+        self.batch = None
+        try:
+            object_type = self.git('cat-file', '-t', self.tree).strip()
+        except subprocess.CalledProcessError:
+            object_type = None
+        if object_type != b'tree':
+            raise FileNotFoundError(f"git版本中不存在该目录: {self.label}")
+    
+    def __getstate__(self):
+        # cat-file 进程不能传给子进程，由子进程重新启动
+        state = self.__dict__.copy()
+        state["batch"] = None
+        return state
+    
+    @property
+    def tree(self):
+        return f"{self.rev}:{self.path}"
+    
+    @property
+    def label(self):
+        return f"git:{self.tree}"
+    
+    def git(self, *args):
+        """运行git命令并返回标准输出（字节）"""
+        return subprocess.run(['git', '-C', self.repo, *args], capture_output=True, check=True).stdout
+    
+    def read_object(self, name):
+        """通过常驻的 git cat-file --batch 进程读取一个对象的内容（不为每个文件启动git）"""
+        if self.batch is None:
+            self.batch = subprocess.Popen(['git', '-C', self.repo, 'cat-file', '--batch'],
+                                          stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.batch.stdin.write(name.encode('utf-8') + b'\n')
+        self.batch.stdin.flush()
+        header = self.batch.stdout.readline().split()
+        if len(header) != 3:
+            raise FileNotFoundError(f"git对象不存在: {name}")
+        data = self.batch.stdout.read(int(header[2]))
+        # 内容后面跟着一个换行符
+        self.batch.stdout.read(1)
+        if header[1] != b'blob':
+            raise FileNotFoundError(f"git对象不是文件: {name}")
+        return data
+    
+    def manifest(self, algorithm='git', cache_dir=None, jobs=None):
+        """内容清单；algorithm 为 git 时直接使用树中的blob对象ID，不读取内容"""
+        entries = []
+        for record in self.git('ls-tree', '-r', '-l', '-z', self.tree).split(b'\0'):
+            if not record:
+                continue
+            meta, name = record.split(b'\t', 1)
+            mode, object_type, object_id, size = meta.split()
+            rel_path = name.decode('utf-8')
+            # 只比较普通文件（跳过子模块和符号链接）
+            if object_type != b'blob' or mode == b'120000' or is_skipped(rel_path):
+                continue
+            entries.append((rel_path, object_id.decode('ascii'), int(size)))
+        entries.sort(key=lambda item: walk_order_key(item[0]))
+        
+        files = {}
+        self.hashed = 0
+        for rel_path, object_id, size in entries:
+            if algorithm == 'git':
+                digest = object_id
+            else:
+                digest = bytes_digest(self.read_object(object_id), algorithm)
+                self.hashed += 1
+            files[rel_path] = {"size": size, "digest": digest}
+        return files
+    
+    def read_bytes(self, rel_path):
+        return self.read_object(f"{self.tree}/{rel_path}" if self.path else f"{self.rev}:{rel_path}")
+    
+    def close(self):
+        if self.batch is not None:
+            self.batch.stdin.close()
+            self.batch.wait()
+            self.batch.stdout.close()
+            self.batch = None
+
+def open_source(spec, git_repo='.'):
+    """
+    按规格打开数据包来源
+    
+    目录路径           -- 普通目录
+    xxx.zip[:子目录]   -- zip发布包（可指定数据包在zip中的子目录）
+    git:<版本>:<路径>  -- git仓库中某个版本的目录
+    
+    来源不存在时抛出 FileNotFoundError
+    """
+    spec = str(spec)
+    if spec.startswith('git:'):
+        rev, sep, path = spec[4:].partition(':')
+        if not rev or not sep:
+            raise FileNotFoundError(f"git来源的格式应为 git:<版本>:<路径>: {spec}")
+        return GitSource(rev, path, git_repo)
+    zip_path, sep, prefix = spec.rpartition(':')
+    if sep and zip_path.lower().endswith('.zip'):
+        return ZipSource(zip_path, prefix)
+    if spec.lower().endswith('.zip'):
+        return ZipSource(spec)
+    return DirSource(spec)
+
+def common_algorithm(*sources):
+    """
+    选择各来源共同使用的摘要算法，尽量利用来源自带的校验值：
+    有git来源时用git对象ID，有zip来源时用CRC32，否则用BLAKE2
+    """
+    kinds = {source.kind for source in sources}
+    if 'git' in kinds:
+        return 'git'
+    if 'zip' in kinds:
+        return 'crc32'
+    return 'blake2'
\ No newline at end of file
@@ -0,0 +1,136 @@
+import sys
+import json
+from collections import defaultdict
+
+class Reporter:
+    """
+    更新脚本共用的输出器：按级别过滤、缓冲写出、累计计数，并可导出JSON报告
+    
+    级别:
+    QUIET   -- 只输出错误
+    SUMMARY -- 只输出错误和摘要
+    NORMAL  -- 默认，额外输出有变化的文件（未变化的文件只计数）
+    VERBOSE -- 输出所有文件，包括未变化的文件
+    """
+    QUIET = 0
+    SUMMARY = 1
+    NORMAL = 2
+    VERBOSE = 3
+    
+    def __init__(self, level=NORMAL, stream=None, buffer_lines=200):
+        self.level = level
+        self.stream = stream
+        self.buffer_lines = buffer_lines
+        self.buffer = []
+        # 等待输出的标题：只有其后确实有消息时才输出
+        self.pending_section = None
+        # 计数器: {分组: {状态: 数量}}
+        self.counters = defaultdict(lambda: defaultdict(int))
+        # 有变化的文件记录（未变化的文件不保存，只计数）
+        self.files = defaultdict(list)
+    
+    @property
+    def verbose(self):
+        """是否输出未变化的文件（调用方据此跳过无用的字符串格式化）"""
+        return self.level >= self.VERBOSE
+    
+    def enabled(self, level):
+        """该级别的消息是否会被输出"""
+        return self.level >= level
+    
+    def log(self, message="", level=NORMAL):
+        """缓冲一条消息，超过缓冲行数时写出"""
+        if self.level < level:
+            return
+        if self.pending_section is not None:
+            # 摘要不属于任何标题，丢弃未使用的标题
+            if level != self.SUMMARY:
+                self.buffer.append(self.pending_section)
+            self.pending_section = None
+        self.buffer.append(message)
+        if len(self.buffer) >= self.buffer_lines:
+            self.flush()
+    
+    def section(self, title):
+        """
+        设置标题（如"处理文件: xxx"）：verbose 时直接输出，
+        否则延迟到该标题下出现第一条消息时才输出，没有消息的标题不输出
+        """
+        if self.level >= self.VERBOSE:
+            self.log(title, self.VERBOSE)
+        else:
+            self.pending_section = title
+    
+    def summary(self, message=""):
+        """摘要信息（--summary 时仍输出）"""
+        self.log(message, self.SUMMARY)
+    
+    def error(self, message):
+        """错误信息（任何级别都输出）"""
+        self.log(message, self.QUIET)
+    
+    def count(self, group, key, n=1):
+        """累计计数"""
+        self.counters[group][key] += n
+    
+    def record(self, group, path, status, message=None, **fields):
+        """
+        记录一个文件的处理结果并计数
+        
+        status 为 "unchanged" 时只计数（verbose 时才输出 message）；
+        为 "error" 时总会输出；其余状态在默认级别输出并写入JSON报告
+        """
+        self.counters[group][status] += 1
+        if status == "unchanged":
+            if message is not None and self.level >= self.VERBOSE:
+                self.log(message, self.VERBOSE)
+            return
+        
+        self.files[group].append({"path": str(path), "status": status, **fields})
+        if message is not None:
+            self.log(message, self.QUIET if status == "error" else self.NORMAL)
+    
+    def flush(self):
+        """写出缓冲的消息"""
+        if not self.buffer:
+            return
+        stream = self.stream or sys.stdout
+        stream.write('\n'.join(self.buffer) + '\n')
+        stream.flush()
+        self.buffer.clear()
+    
+    def to_dict(self):
+        """报告内容：计数器和有变化的文件"""
+        return {
+            "counters": {group: dict(counts) for group, counts in self.counters.items()},
+            "files": {group: entries for group, entries in self.files.items()},
+        }
+    
+    def write_json(self, json_path, **extra):
+        """把报告写为JSON文件"""
+        self.flush()
+        try:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump({**extra, **self.to_dict()}, f, indent=1, ensure_ascii=False)
+            self.summary(f"✅ JSON报告已保存到: {json_path}")
+        except Exception as e:
+            self.error(f"❌ 保存JSON报告失败: {e}")
+        self.flush()
+
+def add_reporter_arguments(parser):
+    """为命令行添加输出级别和JSON报告参数"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('-q', '--quiet', action='store_true', help='只输出错误')
+    group.add_argument('--summary', action='store_true', help='只输出错误和摘要')
+    group.add_argument('-v', '--verbose', action='store_true', help='输出所有文件（包括未变化的文件）')
+    parser.add_argument('--report-json', type=str, default=None, help='把处理结果和计数写为JSON报告')
+
+def reporter_from_args(args):
+    """根据命令行参数创建输出器"""
+    if args.quiet:
+        return Reporter(Reporter.QUIET)
+    if args.summary:
+        return Reporter(Reporter.SUMMARY)
+    if args.verbose:
+        return Reporter(Reporter.VERBOSE)
+    return Reporter()
\ No newline at end of file
@@ -1,129 +1,618 @@
 import os
+import json
+import errno
+import time
 import shutil
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import sys
+from reporter import Reporter, add_reporter_arguments, reporter_from_args
+from pack_sources import bytes_digest, file_digest
 
-def sync_data_packs(new_data_dir, old_data_dir, dry_run=False):
+# 校验清单（服务器可据此快速校验数据包是否完整）写在目标目录旁边，不放进服务器读取的目录中：
+# 目标 .../<数据包>/data 的清单为 .../<数据包>/.data.sync_manifest.json
+MANIFEST_SUFFIX = ".sync_manifest.json"
+MANIFEST_VERSION = 1
+# 旧版本写在目标目录中的校验清单（同步时跳过，写入新清单时删除）
+LEGACY_MANIFEST_NAME = ".sync_manifest.json"
+
+def sync_manifest_path(dest_dir):
+    """目标目录的校验清单路径（与目标目录同级）"""
+    dest_path = Path(os.path.abspath(dest_dir))
+    return dest_path.with_name(f".{dest_path.name}{MANIFEST_SUFFIX}")
+
+def load_sync_manifest(dest_dir):
+    """读取目标目录的校验清单，返回 {相对路径: {"size", "mtime_ns", "digest"}}，不存在或无效时返回None"""
+    try:
+        with open(sync_manifest_path(dest_dir), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        return manifest.get("files", {})
+    except Exception:
+        return None
+
+def save_sync_manifest(dest_dir, files):
+    """写入校验清单（先写临时文件再替换）"""
+    manifest_path = sync_manifest_path(dest_dir)
+    temp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": MANIFEST_VERSION, "algorithm": "blake2", "created": time.strftime('%Y-%m-%d %H:%M:%S'),
+                   "files": files}, f, indent=1, ensure_ascii=False)
+    os.replace(temp_path, manifest_path)
+    try:
+        os.unlink(Path(dest_dir) / LEGACY_MANIFEST_NAME)
+    except FileNotFoundError:
+        pass
+
+def move_sync_manifest(src_dir, dest_dir):
+    """目录重命名后把校验清单移到新位置（来源没有清单时删除目标位置的旧清单）"""
+    try:
+        os.replace(sync_manifest_path(src_dir), sync_manifest_path(dest_dir))
+    except FileNotFoundError:
+        try:
+            os.unlink(sync_manifest_path(dest_dir))
+        except FileNotFoundError:
+            pass
+
+def verify_sync_manifest(dest_dir, full=False, jobs=None, hash_paths=()):
+    """
+    按校验清单检查目标目录，返回 [(相对路径, 问题), ...]，清单不存在或无效时返回None
+    （清单存在但没有文件时返回空列表）
+    
+    默认只比较大小和修改时间；full 为 True 时重新计算所有文件的摘要，
+    hash_paths 中的文件即使不是 full 也重新计算摘要
+    """
+    dest_path = Path(dest_dir)
+    files = load_sync_manifest(dest_path)
+    if files is None:
+        return None
+    
+    def check(item):
+        rel_path, entry = item
+        try:
+            st = os.stat(dest_path / rel_path)
+        except FileNotFoundError:
+            return rel_path, "文件缺失"
+        if st.st_size != entry["size"]:
+            return rel_path, "大小不同"
+        if full or rel_path in hash_paths:
+            if file_digest(dest_path / rel_path) != entry["digest"]:
+                return rel_path, "内容不同"
+        elif st.st_mtime_ns != entry["mtime_ns"]:
+            return rel_path, "修改时间不同"
+        return None
+    
+    with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) * 4)) as executor:
+        return [problem for problem in executor.map(check, files.items()) if problem]
+
+def collect_source_files(new_path, skip_backups=True):
+    """收集来源目录中需要同步的文件，返回 [(相对路径, stat结果), ...]（跳过备份文件和校验清单）"""
+    files = []
+    for root, dirs, names in os.walk(new_path):
+        dirs.sort()
+        for name in sorted(names):
+            # 跳过备份文件
+            if (skip_backups and name.endswith('.bak')) or name == LEGACY_MANIFEST_NAME:
+                continue
+            src_file = Path(root) / name
+            files.append((src_file.relative_to(new_path).as_posix(), src_file.stat()))
+    return files
+
+def break_hardlink(path):
+    """
+    目标文件与其他目录共用数据（部署时硬链接到上一版本）时先删除，
+    避免原地写入同时改动上一版本中的文件
+    """
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def check_dest(src, dest, src_stat, src_digest, dry_run):
+    """
+    判断目标文件是否需要复制，返回 (动作, 来源摘要)，动作为 unchanged / 新增 / 更新
+    
+    大小和修改时间都相同时直接跳过；只有大小相同而修改时间不同时才计算摘要比较内容
+    （src_digest 为已知的来源摘要，计算后随返回值传回，同一文件的其他目标不再重复计算）
+    """
+    try:
+        dest_stat = os.stat(dest)
+    except FileNotFoundError:
+        return "新增", src_digest
+    if dest_stat.st_size == src_stat.st_size:
+        if dest_stat.st_mtime_ns == src_stat.st_mtime_ns:
+            return "unchanged", src_digest
+        src_digest = src_digest or file_digest(src)
+        if file_digest(dest) == src_digest:
+            # 内容相同只是修改时间不同：同步修改时间，下次可直接跳过
+            if not dry_run:
+                os.utime(dest, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+            return "unchanged", src_digest
+    return "更新", src_digest
+
+def sync_file(src, dests, src_stat, known_digest, dry_run, need_digest=True):
+    """
+    把一个文件同步到所有目标，返回 (摘要, [(动作, 错误), ...])，动作为 unchanged / 新增 / 更新 / error
+    
+    known_digest 为清单中记录的来源摘要（来源文件未变化时可直接使用）；
+    need_digest 为 False（不写校验清单）时，跳过的文件不计算摘要。
+    只有一个目标需要复制时使用 copy2（各平台的快速复制：Linux 的 sendfile、macOS 的 fcopyfile），
+    多个目标时来源只读取一次，再写入每个目标
+    """
+    digest = known_digest
+    results = []
+    to_copy = []
+    for dest in dests:
+        try:
+            action, digest = check_dest(src, dest, src_stat, digest, dry_run)
+            results.append([action, None])
+            if action != "unchanged":
+                to_copy.append((len(results) - 1, dest))
+        except Exception as e:
+            results.append(["error", e])
+    
+    if to_copy and not dry_run:
+        data = None
+        if len(to_copy) > 1:
+            try:
+                data = Path(src).read_bytes()
+                digest = digest or bytes_digest(data)
+            except Exception as e:
+                for index, _ in to_copy:
+                    results[index] = ["error", e]
+                return digest, results
+        for index, dest in to_copy:
+            try:
+                break_hardlink(dest)
+                if data is None:
+                    shutil.copy2(src, dest)
+                else:
+                    with open(dest, 'wb') as f:
+                        f.write(data)
+                    shutil.copystat(src, dest)
+            except Exception as e:
+                results[index] = ["error", e]
+    
+    if digest is None and need_digest:
+        try:
+            digest = file_digest(src)
+        except Exception as e:
+            results = [[action, error] if action == "error" else ["error", e] for action, error in results]
+    return digest, results
+
+def sync_data_packs(new_data_dir, old_data_dirs, dry_run=False, reporter=None, jobs=None, write_manifest=True):
     """
-    同步数据包文件
+    同步数据包文件（增量同步，可作为库函数调用）
     
     参数:
-    new_data_dir -- 修改后的数据包data目录
-    old_data_dir -- 原始数据包的data目录
-    dry_run      -- 模拟运行，不实际复制文件
+    new_data_dir   -- 修改后的数据包data目录
+    old_data_dirs  -- 原始数据包的data目录，可以是多个（如同一台机器上多个服务器的 world/datapacks/<数据包>/data）
+    dry_run        -- 模拟运行，不实际复制文件
+    reporter       -- 输出器（可选，默认不列出内容相同的文件）
+    jobs           -- 复制文件的线程数（默认按CPU数）
+    write_manifest -- 是否写入校验清单（目标目录旁的 .<目录名>.sync_manifest.json）
+    
+    来源只遍历一次，每个变化的文件只读取一次并写入所有需要它的目标。
+    返回同步结果 {"total", "synced", "skipped", "errors", "destinations": {目标: {"synced", "skipped", "errors"}}}，
+    其中 synced / skipped / errors 为所有目标的合计；目录不存在时返回None
     """
+    reporter = reporter or Reporter()
+    if isinstance(old_data_dirs, (str, os.PathLike)):
+        old_data_dirs = [old_data_dirs]
+    
     # 确保目录存在
     new_path = Path(new_data_dir)
-    old_path = Path(old_data_dir)
+    old_paths = [Path(old_data_dir) for old_data_dir in old_data_dirs]
     
     if not new_path.exists():
-        print(f"❌ 新数据包目录不存在: {new_path}")
-        return False
+        reporter.error(f"❌ 新数据包目录不存在: {new_path}")
+        reporter.flush()
+        return None
     
-    if not old_path.exists():
-        print(f"❌ 原始数据包目录不存在: {old_path}")
-        return False
+    for old_path in old_paths:
+        if not old_path.exists():
+            reporter.error(f"❌ 原始数据包目录不存在: {old_path}")
+            reporter.flush()
+            return None
+    
+    # 多个目标时每条消息标明目标编号
+    multiple = len(old_paths) > 1
+    labels = [f" [目标{index + 1}]" if multiple else "" for index in range(len(old_paths))]
     
-    print(f"开始同步数据包:")
-    print(f"  来源: {new_path}")
-    print(f"  目标: {old_path}")
-    print(f"  模式: {'模拟运行' if dry_run else '实际复制'}")
+    reporter.summary(f"开始同步数据包:")
+    reporter.summary(f"  来源: {new_path}")
+    if multiple:
+        for label, old_path in zip(labels, old_paths):
+            reporter.summary(f"  {label.strip()} {old_path}")
+    else:
+        reporter.summary(f"  目标: {old_paths[0]}")
+    reporter.summary(f"  模式: {'模拟运行' if dry_run else '实际复制'}")
     
     # 收集所有需要同步的文件
-    files_to_sync = []
-    for root, dirs, files in os.walk(new_path):
-        for file in files:
-            # 跳过备份文件
-            if file.endswith('.bak'):
-                continue
-                
-            rel_path = Path(root).relative_to(new_path)
-            src_file = new_path / rel_path / file
-            dest_file = old_path / rel_path / file
-            
-            files_to_sync.append((src_file, dest_file, rel_path / file))
-    
-    print(f"找到 {len(files_to_sync)} 个需要同步的文件")
-    
-    # 同步文件
-    synced_count = 0
-    skipped_count = 0
-    created_dirs = set()
-    
-    for src, dest, rel_path in files_to_sync:
-        # 检查源文件是否存在
-        if not src.exists():
-            print(f"⚠️ 源文件不存在: {src} (跳过)")
-            skipped_count += 1
-            continue
-        
-        # 检查目标目录是否存在
-        dest_dir = dest.parent
-        if not dest_dir.exists():
-            if not dry_run:
-                dest_dir.mkdir(parents=True, exist_ok=True)
-                created_dirs.add(str(dest_dir))
-            print(f"📁 创建目录: {dest_dir.relative_to(old_path)}")
-        
-        # 检查文件是否需要复制
-        if dest.exists():
-            # 比较文件内容
-            if filecmp.cmp(src, dest, shallow=False):
-                print(f"⏩ 文件相同: {rel_path} (跳过)")
-                skipped_count += 1
+    files_to_sync = collect_source_files(new_path)
+    reporter.summary(f"找到 {len(files_to_sync)} 个需要同步的文件")
+    
+    # 上次同步的清单：来源文件未变化时可直接使用其中的摘要
+    manifests = [load_sync_manifest(old_path) or {} for old_path in old_paths]
+    
+    # 先在主线程中创建缺少的目录
+    created_dirs = []
+    parents = sorted({Path(rel_path).parent for rel_path, _ in files_to_sync})
+    for label, old_path in zip(labels, old_paths):
+        for parent in parents:
+            dest_dir = old_path / parent
+            if not dest_dir.exists():
+                if not dry_run:
+                    dest_dir.mkdir(parents=True, exist_ok=True)
+                created_dirs.append((label, old_path, dest_dir))
+                reporter.log(f"📁 创建目录: {dest_dir.relative_to(old_path)}{label}")
+    
+    need_digest = write_manifest and not dry_run
+    
+    def task(item):
+        rel_path, src_stat = item
+        known_digest = None
+        for manifest in manifests:
+            old = manifest.get(rel_path)
+            if old and old["size"] == src_stat.st_size and old["mtime_ns"] == src_stat.st_mtime_ns:
+                known_digest = old["digest"]
+                break
+        return sync_file(new_path / rel_path, [old_path / rel_path for old_path in old_paths], src_stat,
+                         known_digest, dry_run, need_digest)
+    
+    # 同步文件（在线程池中比较和复制，按文件顺序输出结果）
+    counts = [{"synced": 0, "skipped": 0, "errors": 0} for _ in old_paths]
+    new_manifests = [{} for _ in old_paths]
+    with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) * 4)) as executor:
+        for (rel_path, src_stat), (digest, results) in zip(files_to_sync, executor.map(task, files_to_sync)):
+            for index, (action, error) in enumerate(results):
+                label = labels[index]
+                if action == "error":
+                    reporter.record("同步", rel_path, "error", f"❌ 复制失败: {rel_path}{label} - {error}",
+                                    error=str(error), dest=str(old_paths[index]))
+                    counts[index]["errors"] += 1
+                    continue
+                new_manifests[index][rel_path] = {"size": src_stat.st_size, "mtime_ns": src_stat.st_mtime_ns,
+                                                  "digest": digest}
+                if action == "unchanged":
+                    reporter.record("同步", rel_path, "unchanged",
+                                    f"⏩ 文件相同: {rel_path}{label} (跳过)" if reporter.verbose else None)
+                    counts[index]["skipped"] += 1
+                    continue
+                message = f"📝 [模拟] {action}文件: {rel_path}{label}" if dry_run else f"✅ {action}文件: {rel_path}{label}"
+                if multiple:
+                    reporter.record("同步", rel_path, action, message, dest=str(old_paths[index]))
+                else:
+                    reporter.record("同步", rel_path, action, message)
+                counts[index]["synced"] += 1
+    
+    # 写入校验清单
+    if need_digest:
+        for label, old_path, new_manifest in zip(labels, old_paths, new_manifests):
+            try:
+                save_sync_manifest(old_path, new_manifest)
+                reporter.log(f"🧾 已写入校验清单: {sync_manifest_path(old_path).name} ({len(new_manifest)} 个文件){label}")
+            except Exception as e:
+                reporter.error(f"❌ 写入校验清单失败{label}: {e}")
+    
+    # 输出摘要
+    total = {key: sum(count[key] for count in counts) for key in ("synced", "skipped", "errors")}
+    reporter.summary("\n同步结果摘要:")
+    reporter.summary(f"  总文件数: {len(files_to_sync)}")
+    if multiple:
+        for label, old_path, count in zip(labels, old_paths, counts):
+            line = f"  {label.strip()} 同步 {count['synced']}, 跳过 {count['skipped']}"
+            if count["errors"]:
+                line += f", 失败 {count['errors']}"
+            reporter.summary(f"{line}  ({old_path})")
+    else:
+        reporter.summary(f"  同步文件: {total['synced']}")
+        reporter.summary(f"  跳过文件: {total['skipped']}")
+        if total["errors"]:
+            reporter.summary(f"  失败文件: {total['errors']}")
+    
+    if created_dirs:
+        reporter.log("\n创建的目录:")
+        for label, old_path, dir_path in created_dirs:
+            reporter.log(f"  - {dir_path.relative_to(old_path)}{label}")
+    
+    reporter.flush()
+    return {
+        "total": len(files_to_sync), **total,
+        "destinations": {str(old_path): count for old_path, count in zip(old_paths, counts)},
+    }
+
+def deploy_paths(live_path):
+    """部署用的暂存目录和上一版本目录（与目标目录同级，保证可以直接重命名）"""
+    return live_path.with_name(f".{live_path.name}.staging"), live_path.with_name(f".{live_path.name}.previous")
+
+# renameat2 的参数：相对当前目录解析路径，原子交换两个路径
+AT_FDCWD = -100
+RENAME_EXCHANGE = 2
+
+def exchange_paths(a, b):
+    """
+    原子交换两个目录（Linux renameat2 的 RENAME_EXCHANGE），交换过程中两个路径始终存在
+    
+    平台或文件系统不支持时返回False（两个目录都未改动）
+    """
+    try:
+        import ctypes
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, TypeError, AttributeError):
+        return False
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    if renameat2(AT_FDCWD, os.fsencode(a), AT_FDCWD, os.fsencode(b), RENAME_EXCHANGE) == 0:
+        return True
+    error = ctypes.get_errno()
+    if error in (errno.ENOSYS, errno.EINVAL, errno.ENOTSUP):
+        return False
+    raise OSError(error, os.strerror(error), str(a))
+
+def recover_switch(live_path, reporter):
+    """
+    恢复被中断的切换
+    
+    不支持原子交换时，部署和回滚的切换分为多次重命名，中途当前目录会短暂不存在；
+    在此期间中断（如进程被终止）时，下次部署或回滚开始前先恢复：
+    部署中断时恢复原目录，回滚中断时恢复回滚前的目录或完成回滚
+    """
+    staging_path, previous_path = deploy_paths(live_path)
+    rollback_path = live_path.with_name(f".{live_path.name}.rollback")
+    if rollback_path.exists():
+        if not live_path.exists():
+            os.rename(rollback_path, live_path)
+            move_sync_manifest(rollback_path, live_path)
+            reporter.error(f"⚠️ 检测到中断的回滚，已恢复回滚前的目录: {live_path}")
+        elif not previous_path.exists():
+            os.rename(rollback_path, previous_path)
+            move_sync_manifest(rollback_path, previous_path)
+            reporter.error(f"⚠️ 检测到中断的回滚，已完成回滚: {live_path}")
+    elif not live_path.exists() and previous_path.exists():
+        os.rename(previous_path, live_path)
+        reporter.error(f"⚠️ 检测到中断的部署，已恢复原目录: {live_path}")
+
+def link_or_copy(src, dest):
+    """硬链接文件，文件系统不支持时复制"""
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+def deploy_data_pack(new_data_dir, old_data_dir, reporter=None, jobs=None):
+    """
+    原子部署：在同级暂存目录中构建新版本，校验后通过重命名切换，服务器 /reload 时不会读到同步了一半的数据包
+    
+    1. 内容和修改时间都未变化的文件从当前目录硬链接到暂存目录（不复制内容），其余文件从来源复制；
+       构建暂存目录时不修改当前目录中的任何文件。当前目录中来源没有的文件（包括 .bak 备份）同样保留
+    2. 写入校验清单，并按清单校验暂存目录（复制的文件重新计算摘要）
+    3. 原子交换暂存目录和当前目录（Linux renameat2 RENAME_EXCHANGE），交换后的原目录成为上一版本，
+       可用 rollback_data_pack 立即回滚
+    
+    不支持原子交换的平台（如 Windows）上切换为两次目录重命名，中间当前目录会短暂不存在；
+    切换中断时，下次部署或回滚会先恢复原目录（recover_switch）。
+    返回 {"total", "copied", "linked"}，失败时返回None（当前目录保持不变）
+    """
+    reporter = reporter or Reporter()
+    
+    new_path = Path(new_data_dir)
+    live_path = Path(old_data_dir)
+    staging_path, previous_path = deploy_paths(live_path)
+    recover_switch(live_path, reporter)
+    
+    if not new_path.exists():
+        reporter.error(f"❌ 新数据包目录不存在: {new_path}")
+        reporter.flush()
+        return None
+    
+    if not live_path.exists():
+        reporter.error(f"❌ 原始数据包目录不存在: {live_path}")
+        reporter.flush()
+        return None
+    
+    reporter.summary(f"开始部署数据包:")
+    reporter.summary(f"  来源: {new_path}")
+    reporter.summary(f"  目标: {live_path}")
+    reporter.summary(f"  暂存: {staging_path.name}")
+    
+    # 清理上次中断留下的暂存目录
+    if staging_path.exists():
+        shutil.rmtree(staging_path)
+    
+    files_to_sync = collect_source_files(new_path)
+    source_paths = {rel_path for rel_path, _ in files_to_sync}
+    # 当前目录中来源没有的文件（包括 .bak 备份，同样链接到新版本中）
+    extra_files = [rel_path for rel_path, _ in collect_source_files(live_path, skip_backups=False)
+                   if rel_path not in source_paths]
+    reporter.summary(f"找到 {len(files_to_sync)} 个需要同步的文件")
+    
+    manifest = load_sync_manifest(live_path) or {}
+    for parent in sorted({Path(rel_path).parent for rel_path in [*source_paths, *extra_files]}):
+        (staging_path / parent).mkdir(parents=True, exist_ok=True)
+    
+    def task(item):
+        rel_path, src_stat = item
+        src, live, staged = new_path / rel_path, live_path / rel_path, staging_path / rel_path
+        old = manifest.get(rel_path)
+        known_digest = None
+        if old and old["size"] == src_stat.st_size and old["mtime_ns"] == src_stat.st_mtime_ns:
+            known_digest = old["digest"]
+        try:
+            # 只比较，不同步当前文件的修改时间（硬链接的文件与当前目录共用元数据）
+            action, digest = check_dest(src, live, src_stat, known_digest, dry_run=True)
+            linked = action == "unchanged" and os.stat(live).st_mtime_ns == src_stat.st_mtime_ns
+            if linked:
+                link_or_copy(live, staged)
+            else:
+                shutil.copy2(src, staged)
+            return action, linked, digest or file_digest(src), None
+        except Exception as e:
+            return "error", False, None, e
+    
+    # 构建暂存目录
+    copied = []
+    linked_count = 0
+    error_count = 0
+    new_manifest = {}
+    with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) * 4)) as executor:
+        for (rel_path, src_stat), (action, linked, digest, error) in zip(files_to_sync,
+                                                                        executor.map(task, files_to_sync)):
+            if action == "error":
+                reporter.record("部署", rel_path, "error", f"❌ 暂存失败: {rel_path} - {error}", error=str(error))
+                error_count += 1
                 continue
+            new_manifest[rel_path] = {"size": src_stat.st_size, "mtime_ns": src_stat.st_mtime_ns, "digest": digest}
+            if linked:
+                reporter.record("部署", rel_path, "unchanged",
+                                f"🔗 文件相同: {rel_path} (硬链接)" if reporter.verbose else None)
+                linked_count += 1
+            elif action == "unchanged":
+                reporter.record("部署", rel_path, "unchanged",
+                                f"📄 文件相同: {rel_path} (修改时间不同，已复制)" if reporter.verbose else None)
+                copied.append(rel_path)
             else:
-                action = "更新"
-        else:
-            action = "新增"
-        
-        # 执行复制操作
-        if not dry_run:
+                reporter.record("部署", rel_path, action, f"✅ {action}文件: {rel_path}")
+                copied.append(rel_path)
+        for rel_path in extra_files:
             try:
-                shutil.copy2(src, dest)
-                print(f"✅ {action}文件: {rel_path}")
-                synced_count += 1
+                link_or_copy(live_path / rel_path, staging_path / rel_path)
             except Exception as e:
-                print(f"❌ 复制失败: {rel_path} - {e}")
-                skipped_count += 1
+                reporter.record("部署", rel_path, "error", f"❌ 暂存失败: {rel_path} - {e}", error=str(e))
+                error_count += 1
+    
+    # 校验暂存目录
+    problems = []
+    if not error_count:
+        save_sync_manifest(staging_path, new_manifest)
+        problems = verify_sync_manifest(staging_path, jobs=jobs, hash_paths=set(copied)) or []
+        for rel_path, problem in problems:
+            reporter.record("部署", rel_path, "error", f"❌ 校验失败: {problem}: {rel_path}")
+    if error_count or problems:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        sync_manifest_path(staging_path).unlink(missing_ok=True)
+        reporter.error("⚠️ 暂存目录构建或校验失败，已放弃部署，当前目录未改动")
+        reporter.flush()
+        return None
+    reporter.log(f"🧾 暂存目录校验通过 ({len(new_manifest)} 个文件)")
+    
+    # 切换：暂存目录成为当前目录，原目录成为上一版本
+    expired_path = live_path.with_name(f".{live_path.name}.expired")
+    if expired_path.exists():
+        shutil.rmtree(expired_path)
+    if previous_path.exists():
+        os.rename(previous_path, expired_path)
+    try:
+        if exchange_paths(staging_path, live_path):
+            # 交换后暂存目录中是原目录
+            os.rename(staging_path, previous_path)
         else:
-            print(f"📝 [模拟] {action}文件: {rel_path}")
-            synced_count += 1
+            os.rename(live_path, previous_path)
+            try:
+                os.rename(staging_path, live_path)
+            except Exception:
+                os.rename(previous_path, live_path)
+                raise
+    except Exception as e:
+        reporter.error(f"❌ 切换失败，当前目录未改动: {e}")
+        reporter.flush()
+        return None
+    move_sync_manifest(live_path, previous_path)
+    move_sync_manifest(staging_path, live_path)
+    shutil.rmtree(expired_path, ignore_errors=True)
     
-    # 输出摘要
-    print("\n同步结果摘要:")
-    print(f"  总文件数: {len(files_to_sync)}")
-    print(f"  同步文件: {synced_count}")
-    print(f"  跳过文件: {skipped_count}")
+    reporter.summary("\n部署结果摘要:")
+    reporter.summary(f"  总文件数: {len(files_to_sync)}")
+    reporter.summary(f"  复制文件: {len(copied)}")
+    reporter.summary(f"  硬链接文件: {linked_count}")
+    reporter.summary(f"  上一版本: {previous_path.name}（可用 --rollback 回滚）")
+    reporter.flush()
+    return {"total": len(files_to_sync), "copied": len(copied), "linked": linked_count}
+
+def rollback_data_pack(old_data_dir, reporter=None):
+    """
+    回滚到上一次部署前的版本（交换当前目录和上一版本目录，可再次回滚）
     
-    if created_dirs:
-        print("\n创建的目录:")
-        for dir_path in created_dirs:
-            print(f"  - {Path(dir_path).relative_to(old_path)}")
+    支持时原子交换；否则分三次重命名，中断后由 recover_switch 恢复
+    """
+    reporter = reporter or Reporter()
+    live_path = Path(old_data_dir)
+    _, previous_path = deploy_paths(live_path)
+    rollback_path = live_path.with_name(f".{live_path.name}.rollback")
+    recover_switch(live_path, reporter)
+    if not previous_path.exists():
+        reporter.error(f"❌ 没有可回滚的上一版本: {previous_path}")
+        reporter.flush()
+        return False
     
+    if not exchange_paths(previous_path, live_path):
+        os.rename(live_path, rollback_path)
+        os.rename(previous_path, live_path)
+        os.rename(rollback_path, previous_path)
+    move_sync_manifest(live_path, rollback_path)
+    move_sync_manifest(previous_path, live_path)
+    move_sync_manifest(rollback_path, previous_path)
+    reporter.summary(f"✅ 已回滚: {live_path}")
+    reporter.flush()
     return True
 
 if __name__ == "__main__":
     # 设置命令行参数
     parser = argparse.ArgumentParser(description='同步数据包文件')
     parser.add_argument('new_data', help='修改后的数据包data目录路径')
-    parser.add_argument('old_data', help='原始数据包的data目录路径')
-    parser.add_argument('-d', '--dry-run', action='store_true', help='模拟运行，不实际复制文件')
+    parser.add_argument('old_data', nargs='+', help='原始数据包的data目录路径（可以有多个，一次同步到所有目标）')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('-d', '--dry-run', action='store_true', help='模拟运行，不实际复制文件')
+    mode.add_argument('--deploy', action='store_true',
+                      help='原子部署：在同级暂存目录中构建并校验新版本后整体切换，保留上一版本用于回滚')
+    mode.add_argument('--rollback', action='store_true', help='回滚 old_data 到上一次部署前的版本（new_data 不使用）')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='复制文件的线程数（默认按CPU数）')
+    parser.add_argument('--no-manifest', action='store_true',
+                        help=f'不写入校验清单（目标目录旁的 .<目录名>{MANIFEST_SUFFIX}）')
+    mode.add_argument('--verify', action='store_true',
+                      help='不同步，只按校验清单检查 old_data 目录（与 --full 一起使用时重新计算摘要）')
+    parser.add_argument('--full', action='store_true', help='校验时重新计算所有文件的摘要')
+    add_reporter_arguments(parser)
     
     args = parser.parse_args()
+    reporter = reporter_from_args(args)
     
-    # 导入所需模块
-    try:
-        import filecmp
-    except ImportError:
-        print("❌ 需要filecmp模块，请确保使用标准Python环境")
-        sys.exit(1)
-    
-    # 执行同步
-    success = sync_data_packs(args.new_data, args.old_data, args.dry_run)
+    # 先恢复上次被中断的部署或回滚
+    for old_data in args.old_data:
+        recover_switch(Path(old_data), reporter)
     
-    if success:
-        print("\n✅ 同步操作完成")
+    if args.verify:
+        for old_data in args.old_data:
+            problems = verify_sync_manifest(old_data, args.full, args.jobs)
+            if problems is None:
+                reporter.error(f"❌ 没有找到校验清单: {sync_manifest_path(old_data)}")
+            elif problems:
+                for rel_path, problem in problems:
+                    reporter.record("校验", rel_path, "error", f"❌ {problem}: {rel_path}", dest=old_data)
+                reporter.error(f"⚠️ 校验失败: {old_data} 中 {len(problems)} 个文件与清单不符")
+            else:
+                reporter.summary(f"✅ 校验通过: {old_data}")
+        reporter.flush()
+    elif args.rollback:
+        for old_data in args.old_data:
+            rollback_data_pack(old_data, reporter)
+    elif args.deploy:
+        for old_data in args.old_data:
+            if deploy_data_pack(args.new_data, old_data, reporter, args.jobs) is not None:
+                reporter.summary("\n✅ 部署完成")
+            else:
+                reporter.error("\n⚠️ 部署未完成")
+        reporter.flush()
     else:
-        print("\n⚠️ 同步操作未完成")
\ No newline at end of file
+        # 执行同步
+        result = sync_data_packs(args.new_data, args.old_data, args.dry_run, reporter, args.jobs,
+                                 write_manifest=not args.no_manifest)
+        
+        if result is not None and not result["errors"]:
+            reporter.summary("\n✅ 同步操作完成")
+        else:
+            reporter.error("\n⚠️ 同步操作未完成")
+        reporter.flush()
+    if args.report_json:
+        reporter.write_json(args.report_json, new_data=args.new_data, old_data=args.old_data, dry_run=args.dry_run)
\ No newline at end of file
@@ -0,0 +1,96 @@
+import argparse
+from reporter import Reporter, add_reporter_arguments, reporter_from_args
+from item_catalog import load_catalog
+from pack_files import PackOverlay
+import cost_updator
+import description_updator
+import book_updator
+import item_sorter
+
+# 上新流程的各阶段（按执行顺序：排序放在最后，对前面追加的条目一起排序）
+STAGES = ['cost', 'description', 'book', 'sort']
+
+class UpdateSession:
+    """
+    一次完整的上新流程
+    
+    各更新阶段共享道具目录和数据包的内存覆盖层：每个文件只从磁盘读取一次，
+    所有阶段完成后每个修改过的文件只写回一次（如 remove.mcfunction 先更新费用再排序，只写一次）
+    """
+    def __init__(self, excel_path=cost_updator.EXCEL_PATH, reporter=None, create_backups=True):
+        self.excel_path = excel_path
+        self.reporter = reporter or Reporter()
+        self.create_backups = create_backups
+        # 各更新器通过 load_catalog 取得同一个已加载的目录
+        self.catalog = load_catalog(excel_path)
+        self.files = PackOverlay()
+    
+    def run_cost(self):
+        # cost_updator 使用模块级的输出器和文件读写，运行期间替换为本次会话的
+        saved = cost_updator.reporter, cost_updator.pack
+        cost_updator.reporter, cost_updator.pack = self.reporter, self.files
+        try:
+            cost_updator.update_costs(self.excel_path, create_backups=self.create_backups)
+        finally:
+            cost_updator.reporter, cost_updator.pack = saved
+    
+    def run_description(self):
+        description_updator.DataPackUpdater(self.excel_path, description_updator.CONFIG,
+                                            self.reporter, self.files).run()
+    
+    def run_book(self):
+        book_updator.BookModifierUpdater(self.excel_path, book_updator.BOOK_MODIFIER_CONFIG,
+                                         self.reporter, self.files).run()
+    
+    def run_sort(self):
+        sorter = item_sorter.FileSorter(self.excel_path, None, self.reporter, self.files)
+        if not self.create_backups:
+            # 使用副本：配置条目可能与默认配置共用
+            sorter.config = [dict(cfg, backup=False) for cfg in sorter.config]
+        sorter.run()
+    
+    def run(self, stages=STAGES, dry_run=False):
+        """依次运行各阶段，最后写回修改过的文件（dry_run 时只列出），返回修改过的文件列表"""
+        self.reporter.summary(f"道具目录: {len(self.catalog)} 个道具"
+                              f"{'（重新解析了表格）' if self.catalog.parsed else '（使用缓存）'}")
+        for stage in stages:
+            self.reporter.section(f"\n{'=' * 50}\n阶段: {stage}\n{'=' * 50}")
+            getattr(self, f'run_{stage}')()
+        
+        self.reporter.section(f"\n{'=' * 50}\n写回数据包\n{'=' * 50}")
+        if dry_run:
+            changed = self.files.dirty()
+            for key in changed:
+                self.reporter.record("写回", key, "modified", f"📝 将写回: {key}")
+        else:
+            changed = self.files.flush()
+            for key in changed:
+                self.reporter.record("写回", key, "modified", f"💾 已写回: {key}")
+        self.reporter.summary(f"读取了 {len(self.files.originals)} 个文件，"
+                              f"{'将写回' if dry_run else '写回了'} {len(changed)} 个文件")
+        return changed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='一次运行完整的上新流程（费用、描述、书本、排序），每个文件只读写一次')
+    parser.add_argument('--stages', type=str, default=','.join(STAGES),
+                        help=f'要运行的阶段，逗号分隔（默认: {",".join(STAGES)}）')
+    parser.add_argument('-n', '--dry-run', action='store_true', help='只列出将写回的文件，不修改数据包')
+    parser.add_argument('--no-backup', action='store_true', help='不创建 .bak 备份')
+    add_reporter_arguments(parser)
+    args = parser.parse_args()
+    reporter = reporter_from_args(args)
+    
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"未知阶段: {', '.join(unknown)}（可选: {', '.join(STAGES)}）")
+    
+    session = UpdateSession(cost_updator.EXCEL_PATH, reporter, create_backups=not args.no_backup and not args.dry_run)
+    session.run(stages, dry_run=args.dry_run)
+    
+    reporter.summary("=" * 50)
+    reporter.summary("上新流程完成！" if not args.dry_run else "预演完成（未修改数据包）")
+    reporter.summary("=" * 50)
+    reporter.flush()
+    if args.report_json:
+        reporter.write_json(args.report_json)
\ No newline at end of file
@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+# 脚本不是包，测试直接按脚本目录导入
+SCRIPT_DIR = Path(__file__).resolve().parent.parent / 'script'
+PACK_SCRIPT_DIR = SCRIPT_DIR / '皇室导弹战争数据包更新'
+for path in (SCRIPT_DIR, PACK_SCRIPT_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,68 @@
+import io
+import cost_updator
+from pack_files import PackFiles
+from reporter import Reporter
+
+class FakeCatalog:
+    def __init__(self, rows):
+        self.rows = rows
+    
+    def records(self, keep_default_na=True, column_mapping=None):
+        return [dict(row) for row in self.rows]
+
+PER_ITEM_CONFIG = {
+    "items/{name}.mcfunction": {
+        "type": "text",
+        "is_per_item_file": True,
+        "create_if_missing": True,
+        "rules": [
+            {
+                "pattern": r'xp add @s -\d+ levels # <ID>',
+                "replacement": 'xp add @s -{cost} levels # {id}',
+                "append_template": 'xp add @s -{cost} levels # {id}'
+            }
+        ]
+    }
+}
+
+def test_update_costs_renders_per_item_files(tmp_path, monkeypatch):
+    rows = [{"id": "arrow", "name": "箭", "cost": 3}, {"id": "tnt", "name": "炸药", "cost": 5}]
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cost_updator, 'load_catalog', lambda excel_path: FakeCatalog(rows))
+    stream = io.StringIO()
+    monkeypatch.setattr(cost_updator, 'reporter', Reporter(Reporter.NORMAL, stream))
+    monkeypatch.setattr(cost_updator, 'pack', PackFiles())
+    (tmp_path / 'items').mkdir()
+    (tmp_path / 'items' / '箭.mcfunction').write_text('xp add @s -1 levels # arrow\n', encoding='utf-8')
+    
+    cost_updator.update_costs('道具信息.xlsx', PER_ITEM_CONFIG, create_backups=False)
+    cost_updator.reporter.flush()
+    
+    assert (tmp_path / 'items' / '箭.mcfunction').read_text(encoding='utf-8') == 'xp add @s -3 levels # arrow\n'
+    assert (tmp_path / 'items' / '炸药.mcfunction').read_text(encoding='utf-8') == '\nxp add @s -5 levels # tnt'
+    output = stream.getvalue()
+    # 渲染时的消息按文件顺序输出
+    assert output.index('在 箭.mcfunction 中更新了 arrow') < output.index('在 炸药.mcfunction 中添加了新道具: tnt')
+    assert '渲染了 2 个文件, 写回了 2 个' in output
+    
+    # 内容已是最新时不再写回
+    cost_updator.reporter.buffer.clear()
+    stream.truncate(0)
+    cost_updator.update_costs('道具信息.xlsx', PER_ITEM_CONFIG, create_backups=False)
+    cost_updator.reporter.flush()
+    assert '写回了 0 个' in stream.getvalue()
+
+def test_render_text_appends_missing_items_in_item_order():
+    items = {"箭": {"id": "arrow", "cost": 3}, "炸药": {"id": "tnt", "cost": 5}}
+    config = {
+        "rules": [
+            {"pattern": r'cost <ID> \d+', "replacement": 'cost {id} {cost}', "append_template": 'cost {id} {cost}'},
+            {"pattern": r'give <ID>', "replacement": 'give {id}', "append_template": 'give {id}',
+             "append_after": '#不存在'},
+        ]
+    }
+    
+    content, modified = cost_updator.render_text('say hi', items, config, 'a.mcfunction', Reporter(Reporter.QUIET))
+    assert modified
+    # 与逐个道具拼接时相同：先道具、后规则
+    assert content == 'say hi\ncost arrow 3\ngive arrow\ncost tnt 5\ngive tnt'
\ No newline at end of file
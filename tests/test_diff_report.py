@@ -0,0 +1,29 @@
+import io
+from diff_report import TextReportWriter, take_lines
+
+def counted_lines(count, consumed):
+    for index in range(count):
+        consumed.append(index)
+        yield f"+line {index}"
+
+def test_take_lines_stops_after_limit():
+    consumed = []
+    lines, truncated = take_lines(counted_lines(10000, consumed), 3)
+    assert lines == ["+line 0", "+line 1", "+line 2"]
+    assert truncated is True
+    # 只多取一行用于判断是否截断
+    assert len(consumed) == 4
+
+def test_take_lines_within_limit_is_not_truncated():
+    assert take_lines(counted_lines(3, []), 3) == (["+line 0", "+line 1", "+line 2"], False)
+    assert take_lines(counted_lines(5, []), 0) == ([f"+line {index}" for index in range(5)], False)
+
+def test_text_report_counts_truncated_files():
+    stream = io.StringIO()
+    writer = TextReportWriter(stream, max_total_lines=3)
+    writer.file("modified", "a.json", "📝 已修改: a.json", ["+1", "+2"], truncated=True)
+    writer.file("modified", "b.json", "📝 已修改: b.json", ["+1", "+2"])
+    writer.end({}, "")
+    text = stream.getvalue()
+    assert text.count("... 差异已截断") == 2
+    assert "差异被截断的文件: 2" in text
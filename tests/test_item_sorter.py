@@ -0,0 +1,43 @@
+import item_sorter
+from reporter import Reporter
+
+class FakeCatalog:
+    def __init__(self, rows):
+        self.rows = rows
+    
+    def records(self, keep_default_na=True, column_mapping=None):
+        return self.rows
+
+def test_integer_sort_fields_keep_string_order(monkeypatch):
+    rows = [
+        {"物品代号": "a", "类型": 1, "编号": 10},
+        {"物品代号": "b", "类型": 1, "编号": 9},
+        {"物品代号": "c", "类型": 1, "编号": 2.5},
+        {"物品代号": "d", "类型": 1, "编号": 1.5},
+    ]
+    monkeypatch.setattr(item_sorter, 'load_catalog', lambda excel_path: FakeCatalog(rows))
+    sorter = item_sorter.FileSorter('道具信息.xlsx', reporter=Reporter(Reporter.QUIET))
+    
+    # 整数列与以前一样按字符串比较（"10" < "9"）
+    items = [{"id": "b"}, {"id": "a"}]
+    sorted_items, _ = sorter.sort_items(items, ["类型", "编号"], "asc")
+    assert [item["id"] for item in sorted_items] == ["a", "b"]
+    
+    # 小数列仍按数值比较
+    items = [{"id": "c"}, {"id": "d"}]
+    sorted_items, _ = sorter.sort_items(items, ["编号"], "asc")
+    assert [item["id"] for item in sorted_items] == ["d", "c"]
+
+
+def test_session_sort_without_backups_keeps_default_config(monkeypatch):
+    import update_session
+    monkeypatch.setattr(item_sorter, 'load_catalog', lambda excel_path: FakeCatalog([]))
+    monkeypatch.setattr(update_session, 'load_catalog', lambda excel_path: FakeCatalog([]))
+    sorters = []
+    monkeypatch.setattr(item_sorter.FileSorter, 'run', lambda self: sorters.append(self))
+    session = update_session.UpdateSession('道具信息.xlsx', Reporter(Reporter.QUIET), create_backups=False)
+    
+    session.run_sort()
+    sorter, = sorters
+    assert sorter.config and not any(cfg["backup"] for cfg in sorter.config)
+    assert all(cfg["backup"] for cfg in sorter.default_config)
\ No newline at end of file
@@ -0,0 +1,77 @@
+import subprocess
+import zipfile
+from pack_sources import GitSource, confirm_crc_digests
+from compare_packs import compare_data_packs
+from reporter import Reporter
+
+class MemorySource:
+    def __init__(self, files):
+        self.files = files
+    
+    def read_bytes(self, rel_path):
+        return self.files[rel_path]
+
+def test_confirm_crc_digests_separates_crc_collisions():
+    new = MemorySource({"a.json": b"new", "b.json": b"same", "c.json": b"only new"})
+    old = MemorySource({"a.json": b"old", "b.json": b"same"})
+    # a.json 两侧的大小和CRC相同但内容不同
+    new_files = {"a.json": {"size": 3, "digest": "0000002a"}, "b.json": {"size": 4, "digest": "12345678"},
+                 "c.json": {"size": 8, "digest": "0000002a"}}
+    old_files = {"a.json": {"size": 3, "digest": "0000002a"}, "b.json": {"size": 4, "digest": "12345678"}}
+    
+    assert confirm_crc_digests([new, old], [new_files, old_files], verify=True) == 4
+    assert new_files["a.json"]["digest"] != old_files["a.json"]["digest"]
+    assert new_files["b.json"]["digest"] == old_files["b.json"]["digest"]
+    assert new_files["c.json"]["digest"] == "8:0000002a"
+
+def test_confirm_crc_digests_trusts_size_and_crc_by_default():
+    class UnreadableSource:
+        def read_bytes(self, rel_path):
+            raise AssertionError(f"不应读取 {rel_path}")
+    
+    new_files = {"a.json": {"size": 3, "digest": "0000002a"}, "b.json": {"size": 4, "digest": "0000002a"}}
+    old_files = {"a.json": {"size": 3, "digest": "0000002a"}}
+    
+    assert confirm_crc_digests([UnreadableSource(), UnreadableSource()], [new_files, old_files]) == 0
+    assert new_files["a.json"]["digest"] == old_files["a.json"]["digest"] == "3:0000002a"
+    assert new_files["b.json"]["digest"] == "4:0000002a"
+
+def test_git_source_reads_blobs_through_one_batch_process(tmp_path):
+    repo = tmp_path / 'repo'
+    (repo / 'data').mkdir(parents=True)
+    (repo / 'data' / 'a.json').write_text('{"a": 1}\n', encoding='utf-8')
+    (repo / 'data' / 'b.mcfunction').write_text('say hi\n', encoding='utf-8')
+    for args in (['init', '-q'], ['add', '.'],
+                 ['-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-q', '-m', 'init']):
+        subprocess.run(['git', '-C', str(repo), *args], check=True)
+    
+    source = GitSource('HEAD', 'data', repo)
+    try:
+        assert source.read_bytes('a.json') == b'{"a": 1}\n'
+        batch = source.batch
+        assert source.read_bytes('b.mcfunction') == b'say hi\n'
+        assert source.batch is batch
+        files = source.manifest('blake2')
+        assert sorted(files) == ['a.json', 'b.mcfunction']
+    finally:
+        source.close()
+    assert source.batch is None
+
+def test_compare_zip_with_directory_in_worker_processes(tmp_path):
+    new_dir = tmp_path / 'new'
+    new_dir.mkdir()
+    (new_dir / 'a.mcfunction').write_text('say new\n', encoding='utf-8')
+    (new_dir / 'b.mcfunction').write_text('say old\n', encoding='utf-8')
+    (new_dir / 'c.mcfunction').write_text('say c2\n', encoding='utf-8')
+    zip_path = tmp_path / 'old.zip'
+    with zipfile.ZipFile(zip_path, 'w') as archive:
+        archive.writestr('a.mcfunction', 'say old\n')
+        archive.writestr('b.mcfunction', 'say old\n')
+        archive.writestr('c.mcfunction', 'say c1\n')
+    
+    report = tmp_path / 'report.txt'
+    assert compare_data_packs(new_dir, zip_path, report, Reporter(Reporter.QUIET), use_cache=False,
+                              report_format='text', diff_jobs=2)
+    text = report.read_text(encoding='utf-8')
+    assert '+say new' in text and '+say c2' in text
+    assert '相同文件: 1' in text
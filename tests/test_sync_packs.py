@@ -0,0 +1,129 @@
+import json
+from reporter import Reporter
+from sync_packs import (LEGACY_MANIFEST_NAME, deploy_data_pack, rollback_data_pack, sync_data_packs,
+                        sync_manifest_path, verify_sync_manifest)
+
+def make_pack(root, files):
+    for rel_path, text in files.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+
+def quiet():
+    return Reporter(Reporter.QUIET)
+
+def test_manifest_is_written_beside_the_destination(tmp_path):
+    new, old = tmp_path / 'new' / 'data', tmp_path / 'old' / 'data'
+    make_pack(new, {'a/b.json': '{}'})
+    make_pack(old, {LEGACY_MANIFEST_NAME: '{}'})
+    assert sync_data_packs(new, old, reporter=quiet())["synced"] == 1
+    
+    assert sorted(path.name for path in old.rglob('*')) == ['a', 'b.json']
+    assert sync_manifest_path(old) == tmp_path / 'old' / '.data.sync_manifest.json'
+    assert list(json.loads(sync_manifest_path(old).read_text(encoding='utf-8'))["files"]) == ['a/b.json']
+    assert verify_sync_manifest(old) == []
+
+def test_verify_distinguishes_missing_and_empty_manifest(tmp_path):
+    new, old = tmp_path / 'new', tmp_path / 'old'
+    new.mkdir()
+    old.mkdir()
+    assert verify_sync_manifest(old) is None
+    sync_data_packs(new, old, reporter=quiet())
+    assert verify_sync_manifest(old) == []
+
+def test_deploy_and_rollback_keep_manifest_with_its_version(tmp_path):
+    new, live = tmp_path / 'new', tmp_path / 'live'
+    make_pack(new, {'a.json': 'new'})
+    make_pack(live, {'a.json': 'old'})
+    sync_data_packs(live, live, reporter=quiet())
+    
+    assert deploy_data_pack(new, live, quiet()) is not None
+    assert verify_sync_manifest(live, full=True) == []
+    assert rollback_data_pack(live, quiet())
+    assert (live / 'a.json').read_text(encoding='utf-8') == 'old'
+    assert verify_sync_manifest(live, full=True) == []
+
+def test_sync_to_several_destinations_reads_each_source_once(tmp_path, monkeypatch):
+    from pathlib import Path
+    new = tmp_path / 'new'
+    first, second = tmp_path / 'first', tmp_path / 'second'
+    make_pack(new, {'a.json': 'a2', 'b.json': 'b'})
+    make_pack(first, {'a.json': 'a1'})
+    second.mkdir()
+    reads = []
+    read_bytes = Path.read_bytes
+    def counting_read_bytes(path):
+        if new in path.parents:
+            reads.append(path.name)
+        return read_bytes(path)
+    monkeypatch.setattr(Path, 'read_bytes', counting_read_bytes)
+    
+    result = sync_data_packs(new, [first, second], reporter=quiet(), jobs=4)
+    assert sorted(reads) == ['a.json', 'b.json']
+    assert result["destinations"] == {
+        str(first): {"synced": 2, "skipped": 0, "errors": 0},
+        str(second): {"synced": 2, "skipped": 0, "errors": 0},
+    }
+    for dest in (first, second):
+        assert (dest / 'a.json').read_text(encoding='utf-8') == 'a2'
+        assert verify_sync_manifest(dest, full=True) == []
+    
+    result = sync_data_packs(new, [first, second], reporter=quiet(), jobs=4)
+    assert result["synced"] == 0 and result["skipped"] == 4
+
+def test_deploy_does_not_touch_live_files_and_keeps_backups(tmp_path):
+    import os
+    new, live = tmp_path / 'new', tmp_path / 'live'
+    make_pack(new, {'a.json': 'same', 'b.json': 'b'})
+    make_pack(live, {'a.json': 'same', 'b.json': 'b', 'b.json.bak': 'backup'})
+    os.utime(live / 'a.json', ns=(1, 1_000_000_000))
+    os.utime(new / 'b.json', ns=(2, 2_000_000_000))
+    os.utime(live / 'b.json', ns=(2, 2_000_000_000))
+    
+    result = deploy_data_pack(new, live, quiet())
+    assert result == {"total": 2, "copied": 1, "linked": 1}
+    previous = tmp_path / '.live.previous'
+    # 内容相同但修改时间不同的文件复制过来，原目录中的文件未被修改
+    assert (previous / 'a.json').stat().st_mtime_ns == 1_000_000_000
+    assert (live / 'a.json').stat().st_mtime_ns == (new / 'a.json').stat().st_mtime_ns
+    assert (live / 'b.json.bak').read_text(encoding='utf-8') == 'backup'
+    assert verify_sync_manifest(live, full=True) == []
+
+def test_deploy_and_rollback_without_atomic_exchange(tmp_path, monkeypatch):
+    import sync_packs
+    monkeypatch.setattr(sync_packs, 'exchange_paths', lambda a, b: False)
+    new, live = tmp_path / 'new', tmp_path / 'live'
+    make_pack(new, {'a.json': 'new'})
+    make_pack(live, {'a.json': 'old'})
+    
+    assert deploy_data_pack(new, live, quiet()) is not None
+    assert (live / 'a.json').read_text(encoding='utf-8') == 'new'
+    assert rollback_data_pack(live, quiet())
+    assert (live / 'a.json').read_text(encoding='utf-8') == 'old'
+    assert (tmp_path / '.live.previous' / 'a.json').read_text(encoding='utf-8') == 'new'
+    assert not (tmp_path / '.live.rollback').exists()
+
+def test_interrupted_switches_are_recovered(tmp_path):
+    from sync_packs import recover_switch
+    live = tmp_path / 'live'
+    previous = tmp_path / '.live.previous'
+    rollback = tmp_path / '.live.rollback'
+    make_pack(previous, {'a.json': 'old'})
+    
+    # 部署在两次重命名之间中断
+    recover_switch(live, quiet())
+    assert (live / 'a.json').read_text(encoding='utf-8') == 'old'
+    
+    # 回滚在第一次重命名之后中断
+    make_pack(previous, {'a.json': 'older'})
+    live.rename(rollback)
+    recover_switch(live, quiet())
+    assert (live / 'a.json').read_text(encoding='utf-8') == 'old'
+    assert (previous / 'a.json').read_text(encoding='utf-8') == 'older'
+    
+    # 回滚在最后一次重命名之前中断
+    live.rename(rollback)
+    previous.rename(live)
+    recover_switch(live, quiet())
+    assert (live / 'a.json').read_text(encoding='utf-8') == 'older'
+    assert (previous / 'a.json').read_text(encoding='utf-8') == 'old'
@@ -0,0 +1,152 @@
+from reporter import Reporter
+from updator import MinecraftUpgrader
+
+def make_upgrader():
+    return MinecraftUpgrader(reporter=Reporter(Reporter.QUIET))
+
+def test_walk_pack_skips_git_dirs_and_gitlink_files(tmp_path):
+    (tmp_path / '.git').mkdir()
+    (tmp_path / '.git' / 'HEAD').write_text('ref: refs/heads/main\n')
+    sub = tmp_path / 'data' / 'sub'
+    sub.mkdir(parents=True)
+    # 子模块或工作树中的.git是指向真实仓库的文件
+    (sub / '.git').write_text('gitdir: ../../.git/modules/sub\n')
+    (sub / 'a.mcfunction').write_text('say hi\n')
+    
+    upgrader = make_upgrader()
+    walked = [f"{rel_root}/{name}" for _, rel_root, _, files in upgrader.walk_pack(tmp_path) for name in files]
+    assert walked == ['data/sub/a.mcfunction']
+
+def test_copy_directory_does_not_copy_gitlink_file(tmp_path):
+    source = tmp_path / 'source'
+    sub = source / 'data' / 'sub'
+    sub.mkdir(parents=True)
+    (sub / '.git').write_text('gitdir: elsewhere\n')
+    (sub / 'a.mcfunction').write_text('say hi\n')
+    target = tmp_path / 'target'
+    
+    assert make_upgrader().copy_directory(source, target)
+    assert (target / 'data' / 'sub' / 'a.mcfunction').exists()
+    assert not (target / 'data' / 'sub' / '.git').exists()
+
+def make_platform_pack(root, text):
+    platform = root / 'data' / 'missile_wars' / 'function' / 'platform'
+    platform.mkdir(parents=True)
+    (platform / 'a.mcfunction').write_text(text, encoding='utf-8')
+    return platform / 'a.mcfunction'
+
+def test_plan_includes_files_the_manifest_would_skip(tmp_path):
+    import json, os
+    pack = tmp_path / 'pack'
+    target = make_platform_pack(pack, 'say \'"hi"\'\n')
+    make_upgrader().upgrade_datapack(pack)
+    upgraded = target.read_bytes()
+    st = target.stat()
+    # 内容重新变为待升级，但大小和修改时间与清单记录一致
+    target.write_bytes(b"'\"" + b'x' * (len(upgraded) - 4) + b"\"'")
+    os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+    
+    plan_path = tmp_path / 'plan.json'
+    make_upgrader().preview_upgrade(pack, incremental=True, plan_path=plan_path)
+    plan = json.loads(plan_path.read_text(encoding='utf-8'))
+    assert [entry['path'] for entry in plan['files']] == ['data/missile_wars/function/platform/a.mcfunction']
+
+def test_apply_plan_rejects_plan_for_another_datapack(tmp_path):
+    pack = tmp_path / 'pack'
+    other = tmp_path / 'other'
+    target = make_platform_pack(pack, 'say \'"hi"\'\n')
+    other_target = make_platform_pack(other, 'say \'"hi"\'\n')
+    plan_path = tmp_path / 'plan.json'
+    make_upgrader().preview_upgrade(pack, plan_path=plan_path)
+    
+    assert make_upgrader().apply_plan(other, plan_path) is False
+    assert other_target.read_text(encoding='utf-8') == 'say \'"hi"\'\n'
+    assert make_upgrader().apply_plan(pack, plan_path) is True
+    assert target.read_text(encoding='utf-8') == "say 'hi'\n"
+
+def test_json_transform_that_restores_data_keeps_original_text():
+    upgrader = make_upgrader()
+    upgrader.set_config([{
+        "name": "往返重命名", "description": "", "path": "*.json", "type": "json",
+        "transforms": [{"path": "", "op": "rename", "key": "a", "to": "b"},
+                       {"path": "", "op": "rename", "key": "b", "to": "a"}],
+    }], report_errors=False)
+    content = '{"a":   1}\n'
+    new_content, op_counts = upgrader.upgrade_content(content, [0])
+    assert new_content == content
+
+def test_invalid_json_falls_back_to_text_rules_with_warning():
+    upgrader = make_upgrader()
+    upgrader.set_config(upgrader.default_config, report_errors=False)
+    op_index = next(i for i, op in enumerate(upgrader.config) if op["name"].startswith("规则2"))
+    content = '{\n  "key": {\n    "A": {\n      "item": "minecraft:stone"\n    },\n  }\n}\n'
+    warnings = []
+    new_content, op_counts = upgrader.upgrade_content(content, [op_index], warnings=warnings)
+    assert '"A": "minecraft:stone"' in new_content
+    assert op_counts == [(op_index, 1)]
+    assert len(warnings) == 1 and "改用文本规则" in warnings[0]
+
+def test_can_place_on_rule_merges_existing_tooltip_display():
+    import json
+    upgrader = make_upgrader()
+    upgrader.set_config(upgrader.default_config, report_errors=False)
+    op_index = next(i for i, op in enumerate(upgrader.config) if op["name"].startswith("规则5"))
+    content = json.dumps({"components": {
+        "can_place_on": {"predicates": [{"blocks": "#missile_wars:game_block"}], "show_in_tooltip": False},
+        "tooltip_display": {"hidden_components": ["enchantments"]},
+    }}, indent=2)
+    new_content, op_counts = upgrader.upgrade_content(content, [op_index])
+    assert json.loads(new_content)["components"] == {
+        "can_place_on": {"blocks": "#missile_wars:game_block"},
+        "tooltip_display": {"hidden_components": ["enchantments", "can_place_on"]},
+    }
+
+def write_mcmeta(root, pack_format):
+    import json
+    root.mkdir(parents=True, exist_ok=True)
+    (root / 'pack.mcmeta').write_text(json.dumps({"pack": {"pack_format": pack_format}}), encoding='utf-8')
+
+def test_select_migrations_falls_back_to_all_operations_without_formats(tmp_path):
+    upgrader = make_upgrader()
+    # 没有 pack.mcmeta
+    assert upgrader.select_migrations(tmp_path) is True
+    assert upgrader.config == upgrader.default_config
+    # 迁移图中没有该版本
+    write_mcmeta(tmp_path, 57)
+    assert upgrader.select_migrations(tmp_path) is True
+    assert upgrader.config == upgrader.default_config
+
+def test_select_migrations_with_explicit_format_names_known_formats(tmp_path):
+    messages = []
+    upgrader = make_upgrader()
+    upgrader.reporter.error = messages.append
+    assert upgrader.select_migrations(tmp_path, source_format=57) is False
+    assert messages == ["❌ 没有从 pack_format 57 到最新版本的迁移路径（已知版本: 48, 81）"]
+    
+    write_mcmeta(tmp_path, 48)
+    assert upgrader.select_migrations(tmp_path, target_format=81) is True
+    assert upgrader.config == upgrader.default_config
+
+def test_in_place_upgrade_does_not_write_through_hardlinks(tmp_path):
+    import os
+    source = make_platform_pack(tmp_path / 'source', 'say \'"hi"\'\n')
+    target = tmp_path / 'target' / source.relative_to(tmp_path / 'source')
+    target.parent.mkdir(parents=True)
+    os.link(source, target)
+    
+    make_upgrader().upgrade_datapack(tmp_path / 'target')
+    assert target.read_text(encoding='utf-8') == "say 'hi'\n"
+    assert source.read_text(encoding='utf-8') == 'say \'"hi"\'\n'
+
+def test_apply_plan_does_not_write_through_hardlinks(tmp_path):
+    import os
+    pack = tmp_path / 'pack'
+    target = make_platform_pack(pack, 'say \'"hi"\'\n')
+    partner = tmp_path / 'partner.mcfunction'
+    os.link(target, partner)
+    plan_path = tmp_path / 'plan.json'
+    make_upgrader().preview_upgrade(pack, plan_path=plan_path)
+    
+    assert make_upgrader().apply_plan(pack, plan_path) is True
+    assert target.read_text(encoding='utf-8') == "say 'hi'\n"
+    assert partner.read_text(encoding='utf-8') == 'say \'"hi"\'\n'
\ No newline at end of file